@@ -4,12 +4,26 @@ from flask import Flask, render_template, request, redirect, url_for, flash, jso
 from werkzeug.utils import secure_filename
 import uuid
 import time
+import hashlib
+import math
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
 from pathlib import Path
 
 # Import utility modules
-from utils.video_processor import process_video
-from utils.commentary_generator import generate_commentary
-from utils.text_to_speech import text_to_speech
+from utils.video_processor import process_video, probe_video, segment_frames
+from utils.commentary_generator import CommentaryStream, generate_commentary
+from utils.text_to_speech import text_to_speech, warm_cache
+from utils.jobs import JobManager, QueueFullError
+from utils.result_store import create_result_store
+from utils.event_index import EventIndexCache
+from utils.analysis_cache import AnalysisCache
+from utils.tts_cache import TTSCache
+from utils.tts_engines import get_tts_engine
+from utils.audio_bank import AudioBank
+from utils.detector_backends import get_detector
+from utils.pose_backends import get_pose_backend
+from utils.ffmpeg_decoder import FFMPEG_AVAILABLE, DECODE_WIDTH
 
 # Configure logging
 logging.basicConfig(level=logging.DEBUG)
@@ -43,6 +57,56 @@ app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
 app.config['RESULTS_FOLDER'] = RESULTS_FOLDER
 app.config['SAMPLE_FOLDER'] = SAMPLE_FOLDER
 app.config['MAX_CONTENT_LENGTH'] = 500 * 1024 * 1024  # 500MB max upload size
+app.config['ANALYSIS_WORKERS'] = int(os.environ.get('ANALYSIS_WORKERS', 1))  # Processes per video
+app.config['DETECTION_PROFILE'] = os.environ.get('DETECTION_PROFILE', 'full')  # See object_detection.DETECTION_PROFILES
+app.config['SKIP_STATIC_FRAMES'] = os.environ.get('SKIP_STATIC_FRAMES', '1') == '1'  # Motion-gated detection
+# 'opencv' or 'ffmpeg'. With OpenCV and ANALYSIS_WORKERS > 1 the processed
+# video needs a second decode of the input; ffmpeg shares its frames instead
+app.config['DECODE_BACKEND'] = os.environ.get('DECODE_BACKEND', 'opencv')
+app.config['JOB_WORKERS'] = int(os.environ.get('JOB_WORKERS', 2))  # Videos processed concurrently
+app.config['JOB_QUEUE_SIZE'] = int(os.environ.get('JOB_QUEUE_SIZE', 8))  # Videos waiting for a worker
+
+app.config['RESULT_STORE_PATH'] = os.environ.get('RESULT_STORE_PATH', './instance/results.db')
+if os.environ.get('DATABASE_URL'):
+    app.config['SQLALCHEMY_DATABASE_URI'] = os.environ['DATABASE_URL']
+
+app.config['ANALYSIS_CACHE_DIR'] = os.environ.get('ANALYSIS_CACHE_DIR', './cache/analysis')
+app.config['ANALYSIS_CACHE_MAX_BYTES'] = int(os.environ.get('ANALYSIS_CACHE_MAX_BYTES', 2 * 1024 ** 3))  # LRU-evicted beyond this
+app.config['TTS_CACHE_DIR'] = os.environ.get('TTS_CACHE_DIR', './cache/tts')
+app.config['TTS_CACHE_MAX_BYTES'] = int(os.environ.get('TTS_CACHE_MAX_BYTES', 256 * 1024 ** 2))  # LRU-evicted beyond this
+app.config['AUDIO_BANK_DIR'] = os.environ.get('AUDIO_BANK_DIR', './instance/audio_bank')  # Built by python -m utils.audio_bank
+
+# Processing results live server-side; the session only holds their id
+result_store = create_result_store(app)
+SAMPLE_RESULTS_ID = 'demo-results'
+
+# Timestamp indexes for /api/events, rebuilt when a result changes
+event_indexes = EventIndexCache()
+MAX_EVENTS_PAGE = 1000
+
+# Analysis results by video content, reused when the same video comes back
+analysis_cache = AnalysisCache(app.config['ANALYSIS_CACHE_DIR'], app.config['ANALYSIS_CACHE_MAX_BYTES'])
+
+# Synthesized commentary sentences, shared by all jobs
+tts_cache = TTSCache(app.config['TTS_CACHE_DIR'], app.config['TTS_CACHE_MAX_BYTES'])
+
+# Loaded now so an engine that can't run here stops the app at startup
+# rather than failing every job
+get_tts_engine()
+
+# Pre-rendered template phrases, if a bank was built at deploy time
+audio_bank = None
+if (Path(app.config['AUDIO_BANK_DIR']) / 'index.json').exists():
+    try:
+        audio_bank = AudioBank(app.config['AUDIO_BANK_DIR'])
+        logger.info(f"Loaded audio bank with {len(audio_bank.phrases)} phrases")
+    except ValueError as e:
+        logger.warning(f"Audio bank not loaded: {e}")
+else:
+    logger.info("No audio bank built. Commentary speech will be synthesized on demand.")
+
+# Background processing jobs (kept in memory, so per server process)
+jobs = JobManager(max_workers=app.config['JOB_WORKERS'], max_queued=app.config['JOB_QUEUE_SIZE'])
 
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
@@ -105,62 +169,232 @@ def process_video_view():
     video_info = session['uploaded_video']
     return render_template('process.html', video=video_info)
 
-@app.route('/start_processing', methods=['POST'])
-def start_processing():
-    if 'uploaded_video' not in session:
-        return jsonify({'status': 'error', 'message': 'No uploaded video found'})
+def run_processing_job(job, video_path, unique_id, start_frame=0, end_frame=None):
+    """
+    Run the video -> commentary -> speech chain for one video.
     
-    video_info = session['uploaded_video']
-    video_path = video_info['path']
-    unique_id = video_info['unique_id']
+    Args:
+        job (Job): Job used to report per-stage progress
+        video_path (str): Path to the input video
+        unique_id (str): Id used to name the output files
+        start_frame (int): First frame of the segment to analyse
+        end_frame (int): Stop before this frame (None analyses to the end)
     
-    try:
-        # Process the video and get detected events
-        logger.debug(f"Starting to process video: {video_path}")
+    Returns:
+        str: Id of the results in the result store
+    """
+    logger.debug(f"Starting to process video: {video_path}")
+    
+    # Define output paths
+    output_video_path = os.path.join(app.config['RESULTS_FOLDER'], f"processed_{unique_id}.mp4")
+    output_audio_path = os.path.join(app.config['RESULTS_FOLDER'], f"commentary_{unique_id}.mp3")
+    
+    # ffmpeg may scale frames before analysis, which changes the results
+    decoder = app.config['DECODE_BACKEND']
+    if decoder == 'ffmpeg' and FFMPEG_AVAILABLE:
+        decoder_tag = f"ffmpeg:{DECODE_WIDTH}"
+    else:
+        decoder_tag = 'opencv'
+    
+    # Identical video bytes with identical analysis options give identical
+    # results, so a repeat upload skips straight to the cached output
+    cache_key = analysis_cache.key(video_path, {
+        'profile': app.config['DETECTION_PROFILE'],
+        'skip_static': app.config['SKIP_STATIC_FRAMES'],
+        'sample_rate': 1,
+        'segment': [start_frame, end_frame],
+        'detector': get_detector().cache_tag,
+        'pose': get_pose_backend().cache_tag,
+        'decoder': decoder_tag,
+        # The entry also keeps the commentary audio
+        'tts': get_tts_engine().cache_tag
+    })
+    cached = analysis_cache.get(cache_key)
+    
+    if cached is not None and cached.has_video():
+        logger.info(f"Analysis cache hit for {video_path}")
+        events = cached.load_events()
+        cached.copy_video(output_video_path)
+        video_start = cached.load_video_start()
+        job.update('analysis', 1.0)
+    else:
+        # Commentary is written as events are detected, and its sentences are
+        # synthesized into the TTS cache while the analysis carries on
+        stream = CommentaryStream()
         
-        # Define output paths
-        output_video_path = os.path.join(app.config['RESULTS_FOLDER'], f"processed_{unique_id}.mp4")
-        output_audio_path = os.path.join(app.config['RESULTS_FOLDER'], f"commentary_{unique_id}.mp3")
+        def on_event(event):
+            piece = stream.feed(event)
+            if piece:
+                speech.submit(warm_cache, piece, tts_cache, bank=audio_bank)
         
         # Process the video to detect events (players, ball, shots, boundaries, wickets)
-        events = process_video(video_path, output_video_path)
+        recorder = analysis_cache.recorder(cache_key)
+        stats = {}
+        # One thread keeps the engine load of a job predictable while the
+        # analysis runs
+        speech = ThreadPoolExecutor(max_workers=1)
+        try:
+            events = process_video(video_path, output_video_path,
+                                   workers=app.config['ANALYSIS_WORKERS'],
+                                   profile=app.config['DETECTION_PROFILE'],
+                                   skip_static=app.config['SKIP_STATIC_FRAMES'],
+                                   stats=stats,
+                                   progress=job.update,
+                                   frame_sink=recorder,
+                                   start_frame=start_frame,
+                                   end_frame=end_frame,
+                                   decoder=decoder,
+                                   event_sink=on_event)
+        except Exception:
+            recorder.abort()
+            raise
+        finally:
+            # Sentences still queued are left to text_to_speech below, which
+            # synthesizes whatever the cache lacks in parallel
+            speech.shutdown(wait=True, cancel_futures=True)
         
+        # Event timestamps count from the start of the input, the processed
+        # video from the start of the segment
+        video_start = stats['video_start']
+        recorder.commit(events, output_video_path, video_start)
+        cached = None
+    
+    if cached is not None and cached.has_commentary():
+        commentary = cached.load_commentary()
+        cached.copy_audio(output_audio_path)
+        job.update('commentary', 1.0)
+        job.update('tts', 1.0)
+    else:
         # Generate commentary based on detected events
-        commentary = generate_commentary(events)
+        job.update('commentary', 0.0)
+        commentary = stream.text() if cached is None else generate_commentary(events)
+        job.update('commentary', 1.0)
         
         # Convert commentary to speech
         logger.info(f"Converting commentary to speech: {len(commentary)} characters")
-        from utils.text_to_speech import text_to_speech
-        success = text_to_speech(commentary, output_audio_path)
+        job.update('tts', 0.0)
+        success = text_to_speech(commentary, output_audio_path, cache=tts_cache, bank=audio_bank)
         
-        if not success:
+        if success:
+            analysis_cache.put_commentary(cache_key, commentary, output_audio_path)
+        else:
+            # Not cached, so the next run tries the real speech again
             logger.warning("Failed to generate commentary audio, using sample instead")
             import shutil
             sample_audio = os.path.join(app.config['SAMPLE_FOLDER'], 'sample-commentary.mp3')
             shutil.copy(sample_audio, output_audio_path)
+        job.update('tts', 1.0)
+    
+    result_store.put(unique_id, {
+        'processed_video': output_video_path,
+        'video_start': video_start,
+        'commentary_audio': output_audio_path,
+        'events': events,
+        'commentary': commentary
+    })
+    return unique_id
+
+@app.route('/start_processing', methods=['POST'])
+def start_processing():
+    if 'uploaded_video' not in session:
+        return jsonify({'status': 'error', 'message': 'No uploaded video found'})
+    
+    video_info = session['uploaded_video']
+    
+    # Optional segment: {"start": ..., "end": ..., "unit": "seconds" | "frames"},
+    # with seconds also accepted as "mm:ss" or "hh:mm:ss"
+    options = request.get_json(silent=True) or {}
+    try:
+        start_frame, end_frame = segment_frames(probe_video(video_info['path']),
+                                                options.get('start'), options.get('end'),
+                                                options.get('unit', 'seconds'))
+    except (ValueError, TypeError) as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 400
+    except IOError as e:
+        return jsonify({'status': 'error', 'message': str(e)})
+    
+    # Each job writes its own output files and results, so repeat runs of
+    # the same video (or the shared demo sample) never overwrite each other
+    output_id = f"{video_info['unique_id']}-{uuid.uuid4().hex[:8]}"
+    
+    try:
+        job = jobs.submit(run_processing_job, video_info['path'], output_id,
+                          start_frame=start_frame, end_frame=end_frame)
+    except QueueFullError as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 503
+    
+    # Results are picked up from the job once it has finished
+    session['processing_job'] = job.id
+    session.pop('results_id', None)
+    
+    return jsonify({
+        'status': 'success',
+        'message': 'Video processing started',
+        'job_id': job.id,
+        'status_url': url_for('job_status', job_id=job.id)
+    })
+
+@app.route('/api/jobs/<job_id>')
+def job_status(job_id):
+    job = jobs.get(job_id)
+    if job is None:
+        return jsonify({'status': 'error', 'message': 'Unknown job'}), 404
+    
+    response = {'status': 'success', 'job': job.to_dict()}
+    if job.status == 'done':
+        response['redirect'] = url_for('results')
+    return jsonify(response)
+
+@app.route('/api/tts/metrics')
+def tts_metrics():
+    metrics = get_tts_engine().metrics()
+    metrics['cache_hits'] = tts_cache.hits
+    metrics['cache_misses'] = tts_cache.misses
+    metrics['audio_bank'] = audio_bank is not None
+    return jsonify({'status': 'success', 'metrics': metrics})
+
+def collect_job_results():
+    """Point the session at the results of a finished processing job."""
+    job_id = session.get('processing_job')
+    job = jobs.get(job_id) if job_id else None
+    if job is not None and job.status == 'done':
+        session['results_id'] = job.result
+        session.pop('processing_job')
+
+def ensure_sample_results():
+    """Create the demo results on first use and return their id."""
+    if result_store.get_version(SAMPLE_RESULTS_ID) is None:
+        # Sample event data
+        from utils.video_processor import generate_simulated_events
+        sample_events = generate_simulated_events()
         
-        # Update session with results
-        session['processing_results'] = {
-            'processed_video': output_video_path,
-            'commentary_audio': output_audio_path,
-            'events': events,
-            'commentary': commentary
-        }
-        
-        return jsonify({
-            'status': 'success', 
-            'message': 'Video processing completed', 
-            'redirect': url_for('results')
+        result_store.put(SAMPLE_RESULTS_ID, {
+            'processed_video': os.path.join('static', 'samples', 'sample-cricket.mp4'),
+            'commentary_audio': os.path.join('static', 'samples', 'sample-commentary.mp3'),
+            'events': sample_events,
+            'commentary': generate_commentary(sample_events)
         })
+        logger.info("Created sample results for demo")
     
-    except Exception as e:
-        logger.error(f"Error during video processing: {str(e)}")
-        return jsonify({'status': 'error', 'message': f'Error processing video: {str(e)}'})
+    return SAMPLE_RESULTS_ID
+
+def get_session_results_id():
+    """
+    Find the id of the results for the current session.
+    
+    Returns:
+        str: Results id, or None if the session has no results yet
+    """
+    collect_job_results()
+    return session.get('results_id')
 
 @app.route('/results')
 def results():
-    if 'processing_results' not in session:
-        # For demo purposes, create sample results
+    results_id = get_session_results_id()
+    results_info = result_store.get(results_id) if results_id else None
+    
+    if results_info is None:
+        # For demo purposes, show sample results
         if 'uploaded_video' not in session:
             # Also create a sample video entry if needed
             session['uploaded_video'] = {
@@ -171,25 +405,9 @@ def results():
                 'timestamp': time.time()
             }
         
-        # Sample event data
-        from utils.video_processor import generate_simulated_events
-        sample_events = generate_simulated_events()
-        
-        # Sample commentary
-        from utils.commentary_generator import generate_commentary
-        sample_commentary = generate_commentary(sample_events)
-        
-        # Create sample results
-        session['processing_results'] = {
-            'processed_video': os.path.join('static', 'samples', 'sample-cricket.mp4'),
-            'commentary_audio': os.path.join('static', 'samples', 'sample-commentary.mp3'),
-            'events': sample_events,
-            'commentary': sample_commentary
-        }
-        logger.info("Created sample results for demo")
+        results_info = result_store.get(ensure_sample_results())
     
     video_info = session['uploaded_video']
-    results_info = session['processing_results']
     
     return render_template('results.html', 
                           video=video_info, 
@@ -247,16 +465,72 @@ def youtube_link():
         flash(f"Error downloading video: {str(e)}", 'danger')
         return redirect(url_for('index'))
 
+def parse_event_query(args):
+    """
+    Parse the /api/events query parameters.
+    
+    Args:
+        args (MultiDict): Request query arguments
+    
+    Returns:
+        dict: Keyword arguments for EventIndex.query
+    """
+    query = {
+        'start': args.get('from'),
+        'end': args.get('to'),
+        'event_type': args.get('type') or None,
+        'limit': args.get('limit'),
+        'cursor': args.get('cursor')
+    }
+    
+    for key, convert in (('start', float), ('end', float), ('limit', int), ('cursor', int)):
+        if query[key] is not None:
+            try:
+                query[key] = convert(query[key])
+            except ValueError:
+                raise ValueError(f"Invalid value for {key}: {query[key]}")
+    
+    if query['limit'] is not None:
+        query['limit'] = max(1, min(query['limit'], MAX_EVENTS_PAGE))
+    
+    return query
+
 @app.route('/api/events')
 def get_events():
-    if 'processing_results' not in session:
-        # For demo purposes, generate sample events
-        from utils.video_processor import generate_simulated_events
-        sample_events = generate_simulated_events()
-        return jsonify({'status': 'success', 'events': sample_events})
+    # Without results of its own the session gets the demo events
+    results_id = get_session_results_id() or ensure_sample_results()
+    
+    version = result_store.get_version(results_id)
+    if version is None:
+        return jsonify({'status': 'error', 'message': 'Results not found'}), 404
+    
+    try:
+        query = parse_event_query(request.args)
+    except ValueError as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 400
+    
+    # Results only change when they are re-processed, so a version check
+    # answers repeat fetches without loading or slicing the events.
+    # Last-Modified has whole seconds, too coarse to tell apart two
+    # versions written within the same second, so only the ETag validates
+    etag = hashlib.sha1(f"{results_id}:{version}".encode()).hexdigest()
+    last_modified = datetime.fromtimestamp(math.ceil(version), tz=timezone.utc)
+    
+    if request.if_none_match.contains(etag):
+        response = app.response_class(status=304)
+    else:
+        index = event_indexes.get(results_id, version,
+                                  lambda: result_store.get(results_id)['events'])
+        events, next_cursor = index.query(**query)
+        response = jsonify({'status': 'success', 'events': events, 'next_cursor': next_cursor})
     
-    events = session['processing_results'].get('events', [])
-    return jsonify({'status': 'success', 'events': events})
+    # Responses depend on the session cookie, so only the browser may cache them
+    response.set_etag(etag)
+    response.last_modified = last_modified
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    response.vary.add('Cookie')
+    return response
 
 if __name__ == '__main__':
     app.run(host='0.0.0.0', port=5000, debug=True)
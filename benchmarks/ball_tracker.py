@@ -0,0 +1,208 @@
+"""
+Benchmark the array-backed BallTracker against the previous deque version.
+
+Feeds both trackers the same synthetic ball trajectories (straight runs,
+bounces off the bat, drives to the boundary and balls at the stumps),
+checks that they report the same events and prints the time per frame
+for update() plus detect_events() (best of --repeat runs).
+
+Usage:
+    python -m benchmarks.ball_tracker [--frames N] [--seed S] [--repeat R]
+"""
+import argparse
+import time
+from collections import deque
+
+import numpy as np
+
+from utils.event_detection import BallTracker
+
+class LegacyBallTracker:
+    """
+    The deque-of-tuples tracker this replaced, kept as a baseline.
+    
+    Comments and docstrings are trimmed. The acceleration update unpacked
+    the velocity tuple wrongly and raised on the third position; that is
+    fixed here so the baseline can run.
+    """
+    
+    def __init__(self, max_history=30):
+        self.positions = deque(maxlen=max_history)
+        self.velocities = deque(maxlen=max_history-1)
+        self.accelerations = deque(maxlen=max_history-2)
+        self.last_event = None
+        self.last_event_frame = -100
+    
+    def update(self, ball_position, frame_num):
+        if ball_position:
+            self.positions.append((ball_position, frame_num))
+            if len(self.positions) >= 2:
+                p1, f1 = self.positions[-2]
+                p2, f2 = self.positions[-1]
+                dx = p2[0] - p1[0]
+                dy = p2[1] - p1[1]
+                df = f2 - f1
+                vx = dx / df if df > 0 else 0
+                vy = dy / df if df > 0 else 0
+                self.velocities.append((vx, vy, f2))
+            if len(self.velocities) >= 2:
+                v1x, v1y, f1 = self.velocities[-2]
+                v2x, v2y, f2 = self.velocities[-1]
+                df = f2 - f1
+                ax = (v2x - v1x) / df if df > 0 else 0
+                ay = (v2y - v1y) / df if df > 0 else 0
+                self.accelerations.append((ax, ay, f2))
+    
+    def detect_events(self, frame, objects, current_frame, timestamp):
+        events = []
+        if len(self.positions) < 5:
+            return events
+        if self.last_event_frame is not None and current_frame - self.last_event_frame < 30:
+            return events
+        height, width = frame.shape[:2]
+        recent_positions = [pos for pos, _ in self.positions]
+        if self.is_boundary(recent_positions, width, height):
+            events.append({'type': 'boundary',
+                           'subtype': 'four' if self.is_along_ground(recent_positions) else 'six',
+                           'confidence': 0.8, 'timestamp': timestamp, 'frame': current_frame})
+            self.last_event = 'boundary'
+            self.last_event_frame = current_frame
+        stumps_objects = [obj for obj in objects if obj['class'] == 'stumps']
+        if stumps_objects and self.is_wicket(recent_positions, stumps_objects):
+            events.append({'type': 'wicket', 'subtype': 'bowled', 'confidence': 0.7,
+                           'timestamp': timestamp, 'frame': current_frame})
+            self.last_event = 'wicket'
+            self.last_event_frame = current_frame
+        if self.is_shot_played(recent_positions):
+            events.append({'type': 'shot_played', 'subtype': 'generic', 'confidence': 0.6,
+                           'timestamp': timestamp, 'frame': current_frame})
+            self.last_event = 'shot_played'
+            self.last_event_frame = current_frame
+        return events
+    
+    def is_boundary(self, positions, width, height):
+        boundary_margin = 50
+        latest_pos = positions[-1]
+        if (latest_pos[0] < boundary_margin or latest_pos[0] > width - boundary_margin or
+                latest_pos[1] < boundary_margin or latest_pos[1] > height - boundary_margin):
+            if len(positions) >= 3:
+                direction_x = positions[-1][0] - positions[-3][0]
+                direction_y = positions[-1][1] - positions[-3][1]
+                distance_to_left = latest_pos[0]
+                distance_to_right = width - latest_pos[0]
+                distance_to_top = latest_pos[1]
+                distance_to_bottom = height - latest_pos[1]
+                min_distance = min(distance_to_left, distance_to_right,
+                                   distance_to_top, distance_to_bottom)
+                if (min_distance == distance_to_left and direction_x < 0) or \
+                   (min_distance == distance_to_right and direction_x > 0) or \
+                   (min_distance == distance_to_top and direction_y < 0) or \
+                   (min_distance == distance_to_bottom and direction_y > 0):
+                    return True
+        return False
+    
+    def is_along_ground(self, positions):
+        if len(positions) >= 5:
+            y_values = [pos[1] for pos in positions[-5:]]
+            return np.var(y_values) < 100
+        return True
+    
+    def is_wicket(self, positions, stumps_objects):
+        if not stumps_objects:
+            return False
+        stumps_bbox = stumps_objects[0]['bbox']
+        stumps_center = ((stumps_bbox[0] + stumps_bbox[2]) / 2,
+                         (stumps_bbox[1] + stumps_bbox[3]) / 2)
+        if len(positions) >= 3:
+            p1, p2, p3 = positions[-3:]
+            dx = p3[0] - p1[0]
+            dy = p3[1] - p1[1]
+            vector_to_stumps = (stumps_center[0] - p3[0], stumps_center[1] - p3[1])
+            dot_product = dx * vector_to_stumps[0] + dy * vector_to_stumps[1]
+            if dot_product > 0:
+                distance_to_stumps = np.sqrt(vector_to_stumps[0]**2 + vector_to_stumps[1]**2)
+                return distance_to_stumps < 50
+        return False
+    
+    def is_shot_played(self, positions):
+        if len(positions) >= 5:
+            p1, p2, p3, p4, p5 = positions[-5:]
+            v1 = (p2[0] - p1[0], p2[1] - p1[1])
+            v2 = (p5[0] - p4[0], p5[1] - p4[1])
+            dot_product = v1[0] * v2[0] + v1[1] * v2[1]
+            mag_v1 = np.sqrt(v1[0]**2 + v1[1]**2)
+            mag_v2 = np.sqrt(v2[0]**2 + v2[1]**2)
+            if mag_v1 > 0 and mag_v2 > 0:
+                cos_angle = dot_product / (mag_v1 * mag_v2)
+                cos_angle = min(1.0, max(-1.0, cos_angle))
+                angle = np.arccos(cos_angle) * 180 / np.pi
+                return angle > 30
+        return False
+
+def synthetic_track(n, width=1920, height=1080, seed=0):
+    """
+    Generate ball sightings made of short deliveries.
+    
+    Each delivery runs toward the batsman, then either turns sharply (a
+    shot), carries on to the stumps or heads for an edge of the frame.
+    About one frame in six has no sighting.
+    
+    Returns:
+        tuple: (list of (x, y) or None per frame, stumps object)
+    """
+    rng = np.random.default_rng(seed)
+    stumps = {'class': 'stumps', 'bbox': (940, 700, 980, 900), 'confidence': 0.6}
+    positions = []
+    
+    while len(positions) < n:
+        x, y = rng.uniform(300, width - 300), rng.uniform(100, 400)
+        target = rng.choice(['shot', 'stumps', 'boundary'])
+        if target == 'stumps':
+            goal = np.array((960.0, 800.0))
+        else:
+            goal = rng.uniform((300, 500), (width - 300, height - 200))
+        step = (goal - (x, y)) / rng.integers(15, 30)
+        
+        for _ in range(int(rng.integers(20, 60))):
+            x, y = x + step[0], y + step[1]
+            if target == 'shot' and np.hypot(*(goal - (x, y))) < np.hypot(*step):
+                step = rng.uniform(-1, 1, 2) * 40
+            if target == 'boundary' and np.hypot(*(goal - (x, y))) < np.hypot(*step):
+                step = (np.sign(rng.uniform(-1, 1, 2)) * rng.uniform(20, 60, 2))
+            sighted = rng.random() > 1 / 6 and 0 <= x <= width and 0 <= y <= height
+            positions.append((float(x), float(y)) if sighted else None)
+    
+    return positions[:n], stumps
+
+def run(tracker, positions, stumps, frame):
+    events = []
+    start = time.perf_counter()
+    for frame_num, position in enumerate(positions):
+        tracker.update(position, frame_num)
+        events.extend(tracker.detect_events(frame, [stumps], frame_num, frame_num / 30))
+    return time.perf_counter() - start, events
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--frames', type=int, default=100000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+    
+    positions, stumps = synthetic_track(args.frames, seed=args.seed)
+    frame = np.broadcast_to(np.uint8(0), (1080, 1920, 3))
+    
+    print(f"{args.frames} frames, {sum(p is not None for p in positions)} ball sightings")
+    results = {}
+    for name, tracker_class in (('deque', LegacyBallTracker), ('array', BallTracker)):
+        runs = [run(tracker_class(), positions, stumps, frame) for _ in range(args.repeat)]
+        elapsed = min(elapsed for elapsed, _ in runs)
+        results[name] = events = runs[0][1]
+        print(f"{name:>6}: {elapsed * 1e6 / args.frames:7.2f} us/frame, {len(events)} events")
+    
+    same = [(e['type'], e['subtype'], e['frame']) for e in results['deque']] == \
+           [(e['type'], e['subtype'], e['frame']) for e in results['array']]
+    print(f"events match: {same}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,110 @@
+"""
+Benchmark object detection profiles against the full-resolution profile.
+
+Reports time per frame for each profile and how many of the 'full'
+profile's detections it reproduces (same class, IoU >= 0.5).
+
+Usage:
+    python -m benchmarks.detection_profiles [--video PATH] [--frames N]
+"""
+import argparse
+import time
+
+import cv2
+import numpy as np
+
+from utils.object_detection import DETECTION_CLASSES, DETECTION_PROFILES, detect_objects_batch
+
+def synthetic_frames(n, height=1080, width=1920, seed=0):
+    """
+    Draw broadcast-sized frames with player, ball and stump shapes.
+    
+    Sizes match what the heuristics are tuned for: players over 100 px
+    tall, ball radius 5-15 px and stumps in the lower part of the frame.
+    """
+    rng = np.random.default_rng(seed)
+    frames = np.empty((n, height, width, 3), dtype=np.uint8)
+    
+    for frame in frames:
+        frame[:] = (40, 90, 40)
+        for _ in range(6):
+            x, y = int(rng.integers(0, width - 60)), int(rng.integers(0, height // 2))
+            cv2.rectangle(frame, (x, y), (x + int(rng.integers(30, 60)), y + int(rng.integers(150, 300))),
+                          (220, 220, 220), -1)
+        for _ in range(2):
+            center = (int(rng.integers(20, width - 20)), int(rng.integers(20, height - 20)))
+            cv2.circle(frame, center, int(rng.integers(8, 14)), (255, 255, 255), 2)
+        x = int(rng.integers(200, width - 200))
+        for dx in (0, 14, 28):
+            cv2.line(frame, (x + dx, int(height * 0.65)), (x + dx, int(height * 0.9)), (230, 230, 230), 4)
+        cv2.GaussianBlur(frame, (3, 3), 0, dst=frame)
+    
+    return frames
+
+def video_frames(path, n):
+    """Read the first n frames of a video."""
+    cap = cv2.VideoCapture(path)
+    frames = []
+    while len(frames) < n:
+        ok, frame = cap.read()
+        if not ok:
+            break
+        frames.append(frame)
+    cap.release()
+    return np.stack(frames)
+
+def normalise(boxes):
+    """Order box corners as x1 <= x2, y1 <= y2 (line detections may not be)."""
+    return np.concatenate([np.minimum(boxes[:, :2], boxes[:, 2:]), np.maximum(boxes[:, :2], boxes[:, 2:])], axis=1)
+
+def iou(a, b):
+    """IoU of one box against an array of boxes."""
+    x1 = np.maximum(a[0], b[:, 0])
+    y1 = np.maximum(a[1], b[:, 1])
+    x2 = np.minimum(a[2], b[:, 2])
+    y2 = np.minimum(a[3], b[:, 3])
+    inter = np.clip(x2 - x1, 0, None) * np.clip(y2 - y1, 0, None)
+    area_a = (a[2] - a[0]) * (a[3] - a[1])
+    area_b = (b[:, 2] - b[:, 0]) * (b[:, 3] - b[:, 1])
+    return inter / np.maximum(area_a + area_b - inter, 1)
+
+def matched(reference, detections, class_id):
+    """Count reference detections of a class reproduced by detections."""
+    found = 0
+    for frame_index in np.unique(reference['frame_index']):
+        ref = normalise(reference['bbox'])[(reference['frame_index'] == frame_index) & (reference['class_id'] == class_id)]
+        det = normalise(detections['bbox'])[(detections['frame_index'] == frame_index) & (detections['class_id'] == class_id)]
+        if len(det):
+            found += sum(iou(box, det).max() >= 0.5 for box in ref)
+    return found
+
+def run(frames, batch=8):
+    results = {}
+    for name, profile in DETECTION_PROFILES.items():
+        parts = []
+        start = time.perf_counter()
+        for i in range(0, len(frames), batch):
+            detections = detect_objects_batch(frames[i:i + batch], profile)
+            detections['frame_index'] = detections['frame_index'] + i
+            parts.append(detections)
+        elapsed = time.perf_counter() - start
+        results[name] = ({key: np.concatenate([p[key] for p in parts]) for key in parts[0]}, elapsed)
+    
+    reference = results['full'][0]
+    height, width = frames.shape[1:3]
+    print(f"{len(frames)} frames at {width}x{height}")
+    for name, (detections, elapsed) in results.items():
+        line = f"{name:>14}: {1000 * elapsed / len(frames):7.1f} ms/frame"
+        for class_id, class_name in enumerate(DETECTION_CLASSES):
+            total = int((reference['class_id'] == class_id).sum())
+            extra = int((detections['class_id'] == class_id).sum()) - matched(detections, reference, class_id)
+            line += f"  {class_name} {matched(reference, detections, class_id)}/{total} (+{extra})"
+        print(line)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--video', help="Benchmark on frames from this video instead of synthetic ones")
+    parser.add_argument('--frames', type=int, default=32)
+    args = parser.parse_args()
+    
+    run(video_frames(args.video, args.frames) if args.video else synthetic_frames(args.frames))
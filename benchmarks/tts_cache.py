@@ -0,0 +1,87 @@
+"""
+Benchmark the sentence-level TTS cache on repeated commentary jobs.
+
+Generates commentary for --jobs random event lists with the real
+templates and speaks each one through text_to_speech with a stand-in
+engine (latency per call, valid MP3 output, no network) and a fresh
+TTSCache. Prints the time of the TTS stage per job without the cache
+and with it, together with how many sentences still had to be
+synthesized.
+
+Usage:
+    python -m benchmarks.tts_cache [--jobs N] [--events E] [--latency S] [--seed S]
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from benchmarks.tts_chunks import silent_frame
+from utils.commentary_generator import generate_commentary
+from utils.text_to_speech import text_to_speech
+from utils.tts_cache import TTSCache
+from utils.tts_engines import TTSEngine
+
+EVENT_TYPES = [
+    ('boundary', 'four'), ('boundary', 'six'), ('wicket', 'bowled'), ('wicket', 'caught'),
+    ('shot_played', 'cover drive'), ('shot_played', 'pull shot'), ('shot_played', 'generic')
+]
+
+class StandInEngine(TTSEngine):
+    """
+    MP3 'synthesis' that sleeps like gTTS's network round trips.
+    
+    gTTS sends text in pieces of up to 100 characters, one request each,
+    so the stand-in sleeps --latency per started 100 characters.
+    """
+    
+    name = 'stand-in'
+    
+    def __init__(self, latency):
+        super().__init__()
+        self.latency = latency
+    
+    def synthesize(self, text):
+        time.sleep(self.latency * -(-len(text) // 100))
+        return silent_frame(len(text) % 256) * 2
+
+def random_events(rng, count):
+    events = []
+    for i in range(count):
+        event_type, subtype = rng.choice(EVENT_TYPES)
+        events.append({'type': event_type, 'subtype': subtype, 'timestamp': i * 10.0})
+    return events
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--jobs', type=int, default=50)
+    parser.add_argument('--events', type=int, default=15)
+    parser.add_argument('--latency', type=float, default=0.05)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    
+    random.seed(args.seed)
+    rng = random.Random(args.seed)
+    texts = [generate_commentary(random_events(rng, args.events)) for _ in range(args.jobs)]
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        output_path = os.path.join(tmp, 'commentary.mp3')
+        cache = TTSCache(os.path.join(tmp, 'tts'))
+        
+        for name, job_cache in (('no cache', None), ('cache', cache)):
+            engine = StandInEngine(args.latency)
+            times = []
+            for text in texts:
+                start = time.perf_counter()
+                if not text_to_speech(text, output_path, engine=engine, cache=job_cache):
+                    raise RuntimeError("Synthesis failed")
+                times.append(time.perf_counter() - start)
+            
+            print(f"{name:>8}: first job {times[0]:.2f}s, later jobs {sum(times[1:]) / max(len(times) - 1, 1):.3f}s "
+                  f"on average, {engine.metrics()['calls']} engine calls")
+        
+        print(f"cache: {cache.hits} hits, {cache.misses} misses")
+
+if __name__ == '__main__':
+    main()
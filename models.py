@@ -1,2 +1,26 @@
-# Currently not using database models for this application
-# This file is a placeholder for potential future expansion
+from flask_sqlalchemy import SQLAlchemy
+
+db = SQLAlchemy()
+
+class AnalysisResult(db.Model):
+    """Processing results for one video, keyed by its unique_id"""
+    __tablename__ = 'analysis_results'
+    
+    unique_id = db.Column(db.String(64), primary_key=True)
+    processed_video = db.Column(db.String(512), nullable=False)
+    commentary_audio = db.Column(db.String(512), nullable=False)
+    commentary = db.Column(db.Text, nullable=False)
+    events = db.Column(db.JSON, nullable=False)
+    updated_at = db.Column(db.Float, nullable=False)
+    # Time in the input at which processed_video starts
+    video_start = db.Column(db.Float, nullable=False, default=0.0, server_default='0')
+    
+    def to_dict(self):
+        return {
+            'processed_video': self.processed_video,
+            'commentary_audio': self.commentary_audio,
+            'commentary': self.commentary,
+            'events': self.events,
+            'updated_at': self.updated_at,
+            'video_start': self.video_start
+        }
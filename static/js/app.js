@@ -145,7 +145,7 @@ document.addEventListener('DOMContentLoaded', function() {
         .then(response => response.json())
         .then(data => {
             if (data.status === 'success') {
-                simulateProcessingProgress();
+                pollJobStatus(data.status_url);
             } else {
                 showError(data.message || 'An error occurred during processing');
             }
@@ -156,36 +156,44 @@ document.addEventListener('DOMContentLoaded', function() {
         });
     }
     
-    function simulateProcessingProgress() {
-        let progress = 10;
-        const steps = [
-            { progress: 20, message: 'Analyzing video frames...' },
-            { progress: 40, message: 'Detecting players and ball...' },
-            { progress: 60, message: 'Classifying cricket shots...' },
-            { progress: 75, message: 'Identifying key events...' },
-            { progress: 85, message: 'Generating commentary...' },
-            { progress: 95, message: 'Creating final output...' },
-            { progress: 100, message: 'Processing complete!' }
-        ];
-        
-        let currentStep = 0;
-        const interval = setInterval(() => {
-            if (currentStep < steps.length) {
-                const step = steps[currentStep];
-                updateProgress(step.progress, step.message);
-                currentStep++;
+    const stageMessages = {
+        analysis: 'Analyzing video frames and detecting events...',
+        commentary: 'Generating commentary...',
+        tts: 'Creating commentary audio...'
+    };
+    
+    function pollJobStatus(statusUrl) {
+        // Poll the background job and show its real per-stage progress
+        fetch(statusUrl)
+            .then(response => response.json())
+            .then(data => {
+                if (data.status !== 'success') {
+                    showError(data.message || 'Lost track of the processing job');
+                    return;
+                }
+                
+                const job = data.job;
+                const percent = Math.round(10 + job.overall_progress * 90);
                 
-                if (currentStep === steps.length) {
-                    // Last step - redirect to results page
-                    clearInterval(interval);
+                if (job.status === 'done') {
+                    updateProgress(100, 'Processing complete!');
                     setTimeout(() => {
-                        window.location.href = '/results';
+                        window.location.href = data.redirect;
                     }, 1000);
+                } else if (job.status === 'error') {
+                    showError(`Error processing video: ${job.error}`);
+                } else {
+                    const message = job.status === 'queued'
+                        ? 'Waiting for a free worker...'
+                        : stageMessages[job.stage] || 'Processing...';
+                    updateProgress(percent, message);
+                    setTimeout(() => pollJobStatus(statusUrl), 1000);
                 }
-            } else {
-                clearInterval(interval);
-            }
-        }, 3000); // Adjust timing for more realistic simulation
+            })
+            .catch(error => {
+                console.error('Error:', error);
+                showError('Network error. Please try again.');
+            });
     }
     
     function updateProgress(percent, message) {
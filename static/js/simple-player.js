@@ -12,12 +12,9 @@ document.addEventListener('DOMContentLoaded', function() {
     }
     
     // Populate the events list
-    fetch('/api/events')
-        .then(response => response.json())
-        .then(data => {
-            if (data.status === 'success' && data.events) {
-                displayEvents(data.events);
-            }
+    fetchEventPages()
+        .then(events => {
+            displayEvents(events);
         })
         .catch(error => {
             console.error('Error fetching events:', error);
@@ -27,6 +24,20 @@ document.addEventListener('DOMContentLoaded', function() {
             }
         });
     
+    function fetchEventPages(cursor = null, events = []) {
+        // Follow next_cursor until all events have been read
+        const url = '/api/events?limit=500' + (cursor !== null ? `&cursor=${cursor}` : '');
+        return fetch(url)
+            .then(response => response.json())
+            .then(data => {
+                if (data.status !== 'success') {
+                    throw new Error(data.message || 'Could not load events');
+                }
+                events = events.concat(data.events);
+                return data.next_cursor !== null ? fetchEventPages(data.next_cursor, events) : events;
+            });
+    }
+    
     function displayEvents(events) {
         const eventsContainer = document.getElementById('cricket-events');
         if (!eventsContainer) return;
@@ -12,6 +12,18 @@ document.addEventListener('DOMContentLoaded', function() {
     const eventsTimeline = document.getElementById('events-timeline');
     const cricketEvents = document.getElementById('cricket-events');
     
+    // Only events within this many seconds of the playhead are loaded
+    const EVENT_WINDOW = 120;
+    let loadedWindow = null;
+    
+    // Event timestamps count from the start of the uploaded video, while a
+    // processed segment starts at 0; this is where in the upload it begins
+    const videoStart = videoPlayer ? parseFloat(videoPlayer.dataset.videoStart) || 0 : 0;
+    
+    function toVideoTime(timestamp) {
+        return Math.max(0, timestamp - videoStart);
+    }
+    
     // Initialize player controls if video player exists
     if (videoPlayer) {
         initializeVideoPlayer();
@@ -47,7 +59,7 @@ document.addEventListener('DOMContentLoaded', function() {
         videoPlayer.addEventListener('ended', videoEnded);
         
         // Get events data for timeline
-        fetchEventsData();
+        fetchEventsData(videoStart);
     }
     
     function initializeVideo() {
@@ -154,6 +166,15 @@ document.addEventListener('DOMContentLoaded', function() {
         }
         
         updateTimeDisplay();
+        
+        // Load the next window of events once the playhead gets near the
+        // edge of the one already loaded (windows are in event time)
+        const time = videoStart + videoPlayer.currentTime;
+        if (loadedWindow && (time < loadedWindow.from + EVENT_WINDOW / 4 && loadedWindow.from > 0 ||
+                             time > loadedWindow.to - EVENT_WINDOW / 4)) {
+            fetchEventsData(time);
+        }
+        
         highlightCurrentEvents();
     }
     
@@ -184,20 +205,37 @@ document.addEventListener('DOMContentLoaded', function() {
     }
     
     // Cricket events handling
-    function fetchEventsData() {
-        fetch('/api/events')
-            .then(response => response.json())
-            .then(data => {
-                if (data.status === 'success' && data.events) {
-                    displayEvents(data.events);
-                    createEventTimeline(data.events);
-                }
+    function fetchEventsData(time) {
+        const from = Math.max(0, time - EVENT_WINDOW);
+        const to = time + EVENT_WINDOW;
+        loadedWindow = { from, to };
+        
+        fetchEventPages(`from=${from}&to=${to}`)
+            .then(events => {
+                // Ignore responses for a window the playhead has already left
+                if (loadedWindow.from !== from) return;
+                displayEvents(events);
+                createEventTimeline(events);
             })
             .catch(error => {
                 console.error('Error fetching events:', error);
             });
     }
     
+    function fetchEventPages(query, cursor = null, events = []) {
+        // Follow next_cursor until the window has been read completely
+        const url = `/api/events?${query}&limit=500` + (cursor !== null ? `&cursor=${cursor}` : '');
+        return fetch(url)
+            .then(response => response.json())
+            .then(data => {
+                if (data.status !== 'success') {
+                    throw new Error(data.message || 'Could not load events');
+                }
+                events = events.concat(data.events);
+                return data.next_cursor !== null ? fetchEventPages(query, data.next_cursor, events) : events;
+            });
+    }
+    
     function displayEvents(events) {
         if (!cricketEvents) return;
         
@@ -270,7 +308,7 @@ document.addEventListener('DOMContentLoaded', function() {
         
         events.forEach(event => {
             // Calculate position as percentage of video duration
-            const position = (event.timestamp / videoPlayer.duration) * 100;
+            const position = (toVideoTime(event.timestamp) / videoPlayer.duration) * 100;
             
             // Create marker
             const marker = document.createElement('div');
@@ -325,9 +363,10 @@ document.addEventListener('DOMContentLoaded', function() {
             // Wait a moment before seeking
             setTimeout(() => {
                 // Seek video to event timestamp
-                videoPlayer.currentTime = timestamp;
+                const time = toVideoTime(timestamp);
+                videoPlayer.currentTime = time;
                 if (audioPlayer) {
-                    audioPlayer.currentTime = timestamp;
+                    audioPlayer.currentTime = time;
                 }
                 
                 // Wait a bit before playing to let the seek complete
@@ -345,7 +384,7 @@ document.addEventListener('DOMContentLoaded', function() {
         // Highlight events near the current time
         if (!cricketEvents) return;
         
-        const currentVideoTime = videoPlayer.currentTime;
+        const currentVideoTime = videoStart + videoPlayer.currentTime;
         const tolerance = 2; // seconds
         
         // Find all event items
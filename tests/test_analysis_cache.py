@@ -0,0 +1,55 @@
+import os
+
+from utils.analysis_cache import AnalysisCache
+
+def memos(cache):
+    return sorted(path.name for path in (cache.root / 'hashes').iterdir())
+
+def test_memo_hit_skips_rehashing(tmp_path):
+    cache = AnalysisCache(tmp_path / 'cache')
+    video = tmp_path / 'video.mp4'
+    video.write_bytes(b'frames')
+    
+    first = cache.content_hash(video)
+    memo = next((cache.root / 'hashes').iterdir())
+    memo.write_text(memo.read_text().replace(first, 'memoised'))
+    
+    assert cache.content_hash(video) == 'memoised'
+
+def hash_with_memo(cache, video):
+    """Hash a video that has no memo yet, returning the new memo's name"""
+    before = set(memos(cache))
+    cache.content_hash(video)
+    return (set(memos(cache)) - before).pop()
+
+def test_evict_drops_memos_of_missing_or_changed_videos(tmp_path):
+    cache = AnalysisCache(tmp_path / 'cache')
+    names = {}
+    for name in ('kept', 'deleted', 'changed'):
+        video = tmp_path / f"{name}.mp4"
+        video.write_bytes(b'frames')
+        names[name] = hash_with_memo(cache, video)
+    
+    (tmp_path / 'deleted.mp4').unlink()
+    (tmp_path / 'changed.mp4').write_bytes(b'more frames')
+    # A memo from before memos recorded their video
+    (cache.root / 'hashes' / 'old').write_text('0' * 64)
+    cache.evict()
+    
+    assert memos(cache) == [names['kept']]
+
+def test_evict_keeps_the_most_recently_used_memos(tmp_path):
+    cache = AnalysisCache(tmp_path / 'cache', max_hash_memos=2)
+    videos, names = [], []
+    for i in range(4):
+        video = tmp_path / f"video{i}.mp4"
+        video.write_bytes(bytes([i]))
+        videos.append(video)
+        names.append(hash_with_memo(cache, video))
+        os.utime(cache.root / 'hashes' / names[-1], (i, i))
+    
+    # A hit marks the oldest memo as used again
+    cache.content_hash(videos[0])
+    cache.evict()
+    
+    assert memos(cache) == sorted([names[0], names[3]])
@@ -0,0 +1,61 @@
+from types import SimpleNamespace
+
+import pytest
+
+import app as app_module
+from utils import result_store as result_store_module
+from utils.result_store import SQLiteResultStore
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    monkeypatch.setattr(app_module, 'result_store', SQLiteResultStore(tmp_path / 'results.db'))
+    app_module.app.config['TESTING'] = True
+    return app_module.app.test_client()
+
+def test_results_page_passes_video_start_to_the_player(client):
+    app_module.result_store.put('segment', {
+        'processed_video': './static/results/processed_segment.mp4',
+        'commentary_audio': './static/results/commentary_segment.mp3',
+        'commentary': "What a shot!",
+        'events': [{'type': 'boundary', 'subtype': 'four', 'timestamp': 14.0}],
+        'video_start': 12.5
+    })
+    with client.session_transaction() as session:
+        session['results_id'] = 'segment'
+        session['uploaded_video'] = {'original_name': 'match.mp4', 'unique_id': 'segment'}
+    
+    response = client.get('/results')
+    
+    assert response.status_code == 200
+    assert b'data-video-start="12.5"' in response.data
+
+def put_events(events):
+    app_module.result_store.put('events', {
+        'processed_video': './static/results/processed_events.mp4',
+        'commentary_audio': './static/results/commentary_events.mp3',
+        'commentary': "What a shot!",
+        'events': events
+    })
+
+def test_events_revalidate_on_the_etag_within_the_same_second(client, monkeypatch):
+    with client.session_transaction() as session:
+        session['results_id'] = 'events'
+    
+    monkeypatch.setattr(result_store_module, 'time', SimpleNamespace(time=lambda: 1000.2))
+    put_events([{'type': 'boundary', 'subtype': 'four', 'timestamp': 14.0}])
+    first = client.get('/api/events')
+    
+    assert first.status_code == 200
+    assert client.get('/api/events', headers={'If-None-Match': first.headers['ETag']}).status_code == 304
+    
+    # Re-processed within the same second as the first version
+    monkeypatch.setattr(result_store_module, 'time', SimpleNamespace(time=lambda: 1000.7))
+    put_events([{'type': 'wicket', 'subtype': 'bowled', 'timestamp': 20.0}])
+    headers = {'If-None-Match': first.headers['ETag'], 'If-Modified-Since': first.headers['Last-Modified']}
+    second = client.get('/api/events', headers=headers)
+    
+    assert second.status_code == 200
+    assert [event['type'] for event in second.get_json()['events']] == ['wicket']
+    assert client.get('/api/events', headers={'If-Modified-Since': first.headers['Last-Modified']}).status_code == 200
+    # Last-Modified is never earlier than the change it stands for
+    assert second.last_modified.timestamp() >= 1000.7
@@ -0,0 +1,85 @@
+import threading
+
+import numpy as np
+
+from utils.detector_backends import LETTERBOX_COLOR, OnnxModel, YoloBackend
+
+class EmptyYolo(YoloBackend):
+    """Model stand-in that finds nothing, so only the preprocessing runs"""
+    
+    name = 'empty'
+    
+    def _run(self, blob):
+        return np.zeros((len(blob), 1, 85), dtype=np.float32)
+
+class FixedBatchModel(OnnxModel):
+    """Model stand-in exported with a batch size of two"""
+    
+    def __init__(self, weights_path, threads=0):
+        super().__init__(weights_path, threads)
+        self.max_batch = 2
+        self.batches = []
+    
+    def run(self, blob):
+        assert len(blob) <= self.max_batch
+        self.batches.append(len(blob))
+        return np.zeros((len(blob), 1, 85), dtype=np.float32)
+
+class FixedBatchYolo(YoloBackend):
+    name = 'fixed'
+    model_class = FixedBatchModel
+
+def test_letterbox_keeps_aspect_ratio():
+    backend = EmptyYolo('unused.onnx', input_size=64)
+    frames = np.full((2, 32, 64, 3), 200, dtype=np.uint8)
+    
+    batch, scale, pad_x, pad_y = backend.letterbox(frames)
+    
+    assert batch.shape == (2, 64, 64, 3)
+    assert (scale, pad_x, pad_y) == (1.0, 0, 16)
+    assert (batch[:, :16] == LETTERBOX_COLOR).all()
+    assert (batch[:, 16:48] == 200).all()
+
+def test_letterbox_buffers_are_per_thread():
+    backend = EmptyYolo('unused.onnx', input_size=64)
+    barrier = threading.Barrier(4)
+    errors = []
+    
+    def letterbox_many(value):
+        frames = np.full((3, 64, 64, 3), value, dtype=np.uint8)
+        barrier.wait()
+        for _ in range(200):
+            batch = backend.letterbox(frames)[0]
+            if not (batch == value).all():
+                errors.append(value)
+                return
+    
+    threads = [threading.Thread(target=letterbox_many, args=(value,)) for value in (10, 20, 30, 40)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    
+    assert errors == []
+
+def test_detect_batch_from_threads():
+    backend = EmptyYolo('unused.onnx', input_size=64)
+    frames = np.zeros((2, 48, 64, 3), dtype=np.uint8)
+    results = []
+    
+    threads = [threading.Thread(target=lambda: results.append(backend.detect_batch(frames))) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    
+    assert len(results) == 4
+    assert all(len(result['class_id']) == 0 for result in results)
+
+def test_fixed_batch_models_are_fed_in_chunks():
+    backend = FixedBatchYolo('unused.onnx', input_size=64)
+    
+    result = backend.detect_batch(np.zeros((5, 48, 64, 3), dtype=np.uint8))
+    
+    assert backend.model.batches == [2, 2, 1]
+    assert len(result['class_id']) == 0
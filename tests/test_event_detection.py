@@ -0,0 +1,33 @@
+import pytest
+
+from utils.event_detection import BallTracker
+
+def test_third_sighting_records_acceleration():
+    # The original tracker unpacked velocities as (vx, vy, frame) but then
+    # indexed vx like a point, so the third sighting raised TypeError
+    tracker = BallTracker()
+    for frame_num, position in enumerate([(0, 0), (10, 0), (30, 5)]):
+        tracker.update(position, frame_num)
+    
+    assert tracker.velocities.tolist() == [[10.0, 0.0], [20.0, 5.0]]
+    assert tracker.accelerations.tolist() == [[10.0, 5.0]]
+
+def test_velocity_is_per_frame_across_gaps():
+    tracker = BallTracker()
+    tracker.update((0, 0), 0)
+    tracker.update(None, 1)
+    tracker.update((30, 60), 3)
+    
+    assert tracker.velocities.tolist() == [[10.0, 20.0]]
+    assert tracker.frames.tolist() == [0, 3]
+
+@pytest.mark.parametrize('sightings', [5, 29, 30, 31, 250])
+def test_history_keeps_newest_sightings(sightings):
+    tracker = BallTracker(max_history=30, buffer_factor=2)
+    for frame_num in range(sightings):
+        tracker.update((frame_num, 2 * frame_num), frame_num)
+    
+    kept = min(sightings, 30)
+    assert tracker.frames.tolist() == list(range(sightings - kept, sightings))
+    assert len(tracker.velocities) == min(sightings - 1, 29)
+    assert len(tracker.accelerations) == min(sightings - 2, 28)
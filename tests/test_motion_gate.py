@@ -0,0 +1,49 @@
+import cv2
+import numpy as np
+import pytest
+
+from utils.motion_gate import MotionGate
+
+def field(height, width, seed=0):
+    """Textured grass-green background"""
+    rng = np.random.default_rng(seed)
+    frame = np.empty((height, width, 3), dtype=np.uint8)
+    frame[:] = (40, 140, 60)
+    return cv2.add(frame, rng.integers(0, 20, (height, width, 3), dtype=np.uint8))
+
+def with_noise(frame, rng, amplitude=3):
+    """Frame plus small per-pixel sensor/compression noise"""
+    noise = rng.integers(-amplitude, amplitude + 1, frame.shape, dtype=np.int16)
+    return np.clip(frame + noise, 0, 255).astype(np.uint8)
+
+@pytest.mark.parametrize('size', [(1080, 1920), (720, 1280), (480, 854)])
+def test_moving_ball_is_never_static(size):
+    height, width = size
+    background = field(height, width)
+    rng = np.random.default_rng(1)
+    gate = MotionGate()
+    
+    radius = max(4, round(10 * height / 1080))
+    static = []
+    for i in range(40):
+        frame = with_noise(background, rng)
+        cv2.circle(frame, (100 + i * 25 * width // 1920, height // 2), radius, (235, 235, 235), -1)
+        static.append(gate.is_static(frame))
+    
+    assert not any(static)
+
+def test_static_field_with_noise_is_skipped():
+    background = field(1080, 1920)
+    rng = np.random.default_rng(2)
+    gate = MotionGate(max_skip=100)
+    
+    static = [gate.is_static(with_noise(background, rng)) for _ in range(30)]
+    
+    assert not static[0]
+    assert all(static[1:])
+
+def test_max_skip_forces_a_refresh():
+    frame = field(240, 320)
+    gate = MotionGate(max_skip=3)
+    
+    assert [gate.is_static(frame) for _ in range(6)] == [False, True, True, True, False, True]
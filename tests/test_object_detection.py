@@ -0,0 +1,25 @@
+import cv2
+import numpy as np
+import pytest
+
+from utils.object_detection import BALL, FULL_FRAME, detect_objects_heuristic
+
+def ball_frame(center, radius=10):
+    frames = np.zeros((1, 400, 600, 3), dtype=np.uint8)
+    cv2.circle(frames[0], center, radius, (255, 255, 255), -1, lineType=cv2.LINE_AA)
+    return frames
+
+@pytest.mark.parametrize('roi', [FULL_FRAME, (0.5, 1.0, 0.5, 1.0), (0.25, 1.0, 0.1, 0.9)])
+def test_ball_boxes_are_in_frame_pixels(roi):
+    profile = {
+        'players': {'roi': FULL_FRAME, 'scale': 1.0},
+        'ball': {'roi': roi, 'scale': 1.0},
+        'stumps': {'roi': FULL_FRAME, 'scale': 1.0}
+    }
+    detections = detect_objects_heuristic(ball_frame((450, 300)), profile, classes=['ball'])
+    
+    boxes = detections['bbox'][detections['class_id'] == BALL]
+    assert len(boxes) == 1
+    x1, y1, x2, y2 = boxes[0]
+    assert abs((x1 + x2) / 2 - 450) <= 2
+    assert abs((y1 + y2) / 2 - 300) <= 2
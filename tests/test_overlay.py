@@ -0,0 +1,58 @@
+import subprocess
+
+import numpy as np
+import pytest
+
+from utils.ffmpeg_decoder import FFMPEG_BINARY
+from utils.overlay import CLASS_COLORS, OverlayRenderer, h264_encoder
+
+class FrameList(list):
+    """Writer stand-in that keeps the encoded frames"""
+    
+    def write(self, frame):
+        self.append(frame.copy())
+    
+    def release(self):
+        pass
+
+@pytest.fixture
+def frames_written(monkeypatch):
+    writer = FrameList()
+    monkeypatch.setattr(OverlayRenderer, '_open', lambda self, frame: setattr(self, '_writer', writer))
+    return writer
+
+def test_scaled_frames_are_drawn_at_the_output_size(frames_written):
+    player = {'class': 'player', 'bbox': [10, 10, 40, 60]}
+    
+    with OverlayRenderer('unused.mp4', 25, size=(320, 240)) as renderer:
+        renderer.render(np.zeros((120, 160, 3), dtype=np.uint8), 12.5, [player], [])
+        renderer.render(np.zeros((120, 160, 3), dtype=np.uint8), 12.54, [player], [])
+    
+    assert renderer.start_time == 12.5
+    assert [frame.shape for frame in frames_written] == [(240, 320, 3)] * 2
+    assert tuple(frames_written[0][60, 20]) == CLASS_COLORS['player']
+    assert tuple(frames_written[0][100, 50]) == (0, 0, 0)
+
+def test_read_only_frames_are_not_modified(frames_written):
+    frame = np.zeros((120, 160, 3), dtype=np.uint8)
+    frame.flags.writeable = False
+    
+    with OverlayRenderer('unused.mp4', 25, size=(160, 120)) as renderer:
+        renderer.render(frame, 0.0, [{'class': 'ball', 'bbox': [50, 50, 60, 60]}], [])
+    
+    assert not frame.any()
+    assert frames_written[0].any()
+
+@pytest.mark.skipif(h264_encoder() != 'libx264', reason="needs ffmpeg with libx264")
+def test_libx264_output_is_browser_playable(tmp_path):
+    output_path = tmp_path / 'processed.mp4'
+    with OverlayRenderer(output_path, 25, size=(161, 121)) as renderer:
+        for i in range(10):
+            renderer.render(np.full((121, 161, 3), i * 20, dtype=np.uint8), i / 25, [], [])
+    
+    probe = subprocess.run([FFMPEG_BINARY, '-hide_banner', '-i', str(output_path)], capture_output=True, text=True)
+    assert 'Video: h264' in probe.stderr and 'yuv420p' in probe.stderr
+    
+    # faststart puts the index before the media data
+    data = output_path.read_bytes()
+    assert data.find(b'moov') < data.find(b'mdat')
@@ -0,0 +1,52 @@
+import threading
+
+import numpy as np
+
+from utils.pose_backends import HeatmapPoseBackend
+
+class PeakPose(HeatmapPoseBackend):
+    """Model stand-in whose heatmaps peak where the crop is brightest"""
+    
+    name = 'peak'
+    
+    def _run(self, blob):
+        brightness = blob.mean(axis=1)
+        heatmaps = brightness[:, ::4, ::4].reshape(len(blob), 1, self.input_height // 4, self.input_width // 4)
+        return np.repeat(heatmaps, 17, axis=1)
+
+def frame_with_spot(x, y):
+    image = np.zeros((240, 320, 3), dtype=np.uint8)
+    image[y - 4:y + 4, x - 4:x + 4] = 255
+    return image
+
+def test_keypoints_map_back_to_frame_pixels():
+    backend = PeakPose('unused.onnx', input_width=48, input_height=64)
+    
+    keypoints = backend.estimate_batch(frame_with_spot(100, 120), np.array([[80, 80, 140, 200]]))
+    
+    assert keypoints.shape == (1, 14, 3)
+    assert np.abs(keypoints[0, 0, :2] - (100, 120)).max() <= 6
+
+def test_crop_buffers_are_per_thread():
+    backend = PeakPose('unused.onnx', input_width=48, input_height=64)
+    spots = [(60, 60), (250, 60), (60, 180), (250, 180)]
+    barrier = threading.Barrier(len(spots))
+    errors = []
+    
+    def estimate_many(x, y):
+        image = frame_with_spot(x, y)
+        bboxes = np.array([[x - 30, y - 40, x + 30, y + 40]] * 3)
+        barrier.wait()
+        for _ in range(100):
+            keypoints = backend.estimate_batch(image, bboxes)
+            if np.abs(keypoints[:, 0, :2] - (x, y)).max() > 8:
+                errors.append((x, y))
+                return
+    
+    threads = [threading.Thread(target=estimate_many, args=spot) for spot in spots]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    
+    assert errors == []
@@ -0,0 +1,51 @@
+import sqlite3
+
+import pytest
+from flask import Flask
+
+from utils.result_store import SQLAlchemyResultStore, SQLiteResultStore
+
+RESULTS = {
+    'processed_video': './static/results/processed_x.mp4',
+    'commentary_audio': './static/results/commentary_x.mp3',
+    'commentary': "What a shot!",
+    'events': [{'type': 'boundary', 'subtype': 'four', 'timestamp': 14.0}],
+    'video_start': 12.5
+}
+
+def sqlalchemy_store(tmp_path):
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{tmp_path / 'results.db'}"
+    return SQLAlchemyResultStore(app)
+
+@pytest.mark.parametrize('create', [lambda tmp_path: SQLiteResultStore(tmp_path / 'results.db'), sqlalchemy_store])
+def test_results_round_trip(tmp_path, create):
+    store = create(tmp_path)
+    store.put('x', RESULTS)
+    
+    stored = store.get('x')
+    assert {key: stored[key] for key in RESULTS} == RESULTS
+    assert stored['updated_at'] == store.get_version('x')
+
+def test_video_start_defaults_to_zero(tmp_path):
+    store = SQLiteResultStore(tmp_path / 'results.db')
+    store.put('x', {key: value for key, value in RESULTS.items() if key != 'video_start'})
+    
+    assert store.get('x')['video_start'] == 0.0
+
+def test_old_sqlite_files_gain_video_start(tmp_path):
+    path = tmp_path / 'results.db'
+    conn = sqlite3.connect(path)
+    conn.execute(
+        "CREATE TABLE analysis_results (unique_id TEXT PRIMARY KEY, processed_video TEXT NOT NULL, "
+        "commentary_audio TEXT NOT NULL, commentary TEXT NOT NULL, events TEXT NOT NULL, updated_at REAL NOT NULL)"
+    )
+    conn.execute("INSERT INTO analysis_results VALUES ('old', 'a.mp4', 'a.mp3', 'text', '[]', 1.0)")
+    conn.commit()
+    conn.close()
+    
+    store = SQLiteResultStore(path)
+    
+    assert store.get('old')['video_start'] == 0.0
+    store.put('new', RESULTS)
+    assert store.get('new')['video_start'] == 12.5
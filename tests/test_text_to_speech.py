@@ -0,0 +1,116 @@
+import threading
+import time
+
+import pytest
+
+from utils.mp3 import audio_frames
+from utils.text_to_speech import process_text_chunks, synthesize_sentences, text_to_speech
+from utils.tts_engines import SILENT_FRAME, SilentEngine, TTSEngine
+
+# MPEG-1 Layer III, 128 kbit/s, 44.1 kHz: 417-byte frames
+FRAME_HEADER = b'\xff\xfb\x90\xc0'
+FRAME_LENGTH = 417
+ID3_TAG = b'ID3\x04\x00\x00\x00\x00\x00\x0a' + bytes(10)
+XING_FRAME = FRAME_HEADER + bytes(32) + b'Xing' + bytes(FRAME_LENGTH - 40)
+
+def marker_frame(marker):
+    """One audio frame whose fifth byte identifies the chunk it came from"""
+    return FRAME_HEADER + bytes([marker]) + bytes(FRAME_LENGTH - 5)
+
+class SleepingEngine(TTSEngine):
+    """
+    Sleeps like a network round trip and returns a tagged MP3.
+    
+    Chunks are named "chunk <i>"; the first chunk is the slowest, so chunks
+    finish in reverse order.
+    """
+    
+    name = 'sleeping'
+    
+    def __init__(self, latency, chunks):
+        super().__init__()
+        self.latency = latency
+        self.chunks = chunks
+        self.active = 0
+        self.max_active = 0
+        self._active_lock = threading.Lock()
+    
+    def synthesize(self, text):
+        index = int(text.split()[1])
+        with self._active_lock:
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        try:
+            time.sleep(self.latency * (self.chunks - index) / self.chunks)
+        finally:
+            with self._active_lock:
+                self.active -= 1
+        return ID3_TAG + XING_FRAME + marker_frame(index) * 3
+
+def test_chunks_are_joined_frame_by_frame_in_order(tmp_path):
+    chunks = [f"chunk {i} of the commentary." for i in range(6)]
+    output_path = tmp_path / 'commentary.mp3'
+    
+    assert process_text_chunks(chunks, output_path, engine=SleepingEngine(0.05, 6), workers=6)
+    
+    # Tags and Xing frames of the pieces are dropped, the audio frames kept
+    assert output_path.read_bytes() == b''.join(marker_frame(i) * 3 for i in range(6))
+
+def test_chunks_are_synthesized_concurrently(tmp_path):
+    latency, count = 0.4, 8
+    chunks = [f"chunk {i} of the commentary." for i in range(count)]
+    engine = SleepingEngine(latency, count)
+    serial_seconds = sum(latency * (count - i) / count for i in range(count))
+    
+    start = time.perf_counter()
+    assert process_text_chunks(chunks, tmp_path / 'commentary.mp3', engine=engine, workers=count)
+    elapsed = time.perf_counter() - start
+    
+    # Bounded by the slowest chunk, not the sum of all of them
+    assert latency <= elapsed < latency + (serial_seconds - latency) / 2
+    assert engine.max_active == count
+
+def test_workers_bound_concurrency(tmp_path):
+    chunks = [f"chunk {i} of the commentary." for i in range(8)]
+    engine = SleepingEngine(0.05, 8)
+    
+    assert process_text_chunks(chunks, tmp_path / 'commentary.mp3', engine=engine, workers=2)
+    assert engine.max_active <= 2
+
+def test_failed_chunk_fails_the_job(tmp_path):
+    class FailingEngine(SleepingEngine):
+        def synthesize(self, text):
+            if text.startswith('chunk 3'):
+                raise RuntimeError("synthesis failed")
+            return super().synthesize(text)
+    
+    chunks = [f"chunk {i} of the commentary." for i in range(5)]
+    output_path = tmp_path / 'commentary.mp3'
+    
+    assert not process_text_chunks(chunks, output_path, engine=FailingEngine(0.01, 5))
+    assert not output_path.exists()
+
+@pytest.mark.parametrize('length', [200, 12000])
+def test_silent_engine_speaks_whole_text(tmp_path, length):
+    engine = SilentEngine()
+    text = ("What a shot! " * (length // 13 + 1))[:length]
+    output_path = tmp_path / 'commentary.mp3'
+    
+    assert text_to_speech(text, output_path, engine=engine)
+    
+    audio = output_path.read_bytes()
+    assert audio_frames(audio) == audio
+    assert len(audio) % len(SILENT_FRAME) == 0
+    assert engine.metrics()['failures'] == 0
+
+def test_sentences_keep_text_order():
+    sentences = [f"chunk {i} of the commentary." for i in range(5)]
+    sentences.insert(3, sentences[1])
+    engine = SleepingEngine(0.02, 5)
+    
+    audio = synthesize_sentences(sentences, engine, cache=None)
+    
+    order = [0, 1, 2, 1, 3, 4]
+    assert audio == b''.join(marker_frame(i) * 3 for i in order)
+    # The repeated sentence is synthesized once
+    assert engine.metrics()['calls'] == 5
@@ -0,0 +1,35 @@
+import sys
+import threading
+
+import pytest
+
+from utils.tts_cache import TTSCache
+
+@pytest.fixture
+def tiny_switch_interval():
+    # Switch threads as often as possible so unlocked counter updates race
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    yield
+    sys.setswitchinterval(interval)
+
+def test_hit_and_miss_counts_from_threads(tmp_path, tiny_switch_interval):
+    cache = TTSCache(tmp_path)
+    hit = cache.key("Four runs!", 'com', 'en', 'silent:1')
+    miss = cache.key("Bowled him!", 'com', 'en', 'silent:1')
+    cache.put(hit, b'mp3')
+    barrier = threading.Barrier(8)
+    
+    def look_up():
+        barrier.wait()
+        for _ in range(250):
+            cache.get(hit)
+            cache.get(miss)
+    
+    threads = [threading.Thread(target=look_up) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    
+    assert (cache.hits, cache.misses) == (2000, 2000)
@@ -0,0 +1,30 @@
+import pytest
+
+from utils import tts_engines
+from utils.tts_engines import SilentEngine, get_tts_engine
+
+@pytest.fixture(autouse=True)
+def fresh_engines(monkeypatch):
+    monkeypatch.setattr(tts_engines, '_engines', {})
+
+def test_unavailable_engine_fails_loudly(monkeypatch):
+    monkeypatch.setattr(tts_engines, 'GTTS_AVAILABLE', False)
+    
+    with pytest.raises(RuntimeError, match="TTS_ALLOW_SILENT_FALLBACK"):
+        get_tts_engine('gtts')
+
+def test_unavailable_engine_falls_back_when_allowed(monkeypatch):
+    monkeypatch.setattr(tts_engines, 'ESPEAK_AVAILABLE', False)
+    monkeypatch.setattr(tts_engines, 'TTS_ALLOW_SILENT_FALLBACK', True)
+    
+    assert isinstance(get_tts_engine('espeak'), SilentEngine)
+
+def test_silent_engine_by_name():
+    engine = get_tts_engine('silent')
+    
+    assert isinstance(engine, SilentEngine)
+    assert get_tts_engine('silent') is engine
+
+def test_unknown_engine():
+    with pytest.raises(ValueError):
+        get_tts_engine('nope')
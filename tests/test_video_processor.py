@@ -0,0 +1,59 @@
+import cv2
+import numpy as np
+import pytest
+
+from utils.overlay import h264_encoder
+from utils import video_processor
+from utils.video_processor import probe_video, process_video
+
+@pytest.fixture(scope='module')
+def source_video(tmp_path_factory):
+    path = tmp_path_factory.mktemp('video') / 'source.mp4'
+    writer = cv2.VideoWriter(str(path), cv2.VideoWriter_fourcc(*'mp4v'), 30, (320, 240))
+    for i in range(90):
+        frame = np.full((240, 320, 3), 40, dtype=np.uint8)
+        cv2.circle(frame, (20 + i * 3, 120), 10, (255, 255, 255), -1, lineType=cv2.LINE_AA)
+        writer.write(frame)
+    writer.release()
+    return path
+
+def test_copied_video_starts_at_the_input_start(source_video, tmp_path):
+    stats = {}
+    process_video(str(source_video), str(tmp_path / 'out.mp4'), stats=stats,
+                  start_frame=30, end_frame=60, render=False)
+    
+    assert stats['frames_processed'] == 30
+    assert stats['video_start'] == 0.0
+    assert (tmp_path / 'out.mp4').read_bytes() == source_video.read_bytes()
+
+@pytest.mark.skipif(h264_encoder() is None, reason="needs an H.264 encoder")
+@pytest.mark.parametrize('workers', [1, 2])
+def test_rendered_segment_starts_at_the_segment(source_video, tmp_path, workers):
+    stats = {}
+    output_path = tmp_path / 'out.mp4'
+    process_video(str(source_video), str(output_path), stats=stats, workers=workers,
+                  start_frame=30, end_frame=60)
+    
+    assert stats['video_start'] == pytest.approx(1.0)
+    info = probe_video(output_path)
+    assert (info['width'], info['height']) == (320, 240)
+    assert info['frame_count'] == 30
+
+def test_worker_gate_carries_over_task_boundaries(tmp_path, monkeypatch):
+    path = tmp_path / 'static.mp4'
+    writer = cv2.VideoWriter(str(path), cv2.VideoWriter_fourcc(*'mp4v'), 30, (320, 240))
+    for _ in range(20):
+        writer.write(np.full((240, 320, 3), 40, dtype=np.uint8))
+    writer.release()
+    
+    analysed = []
+    monkeypatch.setattr(video_processor, 'analyse_frame',
+                        lambda frame, profile: analysed.append(frame) or ([], []))
+    monkeypatch.setattr(video_processor, '_analyser', None)
+    options = {'profile': 'full', 'skip_static': True}
+    
+    first = video_processor._analyse_range(str(path), 0, 10, 1, options)
+    second = video_processor._analyse_range(str(path), 10, 20, 1, options)
+    
+    assert len(analysed) == 1
+    assert [skipped for *_, skipped in first + second] == [False] + [True] * 19
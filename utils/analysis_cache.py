@@ -0,0 +1,290 @@
+import gzip
+import hashlib
+import json
+import logging
+import os
+import shutil
+import threading
+import uuid
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+# Bump whenever a change to the pipeline alters what it detects, so stale
+# entries stop matching
+PIPELINE_VERSION = 5
+
+# Content hash memos kept at most; the least recently used go first
+MAX_HASH_MEMOS = 1024
+
+def _link_or_copy(src, dst):
+    """Hard-link src to dst if possible (same filesystem), else copy it."""
+    dst = Path(dst)
+    if dst.exists():
+        dst.unlink()
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copy2(src, dst)
+
+class CacheEntry:
+    """
+    Files cached for one (video content, pipeline config) key.
+    
+    An entry holds events.json and frames.jsonl.gz (per-frame objects and
+    poses) from the analysis, and optionally processed.mp4 (with
+    video.json, where in the input it starts), commentary.txt and
+    commentary.mp3 once a job has produced them.
+    """
+    
+    def __init__(self, path):
+        self.path = Path(path)
+    
+    def load_events(self):
+        with open(self.path / 'events.json') as f:
+            return json.load(f)
+    
+    def iter_frames(self):
+        """
+        Yield the cached per-frame analysis records.
+        
+        Yields:
+            dict: Record with frame, timestamp, objects and poses
+        """
+        with gzip.open(self.path / 'frames.jsonl.gz', 'rt') as f:
+            for line in f:
+                yield json.loads(line)
+    
+    def has_video(self):
+        return (self.path / 'processed.mp4').exists()
+    
+    def copy_video(self, output_path):
+        _link_or_copy(self.path / 'processed.mp4', output_path)
+    
+    def load_video_start(self):
+        """Time in the input, in seconds, at which processed.mp4 starts"""
+        with open(self.path / 'video.json') as f:
+            return json.load(f)['start']
+    
+    def has_commentary(self):
+        return (self.path / 'commentary.txt').exists() and (self.path / 'commentary.mp3').exists()
+    
+    def load_commentary(self):
+        return (self.path / 'commentary.txt').read_text()
+    
+    def copy_audio(self, output_path):
+        _link_or_copy(self.path / 'commentary.mp3', output_path)
+
+class FrameRecorder:
+    """Streams per-frame analysis records into a new cache entry."""
+    
+    def __init__(self, cache, key):
+        self.cache = cache
+        self.key = key
+        self.tmp_path = cache.root / f"tmp-{uuid.uuid4().hex}"
+        self.tmp_path.mkdir(parents=True)
+        self._frames = gzip.open(self.tmp_path / 'frames.jsonl.gz', 'wt')
+    
+    def __call__(self, frame_num, timestamp, objects, poses):
+        self._frames.write(json.dumps({
+            'frame': frame_num,
+            'timestamp': timestamp,
+            'objects': objects,
+            'poses': poses
+        }) + '\n')
+    
+    def commit(self, events, processed_video=None, video_start=0.0):
+        """
+        Finish the entry and publish it under its key.
+        
+        Args:
+            events (list): Detected events
+            processed_video (str): Optional processed video to store
+            video_start (float): Time in the input at which processed_video starts
+        """
+        self._frames.close()
+        with open(self.tmp_path / 'events.json', 'w') as f:
+            json.dump(events, f)
+        if processed_video and os.path.exists(processed_video):
+            with open(self.tmp_path / 'video.json', 'w') as f:
+                json.dump({'start': video_start}, f)
+            _link_or_copy(processed_video, self.tmp_path / 'processed.mp4')
+        
+        self.cache._publish(self.key, self.tmp_path)
+    
+    def abort(self):
+        self._frames.close()
+        shutil.rmtree(self.tmp_path, ignore_errors=True)
+
+class AnalysisCache:
+    """
+    Disk cache of analysis results keyed by video content and pipeline config.
+    
+    Keys hash the video bytes together with PIPELINE_VERSION and the
+    analysis options, so the same upload, sample or YouTube download maps
+    to the same entry wherever it is stored. Content hashes are memoised by
+    path, size and mtime, so a repeat lookup does not re-read the video.
+    Entries are evicted least recently used first once the cache grows
+    beyond max_bytes; memos go once their video is gone or has changed,
+    and beyond max_hash_memos.
+    """
+    
+    def __init__(self, root, max_bytes=2 * 1024 ** 3, max_hash_memos=MAX_HASH_MEMOS):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self.max_hash_memos = max_hash_memos
+        (self.root / 'entries').mkdir(parents=True, exist_ok=True)
+        (self.root / 'hashes').mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+    
+    def content_hash(self, video_path):
+        """
+        Hash the contents of a video file.
+        
+        Returns:
+            str: Hex SHA-256 of the file contents
+        """
+        stat = os.stat(video_path)
+        real_path = os.path.realpath(video_path)
+        identity = f"{real_path}:{stat.st_size}:{stat.st_mtime_ns}"
+        memo = self.root / 'hashes' / hashlib.sha1(identity.encode()).hexdigest()
+        
+        # evict() may remove the memo at any time, and memos from before
+        # they recorded their video are plain text; either way, hash again
+        try:
+            content = json.loads(memo.read_text())['sha256']
+            os.utime(memo)
+            return content
+        except (OSError, ValueError, KeyError, TypeError):
+            pass
+        
+        digest = hashlib.sha256()
+        with open(video_path, 'rb') as f:
+            for block in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(block)
+        
+        memo.write_text(json.dumps({
+            'path': real_path,
+            'size': stat.st_size,
+            'mtime_ns': stat.st_mtime_ns,
+            'sha256': digest.hexdigest()
+        }))
+        return digest.hexdigest()
+    
+    def key(self, video_path, options):
+        """
+        Build the cache key for a video and analysis options.
+        
+        Args:
+            video_path (str): Path to the video
+            options (dict): Options that affect the analysis output
+        
+        Returns:
+            str: Cache key
+        """
+        material = json.dumps({
+            'content': self.content_hash(video_path),
+            'pipeline': PIPELINE_VERSION,
+            'options': options
+        }, sort_keys=True)
+        return hashlib.sha256(material.encode()).hexdigest()
+    
+    def get(self, key):
+        """
+        Look up a cache entry and mark it as recently used.
+        
+        Returns:
+            CacheEntry: The entry, or None on a miss
+        """
+        path = self.root / 'entries' / key
+        if not (path / 'events.json').exists():
+            return None
+        
+        os.utime(path)
+        return CacheEntry(path)
+    
+    def recorder(self, key):
+        """
+        Start writing a new entry.
+        
+        Returns:
+            FrameRecorder: Callable accepting (frame_num, timestamp, objects, poses)
+        """
+        return FrameRecorder(self, key)
+    
+    def put_commentary(self, key, commentary, audio_path):
+        """
+        Add commentary text and audio to an existing entry.
+        
+        Args:
+            key (str): Cache key
+            commentary (str): Commentary text
+            audio_path (str): Synthesised commentary audio
+        """
+        path = self.root / 'entries' / key
+        if not path.exists():
+            return
+        
+        tmp_name = f".tmp-{uuid.uuid4().hex}"
+        _link_or_copy(audio_path, path / f"{tmp_name}.mp3")
+        os.replace(path / f"{tmp_name}.mp3", path / 'commentary.mp3')
+        (path / f"{tmp_name}.txt").write_text(commentary)
+        os.replace(path / f"{tmp_name}.txt", path / 'commentary.txt')
+        
+        self.evict()
+    
+    def _publish(self, key, tmp_path):
+        path = self.root / 'entries' / key
+        with self._lock:
+            if path.exists():
+                # Another job finished the same video first
+                shutil.rmtree(tmp_path, ignore_errors=True)
+            else:
+                os.replace(tmp_path, path)
+        self.evict()
+    
+    def evict(self):
+        """
+        Remove least recently used entries until the cache fits max_bytes.
+        
+        Also drops content hash memos that can no longer match (their video
+        is gone or has changed), then the least recently used memos beyond
+        max_hash_memos.
+        """
+        self._evict_hash_memos()
+        
+        with self._lock:
+            entries = []
+            total = 0
+            for path in (self.root / 'entries').iterdir():
+                size = sum(f.stat().st_size for f in path.iterdir())
+                entries.append((path.stat().st_mtime, size, path))
+                total += size
+            
+            entries.sort()
+            while total > self.max_bytes and entries:
+                _, size, path = entries.pop(0)
+                shutil.rmtree(path, ignore_errors=True)
+                total -= size
+                logger.info(f"Evicted analysis cache entry {path.name} ({size} bytes)")
+    
+    def _evict_hash_memos(self):
+        memos = []
+        for memo in (self.root / 'hashes').iterdir():
+            try:
+                used = memo.stat().st_mtime
+                recorded = json.loads(memo.read_text())
+                stat = os.stat(recorded['path'])
+                current = (stat.st_size, stat.st_mtime_ns) == (recorded['size'], recorded['mtime_ns'])
+            except (OSError, ValueError, KeyError, TypeError):
+                # Video gone, or a memo written before memos recorded their video
+                current = False
+            
+            if current:
+                memos.append((used, memo))
+            else:
+                memo.unlink(missing_ok=True)
+        
+        memos.sort()
+        for _, memo in memos[:max(len(memos) - self.max_hash_memos, 0)]:
+            memo.unlink(missing_ok=True)
@@ -0,0 +1,183 @@
+"""
+Pre-rendered audio for every phrase the commentary generator can produce.
+
+Build the bank once at deploy time:
+    
+    python -m utils.audio_bank --output ./instance/audio_bank
+
+It writes bank.mp3 (the audio frames of every phrase, back to back) and
+index.json (phrase -> byte range). At run time the packed file is memory
+mapped and commentary audio is assembled by slicing it, with no engine
+call for any template text.
+"""
+import argparse
+import json
+import logging
+import mmap
+import os
+import shutil
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from .commentary_generator import (
+    COMMENTARY_TEMPLATES, MATCH_SITUATION, NO_EVENTS_COMMENTARY, TRANSITIONS, UNKNOWN_EVENT_COMMENTARY
+)
+from .mp3 import audio_frames
+from .text_to_speech import TTS_WORKERS
+from .tts_engines import TTS_ENGINE, TTS_ENGINES, get_tts_engine
+from .tts_cache import normalize_sentence, split_sentences
+
+logger = logging.getLogger(__name__)
+
+# Bump when the bank layout changes, so old banks are rebuilt
+BANK_VERSION = 1
+
+def phrase_key(phrase):
+    """
+    Bank lookup key of a phrase.
+    
+    The generator lowercases templates that follow a transition, so keys
+    are case-insensitive.
+    """
+    return normalize_sentence(phrase).casefold()
+
+def template_phrases():
+    """
+    Every phrase the commentary generator can speak.
+    
+    Templates are split into sentences and transitions are kept on their
+    own, so any generated commentary splits into bank phrases.
+    
+    Returns:
+        list: Distinct phrases, in table order
+    """
+    texts = [NO_EVENTS_COMMENTARY, UNKNOWN_EVENT_COMMENTARY]
+    for templates in COMMENTARY_TEMPLATES.values():
+        for subtemplates in templates.values():
+            texts.extend(subtemplates)
+    texts.extend(MATCH_SITUATION)
+    texts.extend(TRANSITIONS)
+    
+    phrases = {}
+    for text in texts:
+        for sentence in split_sentences(text):
+            phrases.setdefault(phrase_key(sentence), sentence)
+    return list(phrases.values())
+
+class AudioBank:
+    """
+    Memory-mapped bank of pre-rendered phrase audio.
+    
+    Phrases are looked up case-insensitively. A sentence that starts with
+    a transition ("Meanwhile, that's FOUR!") is split into the transition
+    and the rest of the sentence.
+    """
+    
+    def __init__(self, path):
+        self.path = Path(path)
+        with open(self.path / 'index.json') as f:
+            index = json.load(f)
+        if index['version'] != BANK_VERSION:
+            raise ValueError(f"Audio bank version {index['version']} is not {BANK_VERSION}, rebuild it")
+        
+        self.voice_key = (index['voice'], index['lang'], index['engine'])
+        self.phrases = {key: tuple(span) for key, span in index['phrases'].items()}
+        # Transitions that end mid-sentence, longest first so "Now, " can't
+        # shadow a longer prefix
+        self.prefixes = sorted(
+            (phrase_key(t) for t in TRANSITIONS if phrase_key(t) in self.phrases and not t.strip().endswith('.')),
+            key=len, reverse=True
+        )
+        
+        with open(self.path / 'bank.mp3', 'rb') as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._view = memoryview(self._map)
+    
+    def matches(self, voice, lang, engine):
+        """Check whether the bank was rendered with this voice, lang and engine tag."""
+        return self.voice_key == (voice, lang, engine)
+    
+    def lookup(self, sentence):
+        """
+        Audio for a sentence, made of one or more bank phrases.
+        
+        Args:
+            sentence (str): A normalised sentence
+        
+        Returns:
+            list: memoryview slices of the bank, or None if not covered
+        """
+        key = phrase_key(sentence)
+        if key in self.phrases:
+            offset, length = self.phrases[key]
+            return [self._view[offset:offset + length]]
+        
+        for prefix in self.prefixes:
+            if key.startswith(prefix) and len(key) > len(prefix):
+                rest = self.lookup(sentence[len(prefix):])
+                if rest is not None:
+                    offset, length = self.phrases[prefix]
+                    return [self._view[offset:offset + length]] + rest
+        return None
+    
+    def close(self):
+        self._view.release()
+        self._map.close()
+
+def build_audio_bank(output_dir, engine, workers=4):
+    """
+    Synthesize every template phrase into a packed bank.
+    
+    The bank is written next to output_dir and moved into place once
+    complete, so a running server never sees a partial bank.
+    
+    Args:
+        output_dir (str): Directory for bank.mp3 and index.json
+        engine (TTSEngine): Engine to speak with
+        workers (int): Phrases synthesized at once
+    
+    Returns:
+        int: Number of phrases in the bank
+    """
+    output_dir = Path(output_dir)
+    phrases = template_phrases()
+    
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        segments = list(pool.map(engine, phrases))
+    
+    tmp_dir = output_dir.parent / f".tmp-{uuid.uuid4().hex}"
+    tmp_dir.mkdir(parents=True)
+    voice, lang, engine_tag = engine.voice_key
+    index = {'version': BANK_VERSION, 'voice': voice, 'lang': lang, 'engine': engine_tag, 'phrases': {}}
+    offset = 0
+    with open(tmp_dir / 'bank.mp3', 'wb') as f:
+        for phrase, segment in zip(phrases, segments):
+            frames = audio_frames(segment)
+            f.write(frames)
+            index['phrases'][phrase_key(phrase)] = [offset, len(frames)]
+            offset += len(frames)
+    with open(tmp_dir / 'index.json', 'w') as f:
+        json.dump(index, f)
+    
+    if output_dir.exists():
+        shutil.rmtree(output_dir)
+    os.replace(tmp_dir, output_dir)
+    return len(phrases)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--output', default=os.environ.get('AUDIO_BANK_DIR', './instance/audio_bank'))
+    parser.add_argument('--engine', choices=sorted(TTS_ENGINES), default=TTS_ENGINE)
+    parser.add_argument('--workers', type=int, default=TTS_WORKERS)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    
+    start = time.perf_counter()
+    engine = get_tts_engine(args.engine)
+    count = build_audio_bank(args.output, engine, args.workers)
+    print(f"Built {count} phrases into {args.output} with {engine.cache_tag} in {time.perf_counter() - start:.1f}s")
+
+if __name__ == '__main__':
+    main()
@@ -125,6 +125,10 @@ COMMENTARY_TEMPLATES = {
     }
 }
 
+# Spoken when there are no events, and for events without templates
+NO_EVENTS_COMMENTARY = "The match continues. Waiting for the next delivery."
+UNKNOWN_EVENT_COMMENTARY = "The action continues on the cricket field."
+
 # Commentary transition phrases
 TRANSITIONS = [
     "Meanwhile, ",
@@ -153,83 +157,105 @@ MATCH_SITUATION = [
     "The fielders are alert and ready for any chance."
 ]
 
-def generate_commentary(events):
+class CommentaryStream:
     """
-    Generate commentary based on detected events.
+    Commentary built one event at a time, as events are detected.
     
-    Args:
-        events (list): Detected cricket events
-        
-    Returns:
-        str: Generated commentary
+    Events must arrive in timestamp order. The repetition check
+    (last_event_type / consecutive_similar) carries over between calls,
+    and the spoken pieces are collected in a list and joined once, so
+    commentary can be produced (and spoken) while the video is still
+    being analysed.
     """
-    if not events:
-        return "The match continues. Waiting for the next delivery."
     
-    # Sort events by timestamp
-    sorted_events = sorted(events, key=lambda x: x['timestamp'])
+    def __init__(self):
+        self.pieces = []
+        self.last_event_type = None
+        self.consecutive_similar = 0
     
-    commentary_sections = []
-    last_event_type = None
-    consecutive_similar = 0
-    
-    # Generate commentary for each event
-    for event in sorted_events:
+    def _section(self, event):
         event_type = event['type']
         event_subtype = event.get('subtype', 'generic')
         
-        # Check if we have templates for this event type
-        if event_type in COMMENTARY_TEMPLATES:
-            templates = COMMENTARY_TEMPLATES[event_type]
-            
-            # Check if we have specific templates for this subtype
-            if event_subtype in templates:
-                subtemplates = templates[event_subtype]
-                
-                # Choose a random template
-                template = random.choice(subtemplates)
-                
-                # Check if we're repeating the same event type
-                if event_type == last_event_type:
-                    consecutive_similar += 1
-                    
-                    # If we've had several similar events, add variety
-                    if consecutive_similar >= 2:
-                        # Add a match situation comment
-                        situation = random.choice(MATCH_SITUATION)
-                        template = f"{template} {situation}"
-                        
-                        # Reset counter
-                        consecutive_similar = 0
-                else:
-                    # Reset counter for different event type
-                    consecutive_similar = 0
-                
-                commentary_sections.append(template)
-                last_event_type = event_type
+        # Fallback for unknown event types
+        if event_type not in COMMENTARY_TEMPLATES:
+            return UNKNOWN_EVENT_COMMENTARY
+        
+        templates = COMMENTARY_TEMPLATES[event_type]
+        
+        # Fallback to generic templates if subtype not found
+        if event_subtype not in templates:
+            return random.choice(templates['generic']) if 'generic' in templates else None
+        
+        # Choose a random template
+        template = random.choice(templates[event_subtype])
+        
+        # Check if we're repeating the same event type
+        if event_type == self.last_event_type:
+            self.consecutive_similar += 1
             
-            # Fallback to generic templates if subtype not found
-            elif 'generic' in templates:
-                commentary_sections.append(random.choice(templates['generic']))
+            # If we've had several similar events, add variety
+            if self.consecutive_similar >= 2:
+                # Add a match situation comment
+                situation = random.choice(MATCH_SITUATION)
+                template = f"{template} {situation}"
                 
-        # Fallback for unknown event types
+                # Reset counter
+                self.consecutive_similar = 0
         else:
-            commentary_sections.append("The action continues on the cricket field.")
+            # Reset counter for different event type
+            self.consecutive_similar = 0
+        
+        self.last_event_type = event_type
+        return template
     
-    # Add some transitions for a more natural flow
-    if not commentary_sections:
-        return "The match continues. Waiting for the next delivery."
+    def feed(self, event):
+        """
+        Add commentary for the next event.
+        
+        Args:
+            event (dict): Detected cricket event
+        
+        Returns:
+            str: The commentary added for the event, or None if it has none
+        """
+        section = self._section(event)
+        if section is None:
+            return None
+        
+        # Add a transition phrase occasionally for a more natural flow
+        if self.pieces and random.random() < 0.7:  # 70% chance to add a transition
+            transition = random.choice(TRANSITIONS)
+            section = f"{transition}{section.lower()}"
+        
+        self.pieces.append(section)
+        return section
+    
+    def text(self):
+        """
+        The commentary so far.
+        
+        Returns:
+            str: Generated commentary
+        """
+        if not self.pieces:
+            return NO_EVENTS_COMMENTARY
+        return ' '.join(self.pieces)
+
+def generate_commentary(events):
+    """
+    Generate commentary based on detected events.
     
-    # Start with the first section
-    combined = commentary_sections[0]
+    Args:
+        events (list): Detected cricket events
+        
+    Returns:
+        str: Generated commentary
+    """
+    stream = CommentaryStream()
     
-    # Add transitions between sections
-    for i in range(1, len(commentary_sections)):
-        # Add a transition phrase occasionally
-        if random.random() < 0.7:  # 70% chance to add a transition
-            transition = random.choice(TRANSITIONS)
-            combined += f" {transition}{commentary_sections[i].lower()}"
-        else:
-            combined += f" {commentary_sections[i]}"
+    # Sort events by timestamp
+    for event in sorted(events, key=lambda x: x['timestamp']):
+        stream.feed(event)
     
-    return combined
+    return stream.text()
@@ -0,0 +1,369 @@
+import logging
+import os
+import threading
+
+import cv2
+import numpy as np
+
+from .object_detection import (
+    BALL, CRICKET_CLASSES, PLAYER,
+    _concat_detections, _empty_detections, detect_objects_heuristic, ensure_model_downloaded, merge_detections
+)
+
+logger = logging.getLogger(__name__)
+
+# ONNX Runtime is optional; OpenCV's DNN module can run the same model
+ONNXRUNTIME_AVAILABLE = False
+try:
+    import onnxruntime
+    ONNXRUNTIME_AVAILABLE = True
+except ImportError:
+    logger.info("onnxruntime not installed. The onnxruntime detector backend will be unavailable.")
+
+# Backend settings come from the environment so analysis worker processes
+# see the same configuration as the app
+DETECTOR_BACKEND = os.environ.get('DETECTOR_BACKEND', 'fallback')  # fallback, onnxruntime or opencv
+DETECTOR_THREADS = int(os.environ.get('DETECTOR_THREADS', 0))  # 0 lets the runtime decide
+DETECTOR_INPUT_SIZE = int(os.environ.get('DETECTOR_INPUT_SIZE', 640))  # Square model input
+DETECTOR_CONFIDENCE = float(os.environ.get('DETECTOR_CONFIDENCE', 0.25))
+DETECTOR_NMS_IOU = float(os.environ.get('DETECTOR_NMS_IOU', 0.45))
+
+# COCO class ids of the YOLOv5 outputs we keep, mapped to our class ids
+COCO_CLASS_IDS = {'person': 0, 'sports ball': 32}
+MODEL_CLASSES = {COCO_CLASS_IDS[name]: class_id for name, class_id in zip(CRICKET_CLASSES, (PLAYER, BALL))}
+
+# Grey used by YOLOv5 to pad letterboxed inputs
+LETTERBOX_COLOR = 114
+
+def create_onnx_session(weights_path, threads=0):
+    """
+    Open an ONNX Runtime CPU session.
+    
+    Args:
+        weights_path (str): Path to the .onnx model
+        threads (int): Intra-op threads; 0 lets ONNX Runtime decide
+        
+    Returns:
+        onnxruntime.InferenceSession: The session
+    """
+    options = onnxruntime.SessionOptions()
+    if threads:
+        options.intra_op_num_threads = threads
+    options.inter_op_num_threads = 1
+    return onnxruntime.InferenceSession(str(weights_path), sess_options=options, providers=['CPUExecutionProvider'])
+
+class OnnxModel:
+    """
+    An ONNX model file loaded into one of the CPU runtimes.
+    
+    Shared by the detector and pose backends, and through them by every
+    job thread, so run must be thread-safe. max_batch is None while the
+    model takes batches of any size; it only ever drops to the model's
+    fixed batch size, which suits every thread.
+    """
+    
+    def __init__(self, weights_path, threads=0):
+        self.weights_path = weights_path
+        self.threads = threads
+        self.max_batch = None
+    
+    def run(self, blob):
+        """Run the model on one float32 blob and return its first output."""
+        raise NotImplementedError
+    
+    def run_batched(self, blob):
+        """
+        Run the model on a blob of any batch size, in chunks the model accepts.
+        
+        Args:
+            blob (numpy.ndarray): (N, C, H, W) float32 input
+        
+        Returns:
+            numpy.ndarray: The first output for all N inputs
+        """
+        step = self.max_batch or len(blob)
+        return np.concatenate([self.run(np.ascontiguousarray(blob[i:i + step]))
+                               for i in range(0, len(blob), step)])
+
+class OnnxRuntimeModel(OnnxModel):
+    """ONNX model on the ONNX Runtime CPU execution provider"""
+    
+    def __init__(self, weights_path, threads=0):
+        super().__init__(weights_path, threads)
+        
+        # InferenceSession.run is thread-safe, so all threads share one session
+        self._session = create_onnx_session(weights_path, threads)
+        
+        model_input = self._session.get_inputs()[0]
+        self._input_name = model_input.name
+        
+        # Models exported with a fixed batch size have to be fed in chunks
+        if isinstance(model_input.shape[0], int):
+            self.max_batch = model_input.shape[0]
+    
+    def run(self, blob):
+        return self._session.run(None, {self._input_name: blob})[0]
+
+class OpenCVDnnModel(OnnxModel):
+    """
+    ONNX model on OpenCV's DNN module (no extra dependencies).
+    
+    A cv2.dnn.Net holds its input and intermediate blobs, so it cannot run
+    two forward passes at once; each thread loads its own copy on first use.
+    """
+    
+    def __init__(self, weights_path, threads=0):
+        super().__init__(weights_path, threads)
+        self._local = threading.local()
+        
+        # Loaded here as well, so bad weights fail when the model is created
+        self._local.net = self._load_net()
+        if threads:
+            cv2.setNumThreads(threads)
+    
+    def _load_net(self):
+        net = cv2.dnn.readNetFromONNX(str(self.weights_path))
+        net.setPreferableBackend(cv2.dnn.DNN_BACKEND_OPENCV)
+        net.setPreferableTarget(cv2.dnn.DNN_TARGET_CPU)
+        return net
+    
+    def run(self, blob):
+        net = getattr(self._local, 'net', None)
+        if net is None:
+            net = self._local.net = self._load_net()
+        
+        try:
+            net.setInput(blob)
+            return net.forward()
+        except cv2.error:
+            if len(blob) == 1:
+                raise
+            # Static-batch exports reject larger batches; go one input at a time
+            logger.info(f"{os.path.basename(self.weights_path)} does not accept batches, running inputs one at a time")
+            self.max_batch = 1
+            return np.concatenate([self.run(blob[i:i + 1]) for i in range(len(blob))])
+
+class DetectorBackend:
+    """
+    Interface of an object detector.
+    
+    Backends are created once per process by get_detector and then shared
+    by every job thread, so anything expensive (model loading) belongs in
+    the constructor and detect_batch must be thread-safe.
+    """
+    
+    name = None
+    
+    def detect_batch(self, frames, profile='full'):
+        """
+        Detect cricket-related objects in a stack of frames.
+        
+        Args:
+            frames (numpy.ndarray): Frames as an (N, H, W, 3) BGR array
+            profile (str or dict): Detection profile (see DETECTION_PROFILES)
+        
+        Returns:
+            dict: Columnar detections (see detect_objects_batch)
+        """
+        raise NotImplementedError
+    
+    @property
+    def cache_tag(self):
+        """Identifies what this backend would detect, for result caching"""
+        return self.name
+
+class FallbackBackend(DetectorBackend):
+    """The contour, circle and line heuristics; needs no model"""
+    
+    name = 'fallback'
+    
+    def detect_batch(self, frames, profile='full'):
+        return detect_objects_heuristic(frames, profile)
+
+class YoloBackend(DetectorBackend):
+    """
+    YOLOv5 ONNX model for players and the ball.
+    
+    Frames are letterboxed to the square model input (scaled to fit, then
+    padded) so the aspect ratio is kept, run through the model as one
+    batch, and the boxes mapped back to frame pixels. The model has no
+    stumps class, so stumps still come from the line heuristic.
+    
+    Scratch state (the letterbox buffer) is kept per thread, since job
+    threads share the backend. Subclasses pick the runtime with
+    model_class.
+    """
+    
+    model_class = None
+    
+    def __init__(self, weights_path, input_size=DETECTOR_INPUT_SIZE, threads=DETECTOR_THREADS,
+                 confidence=DETECTOR_CONFIDENCE, nms_iou=DETECTOR_NMS_IOU):
+        self.weights_path = weights_path
+        self.input_size = input_size
+        self.threads = threads
+        self.confidence = confidence
+        self.nms_iou = nms_iou
+        self.model = self.model_class(weights_path, threads) if self.model_class else None
+        self._local = threading.local()
+    
+    @property
+    def cache_tag(self):
+        stat = os.stat(self.weights_path)
+        return f"{self.name}:{os.path.basename(self.weights_path)}:{stat.st_size}:{self.input_size}"
+    
+    def _run(self, blob):
+        """Run the model on an (N, 3, S, S) float32 blob, returning (N, boxes, 85)."""
+        return self.model.run_batched(blob)
+    
+    def letterbox(self, frames):
+        """
+        Scale and pad frames into the square model input.
+        
+        All frames in a batch share a size, so they share one scale and
+        padding; the padded batch buffer is reused between calls on the
+        same thread.
+        
+        Returns:
+            tuple: (batch, scale, pad_x, pad_y)
+        """
+        n, height, width = frames.shape[:3]
+        size = self.input_size
+        scale = min(size / height, size / width)
+        new_w, new_h = int(round(width * scale)), int(round(height * scale))
+        pad_x, pad_y = (size - new_w) // 2, (size - new_h) // 2
+        
+        buffer = getattr(self._local, 'buffer', None)
+        if buffer is None or len(buffer) < n:
+            buffer = self._local.buffer = np.empty((n, size, size, 3), dtype=np.uint8)
+        batch = buffer[:n]
+        batch.fill(LETTERBOX_COLOR)
+        
+        for i in range(n):
+            batch[i, pad_y:pad_y + new_h, pad_x:pad_x + new_w] = cv2.resize(
+                frames[i], (new_w, new_h), interpolation=cv2.INTER_LINEAR)
+        
+        return batch, scale, pad_x, pad_y
+    
+    def detect_batch(self, frames, profile='full'):
+        frames = np.ascontiguousarray(frames, dtype=np.uint8)
+        n, height, width = frames.shape[:3]
+        if n == 0:
+            return _empty_detections()
+        
+        batch, scale, pad_x, pad_y = self.letterbox(frames)
+        blob = cv2.dnn.blobFromImages(list(batch), 1 / 255.0, swapRB=True)
+        outputs = self._run(blob)
+        
+        class_ids, boxes, frame_indices, confidences = [], [], [], []
+        for i, output in enumerate(outputs):
+            found = self._postprocess(output, scale, pad_x, pad_y, width, height)
+            if found is not None:
+                class_ids.append(found[0])
+                boxes.append(found[1])
+                confidences.append(found[2])
+                frame_indices.append(np.full(len(found[0]), i))
+        
+        model_detections = _concat_detections(class_ids, boxes, frame_indices, confidences)
+        stumps = detect_objects_heuristic(frames, profile, classes=['stumps'])
+        return merge_detections(model_detections, stumps)
+    
+    def _postprocess(self, output, scale, pad_x, pad_y, width, height):
+        """
+        Turn one image's raw YOLOv5 rows into boxes in frame pixels.
+        
+        Returns:
+            tuple: (class_ids, boxes, confidences), or None if nothing was found
+        """
+        coco_ids = np.fromiter(MODEL_CLASSES, dtype=np.intp)
+        
+        # Confidence is objectness times the class score, for the kept classes only
+        scores = output[:, 4:5] * output[:, 5 + coco_ids]
+        best = scores.argmax(axis=1)
+        confidence = scores[np.arange(len(scores)), best]
+        keep = confidence >= self.confidence
+        if not keep.any():
+            return None
+        
+        rows, best, confidence = output[keep], best[keep], confidence[keep]
+        
+        # Centre/size in letterboxed pixels -> corners in frame pixels
+        xy, wh = rows[:, :2], rows[:, 2:4]
+        corners = np.concatenate([xy - wh / 2, xy + wh / 2], axis=1)
+        corners = (corners - (pad_x, pad_y, pad_x, pad_y)) / scale
+        np.clip(corners, 0, (width, height, width, height), out=corners)
+        
+        # Per-class NMS: offset boxes by class so different classes never overlap
+        offsets = best[:, None] * (width + height)
+        nms_boxes = np.concatenate([corners[:, :2] + offsets, corners[:, 2:] - corners[:, :2]], axis=1)
+        picked = np.asarray(cv2.dnn.NMSBoxes(nms_boxes.tolist(), confidence.tolist(),
+                                             self.confidence, self.nms_iou), dtype=np.intp).reshape(-1)
+        if len(picked) == 0:
+            return None
+        
+        class_ids = np.array([MODEL_CLASSES[coco_id] for coco_id in coco_ids[best[picked]]])
+        return class_ids, np.around(corners[picked]).astype(np.int32), confidence[picked]
+
+class OnnxRuntimeBackend(YoloBackend):
+    """YOLOv5 on the ONNX Runtime CPU execution provider"""
+    
+    name = 'onnxruntime'
+    model_class = OnnxRuntimeModel
+
+class OpenCVDnnBackend(YoloBackend):
+    """YOLOv5 on OpenCV's DNN module (no extra dependencies)"""
+    
+    name = 'opencv'
+    model_class = OpenCVDnnModel
+
+DETECTOR_BACKENDS = {
+    'fallback': FallbackBackend,
+    'onnxruntime': OnnxRuntimeBackend,
+    'opencv': OpenCVDnnBackend
+}
+
+_detectors = {}
+_detectors_lock = threading.Lock()
+
+def _create_detector(name):
+    if name not in DETECTOR_BACKENDS:
+        raise ValueError(f"Unknown detector backend: {name}")
+    
+    if name == 'fallback':
+        return FallbackBackend()
+    
+    if name == 'onnxruntime' and not ONNXRUNTIME_AVAILABLE:
+        logger.warning("onnxruntime is not installed, using the fallback detector")
+        return FallbackBackend()
+    
+    weights_path = ensure_model_downloaded()
+    if weights_path is None:
+        logger.warning(f"No weights for the {name} detector, using the fallback detector")
+        return FallbackBackend()
+    
+    logger.info(f"Loading {name} detector from {weights_path}")
+    return DETECTOR_BACKENDS[name](weights_path)
+
+def get_detector(name=None):
+    """
+    Get the shared detector for a backend, loading it on first use.
+    
+    Each process loads a backend once; later calls (from any thread) get
+    the same instance. Backends that cannot load (missing package or
+    weights) are replaced by the fallback heuristics.
+    
+    Args:
+        name (str): Backend name; defaults to DETECTOR_BACKEND
+    
+    Returns:
+        DetectorBackend: The detector
+    """
+    name = name or DETECTOR_BACKEND
+    
+    detector = _detectors.get(name)
+    if detector is None:
+        with _detectors_lock:
+            detector = _detectors.get(name)
+            if detector is None:
+                detector = _detectors[name] = _create_detector(name)
+    
+    return detector
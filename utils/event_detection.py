@@ -1,7 +1,7 @@
+import math
 import numpy as np
 import logging
 import cv2
-from collections import deque
 
 logger = logging.getLogger(__name__)
 
@@ -21,15 +21,71 @@ FIELD_REGIONS = {
     }
 }
 
+# A shot turns the ball by more than 30 degrees
+SHOT_TURN_COS = math.cos(math.radians(30))
+
+# Columns of a BallTracker history record
+X, Y, FRAME, VX, VY, AX, AY = range(7)
+RECORD_SIZE = 7
+
 class BallTracker:
-    """Class to track the cricket ball and detect events"""
+    """
+    Class to track the cricket ball and detect events.
     
-    def __init__(self, max_history=30):
-        self.positions = deque(maxlen=max_history)
-        self.velocities = deque(maxlen=max_history-1)
-        self.accelerations = deque(maxlen=max_history-2)
+    Each sighting is one record (position, frame, velocity, acceleration)
+    appended to a preallocated NumPy buffer a few times longer than the
+    history. When the buffer fills, the newest max_history - 1 records are
+    moved back to the start, so appends stay amortised O(1) and the newest
+    n records are always one contiguous slice. Velocity and acceleration
+    come from the previous record only, so update() costs the same however
+    long the history is.
+    """
+    
+    __slots__ = (
+        'max_history', 'last_event', 'last_event_frame',
+        '_history', '_flat', '_end', '_count',
+        '_last_x', '_last_y', '_last_frame', '_last_vx', '_last_vy'
+    )
+    
+    def __init__(self, max_history=30, buffer_factor=8):
+        self.max_history = max_history
         self.last_event = None
         self.last_event_frame = -100  # Avoid multiple detections
+        
+        self._history = np.zeros((buffer_factor * max_history, RECORD_SIZE))
+        # Scalar writes through a flat memoryview skip NumPy's indexing overhead
+        self._flat = memoryview(self._history.reshape(-1))
+        self._end = 0
+        self._count = 0
+        
+        # The previous record as plain floats for the incremental update
+        self._last_x = self._last_y = self._last_frame = None
+        self._last_vx = self._last_vy = None
+    
+    def _window(self, n):
+        # View of the newest min(n, available) records, oldest first
+        n = min(n, self._count, self.max_history)
+        return self._history[self._end - n:self._end]
+    
+    @property
+    def positions(self):
+        """Tracked (x, y) positions, oldest first (view)"""
+        return self._window(self.max_history)[:, X:Y + 1]
+    
+    @property
+    def frames(self):
+        """Frame numbers of the tracked positions"""
+        return self._window(self.max_history)[:, FRAME].astype(np.int64)
+    
+    @property
+    def velocities(self):
+        """Velocities in pixels per frame, oldest first (view)"""
+        return self._window(min(self._count - 1, self.max_history - 1))[:, VX:VY + 1]
+    
+    @property
+    def accelerations(self):
+        """Accelerations in pixels per frame squared, oldest first (view)"""
+        return self._window(min(self._count - 2, self.max_history - 2))[:, AX:AY + 1]
     
     def update(self, ball_position, frame_num):
         """
@@ -39,44 +95,45 @@ class BallTracker:
             ball_position (tuple): x, y coordinates of the ball
             frame_num (int): Current frame number
         """
-        if ball_position:
-            self.positions.append((ball_position, frame_num))
-            
-            # Calculate velocity if we have at least two positions
-            if len(self.positions) >= 2:
-                p1, f1 = self.positions[-2]
-                p2, f2 = self.positions[-1]
-                
-                # Calculate displacement
-                dx = p2[0] - p1[0]
-                dy = p2[1] - p1[1]
-                
-                # Calculate frame difference
-                df = f2 - f1
-                
-                # Calculate velocity (pixels per frame)
-                vx = dx / df if df > 0 else 0
-                vy = dy / df if df > 0 else 0
+        if not ball_position:
+            return
+        
+        x, y = float(ball_position[0]), float(ball_position[1])
+        vx = vy = ax = ay = 0.0
+        
+        if self._last_frame is not None:
+            # Velocity (pixels per frame) from the previous position
+            df = frame_num - self._last_frame
+            if df > 0:
+                vx = (x - self._last_x) / df
+                vy = (y - self._last_y) / df
                 
-                self.velocities.append((vx, vy, f2))
+                # Acceleration (velocity change per frame) from the previous velocity
+                if self._last_vx is not None:
+                    ax = (vx - self._last_vx) / df
+                    ay = (vy - self._last_vy) / df
             
-            # Calculate acceleration if we have at least two velocities
-            if len(self.velocities) >= 2:
-                v1, _, f1 = self.velocities[-2]
-                v2, _, f2 = self.velocities[-1]
-                
-                # Calculate velocity change
-                dvx = v2[0] - v1[0]
-                dvy = v2[1] - v1[1]
-                
-                # Calculate frame difference
-                df = f2 - f1
-                
-                # Calculate acceleration (velocity change per frame)
-                ax = dvx / df if df > 0 else 0
-                ay = dvy / df if df > 0 else 0
-                
-                self.accelerations.append((ax, ay, f2))
+            self._last_vx, self._last_vy = vx, vy
+        
+        self._last_x, self._last_y, self._last_frame = x, y, frame_num
+        
+        if self._end == len(self._history):
+            # Buffer full: keep the records a window can still reach
+            keep = self.max_history - 1
+            self._history[:keep] = self._history[self._end - keep:self._end]
+            self._end = keep
+        
+        base = self._end * RECORD_SIZE
+        flat = self._flat
+        flat[base + X] = x
+        flat[base + Y] = y
+        flat[base + FRAME] = frame_num
+        flat[base + VX] = vx
+        flat[base + VY] = vy
+        flat[base + AX] = ax
+        flat[base + AY] = ay
+        self._end += 1
+        self._count += 1
     
     def detect_events(self, frame, objects, current_frame, timestamp):
         """
@@ -87,14 +144,14 @@ class BallTracker:
             objects (list): Detected objects in the frame
             current_frame (int): Current frame number
             timestamp (float): Current timestamp in seconds
-            
+        
         Returns:
             list: Detected events
         """
         events = []
         
         # Check if we have enough data for event detection
-        if len(self.positions) < 5:
+        if self._count < 5:
             return events
         
         # Skip if too close to last event
@@ -104,14 +161,16 @@ class BallTracker:
         # Get frame dimensions
         height, width = frame.shape[:2]
         
-        # Extract ball positions
-        recent_positions = [pos for pos, _ in self.positions]
+        # The checks look at most five sightings back. On windows this small
+        # NumPy's per-call overhead outweighs vectorising, so the records are
+        # read out once and checked as plain floats
+        recent = self._window(5).tolist()
         
         # Check for boundary event
-        if self.is_boundary(recent_positions, width, height):
+        if self.is_boundary(recent, width, height):
             events.append({
                 'type': 'boundary',
-                'subtype': 'four' if self.is_along_ground(recent_positions) else 'six',
+                'subtype': 'four' if self.is_along_ground(recent) else 'six',
                 'confidence': 0.8,
                 'timestamp': timestamp,
                 'frame': current_frame
@@ -121,7 +180,7 @@ class BallTracker:
         
         # Check for wicket event
         stumps_objects = [obj for obj in objects if obj['class'] == 'stumps']
-        if stumps_objects and self.is_wicket(recent_positions, stumps_objects):
+        if stumps_objects and self.is_wicket(recent, stumps_objects):
             events.append({
                 'type': 'wicket',
                 'subtype': 'bowled',  # Simplified - real system would classify different types
@@ -133,10 +192,10 @@ class BallTracker:
             self.last_event_frame = current_frame
         
         # Check for a played shot event
-        if self.is_shot_played(recent_positions):
+        if self.is_shot_played(recent):
             events.append({
                 'type': 'shot_played',
-                'subtype': 'generic',  # The shot classifier would provide the specific type
+                'subtype': 'generic',  # EventDetector names the shot from the poses
                 'confidence': 0.6,
                 'timestamp': timestamp,
                 'frame': current_frame
@@ -146,156 +205,181 @@ class BallTracker:
         
         return events
     
-    def is_boundary(self, positions, width, height):
+    def is_boundary(self, recent, width, height):
         """
         Check if the ball has reached the boundary.
         
         Args:
-            positions (list): Recent ball positions
+            recent (list): Recent history records, oldest first
             width (int): Frame width
             height (int): Frame height
-            
+        
         Returns:
             bool: True if boundary event detected
         """
         # Define boundary region (near edges of frame)
         boundary_margin = 50  # pixels from edge
         
-        # Check if ball position is near the boundary
-        latest_pos = positions[-1]
-        if (latest_pos[0] < boundary_margin or 
-            latest_pos[0] > width - boundary_margin or
-            latest_pos[1] < boundary_margin or
-            latest_pos[1] > height - boundary_margin):
-            
-            # Check if the ball was moving toward the boundary
-            if len(positions) >= 3:
-                direction_x = positions[-1][0] - positions[-3][0]
-                direction_y = positions[-1][1] - positions[-3][1]
-                
-                # Calculate distance to nearest edge
-                distance_to_left = latest_pos[0]
-                distance_to_right = width - latest_pos[0]
-                distance_to_top = latest_pos[1]
-                distance_to_bottom = height - latest_pos[1]
-                
-                min_distance = min(distance_to_left, distance_to_right, 
-                                  distance_to_top, distance_to_bottom)
-                
-                # Check if ball was moving toward the nearest edge
-                if (min_distance == distance_to_left and direction_x < 0) or \
-                   (min_distance == distance_to_right and direction_x > 0) or \
-                   (min_distance == distance_to_top and direction_y < 0) or \
-                   (min_distance == distance_to_bottom and direction_y > 0):
-                    return True
-        
-        return False
+        if len(recent) < 3:
+            return False
+        
+        # Distances from the latest position to the left, right, top and bottom edges
+        x, y = recent[-1][X], recent[-1][Y]
+        distances = (x, width - x, y, height - y)
+        min_distance = min(distances)
+        if min_distance >= boundary_margin:
+            return False
+        
+        # Check if the ball was moving toward the nearest edge
+        direction_x = x - recent[-3][X]
+        direction_y = y - recent[-3][Y]
+        toward = (direction_x < 0, direction_x > 0, direction_y < 0, direction_y > 0)
+        return any(moving for distance, moving in zip(distances, toward) if distance == min_distance)
     
-    def is_along_ground(self, positions):
+    def is_along_ground(self, recent):
         """
         Check if the ball was traveling along the ground (for four) or in the air (for six).
         
         Args:
-            positions (list): Recent ball positions
-            
+            recent (list): Recent history records, oldest first
+        
         Returns:
             bool: True if ball was along ground, False if in air
         """
         # This is a simplified implementation
         # A real system would use 3D tracking or estimate based on trajectory
         
-        # Check vertical component of trajectory
-        if len(positions) >= 5:
-            # Get y-coordinates
-            y_values = [pos[1] for pos in positions[-5:]]
-            
-            # Check if y values are relatively stable (along ground)
-            y_var = np.var(y_values)
-            return y_var < 100  # Threshold for variance
+        # Check if y values are relatively stable (along ground)
+        if len(recent) >= 5:
+            return np.var([record[Y] for record in recent[-5:]]) < 100  # Threshold for variance
         
         return True  # Default to four if not enough data
     
-    def is_wicket(self, positions, stumps_objects):
+    def is_wicket(self, recent, stumps_objects):
         """
         Check if a wicket event has occurred.
         
         Args:
-            positions (list): Recent ball positions
+            recent (list): Recent history records, oldest first
             stumps_objects (list): Detected stumps objects
-            
+        
         Returns:
             bool: True if wicket event detected
         """
-        if not stumps_objects:
+        if not stumps_objects or len(recent) < 3:
             return False
         
-        # Get stumps location
-        stumps = stumps_objects[0]
-        stumps_bbox = stumps['bbox']
-        stumps_center = ((stumps_bbox[0] + stumps_bbox[2]) / 2, 
-                         (stumps_bbox[1] + stumps_bbox[3]) / 2)
+        # Offset from the latest position to the stumps centre
+        x1, y1, x2, y2 = stumps_objects[0]['bbox']
+        to_stumps_x = (x1 + x2) / 2 - recent[-1][X]
+        to_stumps_y = (y1 + y2) / 2 - recent[-1][Y]
         
-        # Check if ball trajectory intersects with stumps
-        if len(positions) >= 3:
-            # Get recent positions
-            p1, p2, p3 = positions[-3:]
-            
-            # Calculate direction vector
-            dx = p3[0] - p1[0]
-            dy = p3[1] - p1[1]
-            
-            # Check if ball is moving toward stumps
-            vector_to_stumps = (stumps_center[0] - p3[0], stumps_center[1] - p3[1])
-            dot_product = dx * vector_to_stumps[0] + dy * vector_to_stumps[1]
-            
-            # Ball is moving toward stumps
-            if dot_product > 0:
-                # Check distance to stumps
-                distance_to_stumps = np.sqrt(vector_to_stumps[0]**2 + vector_to_stumps[1]**2)
-                
-                # Check if ball is close to stumps
-                return distance_to_stumps < 50  # Threshold in pixels
+        # Ball is close to the stumps and moving toward them
+        if to_stumps_x * to_stumps_x + to_stumps_y * to_stumps_y >= 50 ** 2:  # Threshold in pixels
+            return False
         
-        return False
+        dx = recent[-1][X] - recent[-3][X]
+        dy = recent[-1][Y] - recent[-3][Y]
+        return dx * to_stumps_x + dy * to_stumps_y > 0
     
-    def is_shot_played(self, positions):
+    def is_shot_played(self, recent):
         """
         Check if a shot has been played (ball direction changed suddenly).
         
         Args:
-            positions (list): Recent ball positions
-            
+            recent (list): Recent history records, oldest first
+        
         Returns:
             bool: True if shot event detected
         """
-        if len(positions) >= 5:
-            # Get recent positions
-            p1, p2, p3, p4, p5 = positions[-5:]
-            
-            # Calculate direction vectors
-            v1 = (p2[0] - p1[0], p2[1] - p1[1])
-            v2 = (p5[0] - p4[0], p5[1] - p4[1])
-            
-            # Calculate angle between vectors
-            dot_product = v1[0] * v2[0] + v1[1] * v2[1]
-            mag_v1 = np.sqrt(v1[0]**2 + v1[1]**2)
-            mag_v2 = np.sqrt(v2[0]**2 + v2[1]**2)
-            
-            # Avoid division by zero
-            if mag_v1 > 0 and mag_v2 > 0:
-                cos_angle = dot_product / (mag_v1 * mag_v2)
-                cos_angle = min(1.0, max(-1.0, cos_angle))  # Ensure valid range
-                angle = np.arccos(cos_angle) * 180 / np.pi
-                
-                # Check if angle indicates a significant direction change
-                return angle > 30  # Threshold in degrees
+        if len(recent) < 5:
+            return False
+        
+        # The stored velocities point along the first and last steps of the window
+        v1x, v1y = recent[1][VX], recent[1][VY]
+        v2x, v2y = recent[4][VX], recent[4][VY]
         
-        return False
+        # Compare the angle between them with the cosine of the threshold
+        # instead of taking arccos
+        norms = ((v1x * v1x + v1y * v1y) * (v2x * v2x + v2y * v2y)) ** 0.5
+        if norms == 0:
+            return False
+        
+        return v1x * v2x + v1y * v2y < SHOT_TURN_COS * norms
 
-# Global ball tracker instance
-ball_tracker = BallTracker()
+def played_shot(poses):
+    """
+    Name the shot from the best labelled pose in a frame.
+    
+    Args:
+        poses (list): Player poses, labelled by shot_classification.label_shots
+    
+    Returns:
+        str: Shot name, or 'generic' if no pose was classified
+    """
+    labelled = [pose for pose in poses or () if pose.get('shot')]
+    if not labelled:
+        return 'generic'
+    return max(labelled, key=lambda pose: pose['shot_score'])['shot']
 
-def detect_events(frame, objects, poses, ball_positions, frame_num, timestamp):
+class EventDetector:
+    """
+    Event detection state for one video.
+    
+    Each analysis owns its detector, so videos processed at the same time
+    (in job threads or worker processes) keep separate ball trajectories
+    and event suppression windows, and nothing on the per-frame path has
+    to be locked.
+    """
+    
+    __slots__ = ('ball_tracker',)
+    
+    def __init__(self, max_history=30):
+        self.ball_tracker = BallTracker(max_history)
+    
+    def detect(self, frame, objects, poses, ball_positions, frame_num, timestamp):
+        """
+        Detect cricket events in the current frame.
+        
+        Args:
+            frame (numpy.ndarray): Current video frame
+            objects (list): Detected objects in the frame
+            poses (list): Detected player poses
+            ball_positions (list): Recent ball positions with timestamps
+            frame_num (int): Current frame number
+            timestamp (float): Current timestamp in seconds
+        
+        Returns:
+            list: Detected events
+        """
+        events = []
+        
+        # Extract the latest ball position
+        latest_ball = None
+        if ball_positions and len(ball_positions) > 0:
+            latest_ball = ball_positions[-1]['position']
+        
+        # Update ball tracker
+        self.ball_tracker.update(latest_ball, frame_num)
+        
+        # Detect events based on ball tracking
+        ball_events = self.ball_tracker.detect_events(frame, objects, frame_num, timestamp)
+        if ball_events:
+            for event in ball_events:
+                if event['type'] == 'shot_played':
+                    event['subtype'] = played_shot(poses)
+            events.extend(ball_events)
+        
+        # Additional event detection logic could be added here
+        # For example, detecting runs based on player movements
+        
+        return events
+
+# Shared detector for callers that do not pass their own; not safe to use
+# from more than one video at a time
+default_detector = EventDetector()
+
+def detect_events(frame, objects, poses, ball_positions, frame_num, timestamp, detector=None):
     """
     Detect cricket events in the current frame.
     
@@ -306,26 +390,10 @@ def detect_events(frame, objects, poses, ball_positions, frame_num, timestamp):
         ball_positions (list): Recent ball positions with timestamps
         frame_num (int): Current frame number
         timestamp (float): Current timestamp in seconds
-        
+        detector (EventDetector): Per-video detection state; defaults to
+            the shared default_detector
+    
     Returns:
         list: Detected events
     """
-    events = []
-    
-    # Extract the latest ball position
-    latest_ball = None
-    if ball_positions and len(ball_positions) > 0:
-        latest_ball = ball_positions[-1]['position']
-    
-    # Update ball tracker
-    ball_tracker.update(latest_ball, frame_num)
-    
-    # Detect events based on ball tracking
-    ball_events = ball_tracker.detect_events(frame, objects, frame_num, timestamp)
-    if ball_events:
-        events.extend(ball_events)
-    
-    # Additional event detection logic could be added here
-    # For example, detecting runs based on player movements
-    
-    return events
+    return (detector or default_detector).detect(frame, objects, poses, ball_positions, frame_num, timestamp)
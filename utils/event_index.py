@@ -0,0 +1,89 @@
+import threading
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
+
+class EventIndex:
+    """
+    Timestamp-sorted index over a result's events for windowed queries.
+    
+    Events are sorted once, with a parallel timestamp list per event type
+    (and one for all events), so a time window is located with two
+    bisects instead of a scan.
+    """
+    
+    def __init__(self, events):
+        self.events = sorted(events, key=lambda x: x['timestamp'])
+        
+        # type -> (timestamps, positions into self.events); None covers all types
+        self._by_type = {None: ([e['timestamp'] for e in self.events], range(len(self.events)))}
+        
+        grouped = {}
+        for pos, event in enumerate(self.events):
+            grouped.setdefault(event['type'], []).append(pos)
+        for event_type, positions in grouped.items():
+            self._by_type[event_type] = ([self.events[pos]['timestamp'] for pos in positions], positions)
+    
+    def query(self, start=None, end=None, event_type=None, limit=None, cursor=None):
+        """
+        Fetch the events in a time window, one page at a time.
+        
+        Args:
+            start (float): Earliest timestamp (inclusive)
+            end (float): Latest timestamp (inclusive)
+            event_type (str): Only return events of this type
+            limit (int): Maximum number of events to return
+            cursor (int): next_cursor from the previous page
+        
+        Returns:
+            tuple: (events, next_cursor); next_cursor is None on the last page
+        """
+        timestamps, positions = self._by_type.get(event_type, ([], []))
+        
+        lo = bisect_left(timestamps, start) if start is not None else 0
+        hi = bisect_right(timestamps, end) if end is not None else len(timestamps)
+        
+        # Cursors are offsets into the filtered list, so they stay valid
+        # for as long as the result is unchanged
+        if cursor is not None:
+            lo = max(lo, cursor)
+        
+        stop = hi if limit is None else min(hi, lo + limit)
+        page = [self.events[pos] for pos in positions[lo:stop]]
+        
+        return page, (stop if stop < hi else None)
+
+class EventIndexCache:
+    """Small LRU of EventIndex objects keyed by result id and version"""
+    
+    def __init__(self, max_entries=64):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, key, version, load_events):
+        """
+        Return the index for a result, building it on a miss.
+        
+        Args:
+            key (str): Result id
+            version (float): Result version; a new version replaces the entry
+            load_events (callable): Returns the result's events on a miss
+        
+        Returns:
+            EventIndex: Index for the result
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == version:
+                self._entries.move_to_end(key)
+                return entry[1]
+        
+        index = EventIndex(load_events())
+        
+        with self._lock:
+            self._entries[key] = (version, index)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        
+        return index
@@ -0,0 +1,209 @@
+import logging
+import os
+import shutil
+import subprocess
+from multiprocessing import shared_memory
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# ffmpeg is optional; without it videos are decoded with OpenCV
+FFMPEG_BINARY = os.environ.get('FFMPEG_BINARY', 'ffmpeg')
+FFMPEG_AVAILABLE = shutil.which(FFMPEG_BINARY) is not None
+if not FFMPEG_AVAILABLE:
+    logger.info("ffmpeg not found. The ffmpeg decode backend will be unavailable.")
+
+DECODE_WIDTH = int(os.environ.get('DECODE_WIDTH', 0))  # Scale frames to this width; 0 keeps the source size
+DECODE_THREADS = int(os.environ.get('DECODE_THREADS', 0))  # 0 lets ffmpeg decide
+
+# Frames are handed over as packed BGR, the layout OpenCV uses
+PIXEL_FORMAT = 'bgr24'
+CHANNELS = 3
+
+def output_size(video_info, width=DECODE_WIDTH):
+    """
+    Size of the frames the ffmpeg decoder produces.
+    
+    Args:
+        video_info (dict): Stream properties from probe_video
+        width (int): Target width; 0 keeps the source size
+    
+    Returns:
+        tuple: (width, height), both even when scaled
+    """
+    if not width or width == video_info['width']:
+        return video_info['width'], video_info['height']
+    
+    # Keep the aspect ratio; ffmpeg's scale=W:-2 rounds the height to even
+    height = int(round(video_info['height'] * width / video_info['width'] / 2)) * 2
+    return width, max(height, 2)
+
+def ffmpeg_command(input_path, video_info, sample_rate=1, start_frame=0, end_frame=None, width=DECODE_WIDTH):
+    """
+    Build the ffmpeg command that writes raw frames to stdout.
+    
+    ffmpeg seeks to the keyframe before start_frame and decodes up to it
+    (accurate seeking), keeps every sample_rate-th frame counted from the
+    start of the video, scales, and converts to BGR before writing, so
+    no further conversion is needed on our side.
+    
+    Args:
+        input_path (str): Path to the input video
+        video_info (dict): Stream properties from probe_video
+        sample_rate (int): Keep frames whose number is a multiple of this
+        start_frame (int): First frame to read
+        end_frame (int): Stop before this frame (None reads to the end)
+        width (int): Target width; 0 keeps the source size
+    
+    Returns:
+        list: Command line
+    """
+    filters = []
+    if sample_rate > 1:
+        # n counts from the seek point, so offset it to stay aligned with
+        # the absolute frame numbers the OpenCV decoder samples
+        filters.append(f"select='not(mod(n+{start_frame},{sample_rate}))'")
+    
+    out_width, out_height = output_size(video_info, width)
+    if (out_width, out_height) != (video_info['width'], video_info['height']):
+        filters.append(f"scale={out_width}:{out_height}")
+    
+    command = [FFMPEG_BINARY, '-nostdin', '-hide_banner', '-loglevel', 'error',
+               '-threads', str(DECODE_THREADS)]
+    if start_frame > 0:
+        command += ['-ss', f"{start_frame / video_info['fps']:.6f}"]
+    command += ['-i', str(input_path), '-map', '0:v:0', '-an', '-sn', '-vsync', 'passthrough']
+    if filters:
+        command += ['-vf', ','.join(filters)]
+    if end_frame is not None:
+        command += ['-frames:v', str(len(sampled_frames(sample_rate, start_frame, end_frame)))]
+    command += ['-f', 'rawvideo', '-pix_fmt', PIXEL_FORMAT, 'pipe:1']
+    return command
+
+def sampled_frames(sample_rate, start_frame=0, end_frame=None):
+    """
+    Numbers of the frames a decoder yields for a sample rate and segment.
+    
+    Returns:
+        range: Frame numbers (unbounded above when end_frame is None)
+    """
+    first = -(-start_frame // sample_rate) * sample_rate
+    return range(first, end_frame if end_frame is not None else 2 ** 62, sample_rate)
+
+class FFmpegReader:
+    """
+    Raw frames from an ffmpeg subprocess, read straight into caller buffers.
+    
+    Each frame is read from the pipe into an array the caller provides (a
+    reused buffer or a shared memory slot), so no per-frame array is
+    allocated on our side.
+    """
+    
+    def __init__(self, input_path, video_info, sample_rate=1, start_frame=0, end_frame=None, width=DECODE_WIDTH):
+        if not FFMPEG_AVAILABLE:
+            raise RuntimeError("ffmpeg is not available")
+        
+        out_width, out_height = output_size(video_info, width)
+        self.shape = (out_height, out_width, CHANNELS)
+        self.frame_bytes = out_width * out_height * CHANNELS
+        self.frame_numbers = iter(sampled_frames(sample_rate, start_frame, end_frame))
+        self.fps = video_info['fps']
+        
+        command = ffmpeg_command(input_path, video_info, sample_rate, start_frame, end_frame, width)
+        logger.debug(f"Starting decoder: {' '.join(command)}")
+        self._process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                                         bufsize=self.frame_bytes)
+    
+    def read_into(self, frame):
+        """
+        Read the next frame into an array.
+        
+        Args:
+            frame (numpy.ndarray): C-contiguous uint8 array of self.shape
+        
+        Returns:
+            tuple: (frame_num, timestamp), or None once the video has ended
+        """
+        view = memoryview(frame).cast('B')
+        filled = 0
+        while filled < self.frame_bytes:
+            count = self._process.stdout.readinto(view[filled:])
+            if not count:
+                if filled:
+                    logger.warning(f"Decoder stopped mid-frame ({filled} of {self.frame_bytes} bytes)")
+                return None
+            filled += count
+        
+        frame_num = next(self.frame_numbers)
+        return frame_num, frame_num / self.fps
+    
+    def close(self):
+        """Stop the decoder, logging any error it reported."""
+        if self._process.poll() is None:
+            self._process.kill()
+        _, stderr = self._process.communicate()
+        if self._process.returncode not in (0, -9) and stderr:
+            logger.error(f"ffmpeg failed: {stderr.decode(errors='replace').strip()}")
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc):
+        self.close()
+
+def iter_ffmpeg_frames(input_path, video_info, sample_rate=1, start_frame=0, end_frame=None, width=DECODE_WIDTH):
+    """
+    Decode a video with ffmpeg and yield every nth frame.
+    
+    Frames are read into one reused buffer, so each yielded frame is only
+    valid until the next one is requested.
+    
+    Yields:
+        tuple: (frame_num, timestamp, frame)
+    """
+    with FFmpegReader(input_path, video_info, sample_rate, start_frame, end_frame, width) as reader:
+        frame = np.empty(reader.shape, dtype=np.uint8)
+        while True:
+            position = reader.read_into(frame)
+            if position is None:
+                break
+            yield position[0], position[1], frame
+
+class SharedFrameRing:
+    """
+    Fixed-size ring of frames in shared memory.
+    
+    The decoding process writes frames into slots and analysis workers
+    attach to the same block by name, so a frame crosses into a worker
+    without being pickled or copied.
+    """
+    
+    def __init__(self, slots, shape, name=None):
+        self.slots = slots
+        self.shape = tuple(shape)
+        size = slots * int(np.prod(self.shape))
+        if name is None:
+            self._memory = shared_memory.SharedMemory(create=True, size=size)
+            self._owner = True
+        else:
+            self._memory = shared_memory.SharedMemory(name=name)
+            self._owner = False
+        self.frames = np.ndarray((slots,) + self.shape, dtype=np.uint8, buffer=self._memory.buf)
+    
+    @property
+    def name(self):
+        return self._memory.name
+    
+    @classmethod
+    def attach(cls, name, slots, shape):
+        """Open a ring created by another process."""
+        return cls(slots, shape, name=name)
+    
+    def close(self):
+        """Release the mapping; the creating process also frees the memory."""
+        # The array view has to go before the mapping can be closed
+        self.frames = None
+        self._memory.close()
+        if self._owner:
+            self._memory.unlink()
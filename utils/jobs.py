@@ -0,0 +1,137 @@
+import logging
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+# Pipeline stages reported by a processing job, in the order they run.
+# Frames are decoded, analysed and passed to event detection one at a time,
+# so those steps advance together and are reported as one stage
+JOB_STAGES = ['analysis', 'commentary', 'tts']
+
+class QueueFullError(Exception):
+    """Raised when a job is submitted while the queue is at capacity"""
+
+class Job:
+    """A unit of background work with per-stage progress"""
+    
+    def __init__(self, job_id, stages=JOB_STAGES):
+        self.id = job_id
+        self.status = 'queued'
+        self.stage = None
+        self.progress = {stage: 0.0 for stage in stages}
+        self.result = None
+        self.error = None
+        self.created = time.time()
+        self.started = None
+        self.finished = None
+    
+    def update(self, stage, fraction):
+        """
+        Record progress for a stage.
+        
+        Args:
+            stage (str): Stage name
+            fraction (float): Completed fraction of the stage (0-1)
+        """
+        self.stage = stage
+        self.progress[stage] = max(0.0, min(1.0, fraction))
+    
+    @property
+    def overall_progress(self):
+        """Mean progress across all stages (0-1)"""
+        return sum(self.progress.values()) / len(self.progress)
+    
+    def to_dict(self):
+        """
+        Serialize the job state for the status API.
+        
+        Returns:
+            dict: Job status, stage progress and timing
+        """
+        return {
+            'job_id': self.id,
+            'status': self.status,
+            'stage': self.stage,
+            'progress': dict(self.progress),
+            'overall_progress': self.overall_progress,
+            'error': self.error,
+            'created': self.created,
+            'started': self.started,
+            'finished': self.finished
+        }
+
+class JobManager:
+    """
+    Runs jobs on a bounded thread pool and keeps their status for polling.
+    
+    At most max_workers jobs run at once and at most max_queued more wait
+    for a worker; further submissions are rejected with QueueFullError
+    rather than piling up. Only the most recent finished jobs are kept.
+    """
+    
+    def __init__(self, max_workers=2, max_queued=8, max_history=256):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='job')
+        self._slots = threading.BoundedSemaphore(max_workers + max_queued)
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+        self.max_history = max_history
+    
+    def submit(self, func, *args, **kwargs):
+        """
+        Queue func(job, *args, **kwargs) to run in the background.
+        
+        Args:
+            func (callable): Work to run; receives the Job as first argument
+        
+        Returns:
+            Job: The queued job
+        """
+        if not self._slots.acquire(blocking=False):
+            raise QueueFullError("Too many jobs are queued, please try again later")
+        
+        job = Job(str(uuid.uuid4()))
+        with self._lock:
+            self._jobs[job.id] = job
+            self._prune()
+        
+        self._executor.submit(self._run, job, func, args, kwargs)
+        return job
+    
+    def get(self, job_id):
+        """
+        Look up a job by id.
+        
+        Returns:
+            Job: The job, or None if unknown or expired
+        """
+        with self._lock:
+            return self._jobs.get(job_id)
+    
+    def _run(self, job, func, args, kwargs):
+        job.status = 'running'
+        job.started = time.time()
+        try:
+            job.result = func(job, *args, **kwargs)
+            job.status = 'done'
+        except Exception as e:
+            logger.exception(f"Job {job.id} failed")
+            job.error = str(e)
+            job.status = 'error'
+        finally:
+            job.finished = time.time()
+            self._slots.release()
+            logger.info(f"Job {job.id} {job.status} in {job.finished - job.started:.2f}s")
+    
+    def _prune(self):
+        # Drop the oldest finished jobs once the history is full
+        excess = len(self._jobs) - self.max_history
+        if excess <= 0:
+            return
+        
+        for job_id in [job_id for job_id, job in self._jobs.items()
+                       if job.status in ('done', 'error')][:excess]:
+            del self._jobs[job_id]
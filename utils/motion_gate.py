@@ -0,0 +1,87 @@
+import logging
+
+import cv2
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+class MotionGate:
+    """
+    Cheap frame-difference check for skipping near-static frames.
+    
+    Each frame is shrunk to a grayscale thumbnail and compared with the
+    thumbnail of the last frame that was let through. The thumbnail keeps
+    enough resolution that an object min_object source pixels across
+    still covers a few thumbnail pixels, so the ball is never averaged
+    away. A frame counts as static when no region x region window of the
+    thumbnail has min_changed pixels that changed by more than
+    pixel_threshold: one compact moving blob is enough to let a frame
+    through, while the same number of changed pixels scattered over the
+    frame (compression noise) is not. Comparing against the last analysed
+    frame (rather than the previous one) means slow drift still adds up
+    to a change, and max_skip forces a refresh during long static
+    stretches.
+    """
+    
+    def __init__(self, min_object=12, pixel_threshold=12, region=8, min_changed=4, max_skip=25):
+        self.min_object = min_object
+        self.pixel_threshold = pixel_threshold
+        self.region = region
+        self.min_changed = min_changed
+        self.max_skip = max_skip
+        self._reference = None
+        self._diff = None
+        self._density = None
+        self._skipped_run = 0
+        self.frames_checked = 0
+        self.frames_skipped = 0
+    
+    def thumbnail_size(self, width, height):
+        """
+        Thumbnail size for a frame size.
+        
+        The frame is shrunk by at most min_object / 3, so the smallest
+        object of interest stays about three thumbnail pixels across.
+        """
+        factor = max(1.0, self.min_object / 3)
+        return max(1, round(width / factor)), max(1, round(height / factor))
+    
+    def is_static(self, frame):
+        """
+        Check whether a frame can reuse the previous analysis results.
+        
+        Args:
+            frame (numpy.ndarray): Input frame
+        
+        Returns:
+            bool: True if nothing changed beyond the thresholds
+        """
+        height, width = frame.shape[:2]
+        size = self.thumbnail_size(width, height)
+        
+        # Shrink before the colour conversion so it runs on the thumbnail
+        thumb = cv2.cvtColor(cv2.resize(frame, size, interpolation=cv2.INTER_AREA), cv2.COLOR_BGR2GRAY)
+        self.frames_checked += 1
+        
+        if self._reference is None or self._reference.shape != thumb.shape:
+            self._reference = thumb
+            self._diff = np.empty_like(thumb)
+            self._density = np.empty(thumb.shape, dtype=np.float32)
+            return False
+        
+        # Changed pixels per region x region window; the densest window
+        # decides, so a small fast object counts as much as a large one
+        cv2.absdiff(thumb, self._reference, dst=self._diff)
+        cv2.threshold(self._diff, self.pixel_threshold, 1, cv2.THRESH_BINARY, dst=self._diff)
+        cv2.boxFilter(self._diff, cv2.CV_32F, (self.region, self.region), dst=self._density,
+                      normalize=False, borderType=cv2.BORDER_CONSTANT)
+        changed = self._density.max()
+        
+        if changed < self.min_changed and self._skipped_run < self.max_skip:
+            self._skipped_run += 1
+            self.frames_skipped += 1
+            return True
+        
+        self._reference = thumb
+        self._skipped_run = 0
+        return False
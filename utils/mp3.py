@@ -0,0 +1,92 @@
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Layer III bitrates in kbit/s by bitrate index, for MPEG-1 and MPEG-2/2.5
+BITRATES = {
+    1: (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320),
+    2: (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160)
+}
+
+# Sample rates in Hz by sample rate index, keyed by the header's version bits
+SAMPLE_RATES = {
+    3: (44100, 48000, 32000),  # MPEG-1
+    2: (22050, 24000, 16000),  # MPEG-2
+    0: (11025, 12000, 8000)    # MPEG-2.5
+}
+
+def _id3v2_length(data):
+    """Length of an ID3v2 tag at the start of data (0 if there is none)."""
+    if len(data) < 10 or data[:3] != b'ID3':
+        return 0
+    # The size is "syncsafe": four bytes of seven bits each
+    size = (data[6] << 21) | (data[7] << 14) | (data[8] << 7) | data[9]
+    footer = 10 if data[5] & 0x10 else 0
+    return 10 + size + footer
+
+def frame_length(header):
+    """
+    Length in bytes of the Layer III frame starting with a 4-byte header.
+    
+    Returns:
+        int: Frame length, or 0 if the bytes are not a valid frame header
+    """
+    if len(header) < 4 or header[0] != 0xFF or header[1] & 0xE0 != 0xE0:
+        return 0
+    
+    version = (header[1] >> 3) & 0x3
+    layer = (header[1] >> 1) & 0x3
+    bitrate_index = header[2] >> 4
+    rate_index = (header[2] >> 2) & 0x3
+    padding = (header[2] >> 1) & 0x1
+    if version == 1 or layer != 1 or bitrate_index in (0, 15) or rate_index == 3:
+        return 0
+    
+    bitrate = BITRATES[1 if version == 3 else 2][bitrate_index] * 1000
+    sample_rate = SAMPLE_RATES[version][rate_index]
+    # MPEG-2/2.5 Layer III frames hold half as many samples
+    samples = 144 if version == 3 else 72
+    return samples * bitrate // sample_rate + padding
+
+def audio_frames(data):
+    """
+    The MPEG audio frames of an MP3 file, without tags.
+    
+    Drops a leading ID3v2 tag, a trailing ID3v1 tag and a leading
+    Xing/Info frame. The Xing frame carries the frame count and seek table
+    of its own file, which would be wrong for a concatenation.
+    
+    Args:
+        data (bytes): MP3 file contents
+    
+    Returns:
+        memoryview: The audio frames
+    """
+    view = memoryview(data)
+    start = _id3v2_length(view)
+    end = len(view)
+    if end - start >= 128 and view[end - 128:end - 125] == b'TAG':
+        end -= 128
+    
+    length = frame_length(view[start:start + 4])
+    if length:
+        first = bytes(view[start:start + length])
+        if b'Xing' in first or b'Info' in first:
+            start += length
+    
+    return view[start:end]
+
+def concat_mp3(segments):
+    """
+    Join MP3 files into one stream by concatenating their frames.
+    
+    MP3 frames are self-contained, so files with the same sample rate and
+    channel layout can be joined without decoding and re-encoding.
+    
+    Args:
+        segments (iterable): MP3 file contents, in playback order
+    
+    Returns:
+        bytes: A single MP3 stream
+    """
+    return b''.join(audio_frames(segment) for segment in segments)
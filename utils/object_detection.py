@@ -8,120 +8,333 @@ import time
 
 logger = logging.getLogger(__name__)
 
-# Define model paths for YOLOv5
-YOLO_WEIGHTS_URL = "https://github.com/ultralytics/yolov5/releases/download/v6.1/yolov5s.pt"
-YOLO_WEIGHTS_PATH = Path("./models/yolov5s.pt")
+# Define model paths for YOLOv5, exported to ONNX (see detector_backends)
+YOLO_WEIGHTS_PATH = Path(os.environ.get('DETECTOR_WEIGHTS', './models/yolov5s.onnx'))
+YOLO_WEIGHTS_URL = os.environ.get('DETECTOR_WEIGHTS_URL')  # Optional download location
 CRICKET_CLASSES = ['person', 'sports ball']
 
-def ensure_model_downloaded():
+# Class ids used in the columnar output of detect_objects_batch
+DETECTION_CLASSES = ['player', 'ball', 'stumps']
+PLAYER, BALL, STUMPS = range(len(DETECTION_CLASSES))
+
+# Fixed confidences of the heuristic detectors, indexed by class id
+HEURISTIC_CONFIDENCE = np.array([0.8, 0.7, 0.6])
+
+# Detection profiles give each detector a region of interest, as fractions
+# (top, bottom, left, right) of the frame, and a downscale factor. Pixel
+# thresholds are tuned for full resolution and scaled to match.
+FULL_FRAME = (0.0, 1.0, 0.0, 1.0)
+DETECTION_PROFILES = {
+    # Every detector on the whole frame at full resolution
+    'full': {
+        'players': {'roi': FULL_FRAME, 'scale': 1.0},
+        'ball': {'roi': FULL_FRAME, 'scale': 1.0},
+        'stumps': {'roi': FULL_FRAME, 'scale': 1.0}
+    },
+    # 1080p and larger broadcast feeds: players and ball on the first
+    # pyramid level, stumps only in the lower part of the frame
+    'broadcast': {
+        'players': {'roi': FULL_FRAME, 'scale': 0.5},
+        'ball': {'roi': FULL_FRAME, 'scale': 0.5},
+        'stumps': {'roi': (0.3, 1.0, 0.0, 1.0), 'scale': 0.5}
+    },
+    # 4K feeds
+    'broadcast_4k': {
+        'players': {'roi': FULL_FRAME, 'scale': 0.25},
+        'ball': {'roi': FULL_FRAME, 'scale': 0.5},
+        'stumps': {'roi': (0.3, 1.0, 0.0, 1.0), 'scale': 0.25}
+    }
+}
+
+def ensure_model_downloaded(path=YOLO_WEIGHTS_PATH, url=YOLO_WEIGHTS_URL):
     """
-    Ensure the object detection model is downloaded.
-    For this example, we'll use YOLOv5 (or simulate it)
+    Ensure the object detection model weights are available locally.
+    
+    Args:
+        path (Path): Where the weights should be
+        url (str): Where to download them from if they are missing
+        
+    Returns:
+        Path: Path to the weights, or None if they are missing and no URL
+            is configured
     """
+    path = Path(path)
+    if path.exists():
+        return path
+    
+    if not url:
+        logger.warning(f"Detector weights not found at {path} and DETECTOR_WEIGHTS_URL is not set")
+        return None
+    
     # Create models directory if it doesn't exist
-    os.makedirs(YOLO_WEIGHTS_PATH.parent, exist_ok=True)
-    
-    # For actual implementation, download the model if not already present
-    if not YOLO_WEIGHTS_PATH.exists():
-        logger.info(f"Downloading YOLOv5 model from {YOLO_WEIGHTS_URL}")
-        try:
-            # In a real implementation, we would download the actual model
-            # For this code example, we'll simulate this part to avoid complexity
-            # urllib.request.urlretrieve(YOLO_WEIGHTS_URL, YOLO_WEIGHTS_PATH)
-            
-            # Write a placeholder file to simulate download
-            with open(YOLO_WEIGHTS_PATH, 'w') as f:
-                f.write("# This is a placeholder for the YOLOv5 model weights")
-                
-            logger.info(f"Model downloaded successfully to {YOLO_WEIGHTS_PATH}")
-        except Exception as e:
-            logger.error(f"Error downloading model: {str(e)}")
-            raise
-
-def detect_objects(frame):
+    os.makedirs(path.parent, exist_ok=True)
+    
+    logger.info(f"Downloading detector weights from {url}")
+    tmp_path = path.with_name(path.name + '.part')
+    try:
+        urllib.request.urlretrieve(url, tmp_path)
+        # Only a complete download ends up under the real name
+        os.replace(tmp_path, path)
+        logger.info(f"Model downloaded successfully to {path}")
+    except Exception as e:
+        logger.error(f"Error downloading model: {str(e)}")
+        tmp_path.unlink(missing_ok=True)
+        raise
+    
+    return path
+
+def _empty_detections():
+    return {
+        'class_id': np.empty(0, dtype=np.int8),
+        'bbox': np.empty((0, 4), dtype=np.int32),
+        'confidence': np.empty(0, dtype=np.float64),
+        'frame_index': np.empty(0, dtype=np.int32)
+    }
+
+def _concat_detections(class_ids, boxes, frame_indices, confidences=None):
+    """Join per-frame detection parts into one set of columnar arrays."""
+    if not class_ids:
+        return _empty_detections()
+    
+    class_id = np.concatenate(class_ids).astype(np.int8)
+    return {
+        'class_id': class_id,
+        'bbox': np.concatenate(boxes).astype(np.int32),
+        'confidence': (HEURISTIC_CONFIDENCE[class_id] if confidences is None
+                       else np.concatenate(confidences).astype(np.float64)),
+        'frame_index': np.concatenate(frame_indices).astype(np.int32)
+    }
+
+def merge_detections(*parts):
     """
-    Detect cricket-related objects in a frame using a pre-trained model.
+    Merge columnar detections from several detectors over the same frames.
+    
+    Returns:
+        dict: Combined detections ordered by frame
+    """
+    merged = {key: np.concatenate([part[key] for part in parts]) for key in _empty_detections()}
+    order = np.argsort(merged['frame_index'], kind='stable')
+    return {key: column[order] for key, column in merged.items()}
+
+def _prepare_region(gray, region, regions):
+    """
+    Crop and downscale a grayscale stack for one detector.
+    
+    Detectors configured with the same region share the prepared stack.
+    
+    Returns:
+        tuple: (stack, offset_x, offset_y, scale)
+    """
+    key = (tuple(region['roi']), region['scale'])
+    if key in regions:
+        return regions[key]
+    
+    n, height, width = gray.shape
+    top, bottom, left, right = region['roi']
+    y0, y1 = int(round(top * height)), int(round(bottom * height))
+    x0, x1 = int(round(left * width)), int(round(right * width))
+    scale = region['scale']
+    
+    crop = gray[:, y0:y1, x0:x1]
+    if scale == 1.0:
+        stack = np.ascontiguousarray(crop)
+    else:
+        size = (max(1, int(round((x1 - x0) * scale))), max(1, int(round((y1 - y0) * scale))))
+        stack = np.empty((n, size[1], size[0]), dtype=np.uint8)
+        for i in range(n):
+            cv2.resize(crop[i], size, dst=stack[i], interpolation=cv2.INTER_AREA)
+    
+    regions[key] = (stack, x0, y0, scale)
+    return regions[key]
+
+def _to_frame_coords(boxes, offset_x, offset_y, scale):
+    """Map boxes from a prepared region back to full-resolution pixels."""
+    if scale != 1.0:
+        boxes = np.around(boxes / scale).astype(np.int32)
+    return boxes + np.array([offset_x, offset_y, offset_x, offset_y], dtype=np.int32)
+
+def _find_circles(image, scale=1.0, param2=30):
+    """Run the ball HoughCircles search with radii scaled to the image."""
+    return cv2.HoughCircles(
+        image, cv2.HOUGH_GRADIENT, dp=1, minDist=50 * scale,
+        param1=50, param2=param2, minRadius=max(1, int(5 * scale)), maxRadius=int(np.ceil(15 * scale))
+    )
+
+def _refine_circles(gray, candidates, scale, offset_x, offset_y):
+    """
+    Confirm coarse circle candidates on full-resolution patches.
+    
+    Returns:
+        numpy.ndarray: Confirmed circles as (N, 3) x, y, radius in frame
+            pixels, or None if no candidate was confirmed
+    """
+    if candidates is None:
+        return None
+    
+    height, width = gray.shape
+    margin = 30
+    confirmed = []
+    
+    for cx, cy, _ in candidates.reshape(-1, 3):
+        x, y = int(cx / scale) + offset_x, int(cy / scale) + offset_y
+        x0, y0 = max(0, x - margin), max(0, y - margin)
+        patch = gray[y0:min(height, y + margin), x0:min(width, x + margin)]
+        
+        circles = _find_circles(patch)
+        if circles is not None:
+            # Patches are centred on the candidate, so keep the closest circle
+            circles = circles.reshape(-1, 3) + (x0, y0, 0)
+            best = circles[np.argmin(np.hypot(circles[:, 0] - x, circles[:, 1] - y))]
+            if not any(np.hypot(best[0] - c[0], best[1] - c[1]) < 50 for c in confirmed):
+                confirmed.append(best)
+    
+    return np.array(confirmed) if confirmed else None
+
+def detect_objects_heuristic(frames, profile='full', classes=DETECTION_CLASSES):
+    """
+    Detect cricket-related objects in a stack of frames with image heuristics.
+    
+    Colour conversion and thresholding are per-pixel operations, so they
+    run once over the whole stack viewed as a single tall image. Edge
+    detection and the contour/Hough steps look at neighbourhoods and run
+    per frame into preallocated buffers. Each detector only sees its own
+    region of interest at the scale set by the detection profile.
     
     Args:
-        frame (numpy.ndarray): Input frame
+        frames (numpy.ndarray): Frames as an (N, H, W, 3) BGR array
+        profile (str or dict): Name of a DETECTION_PROFILES entry, or a
+            profile dict with 'players', 'ball' and 'stumps' regions
+        classes (list): Subset of DETECTION_CLASSES to look for
         
     Returns:
-        list: Detected objects with bounding boxes and classes
+        dict: Columnar detections with 'class_id' (N,), 'bbox' (N, 4) as
+            x1, y1, x2, y2, 'confidence' (N,) and 'frame_index' (N,)
     """
-    # Ensure model is available
-    # ensure_model_downloaded()
+    if isinstance(profile, str):
+        profile = DETECTION_PROFILES[profile]
     
-    # In a real implementation, we would load and use YOLOv5 here
-    # For this example, we'll simulate object detection with a simple approach
+    frames = np.ascontiguousarray(frames, dtype=np.uint8)
+    n, height, width = frames.shape[:3]
+    if n == 0:
+        return _empty_detections()
     
     # Convert to grayscale for simpler processing
-    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-    
-    # Get frame dimensions
-    height, width = frame.shape[:2]
-    
-    # Simulate player detection (in a real implementation, we would use the YOLO model)
-    # For this example, we'll use simple contour detection to simulate players
-    _, thresh = cv2.threshold(gray, 100, 255, cv2.THRESH_BINARY)
-    contours, _ = cv2.findContours(thresh, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-    
-    detected_objects = []
-    
-    # Filter contours to simulate player detection
-    for contour in contours:
-        area = cv2.contourArea(contour)
-        if area > 500:  # Minimum size threshold
-            x, y, w, h = cv2.boundingRect(contour)
-            
-            # Make sure it's a reasonable shape for a person
-            if h > w and h > 100:
-                # This could be a player
-                detected_objects.append({
-                    'class': 'player',
-                    'bbox': (x, y, x + w, y + h),
-                    'confidence': 0.8
-                })
-    
-    # Simulate ball detection (in a real implementation, this would be more sophisticated)
-    # For this example, we'll detect small circular objects
-    circles = cv2.HoughCircles(
-        gray, cv2.HOUGH_GRADIENT, dp=1, minDist=50,
-        param1=50, param2=30, minRadius=5, maxRadius=15
-    )
+    gray = cv2.cvtColor(frames.reshape(n * height, width, 3), cv2.COLOR_BGR2GRAY).reshape(n, height, width)
+    
+    find_players, find_ball, find_stumps = (name in classes for name in DETECTION_CLASSES)
+    
+    regions = {}
+    if find_players:
+        players, px, py, ps = _prepare_region(gray, profile['players'], regions)
+        
+        # Simulate player detection with simple contour detection
+        _, thresh = cv2.threshold(players.reshape(-1, players.shape[2]), 100, 255, cv2.THRESH_BINARY)
+        thresh = thresh.reshape(players.shape)
+    if find_ball:
+        balls, bx, by, bs = _prepare_region(gray, profile['ball'], regions)
+    if find_stumps:
+        stumps, sx, sy, ss = _prepare_region(gray, profile['stumps'], regions)
+        edges = np.empty_like(stumps)
+    
+    class_ids, boxes, frame_indices = [], [], []
     
-    if circles is not None:
-        circles = np.uint16(np.around(circles))
-        for circle in circles[0, :]:
-            center_x, center_y, radius = circle
-            
-            # Add ball detection
-            detected_objects.append({
-                'class': 'ball',
-                'bbox': (
-                    int(center_x - radius), 
-                    int(center_y - radius), 
-                    int(center_x + radius), 
-                    int(center_y + radius)
-                ),
-                'confidence': 0.7
-            })
-    
-    # Simulate cricket stumps detection
-    # In a real model, this would be more accurate
-    # For this example, we'll look for vertical lines in the lower part of the image
-    edges = cv2.Canny(gray, 50, 150)
-    lines = cv2.HoughLinesP(edges, 1, np.pi/180, threshold=100, minLineLength=100, maxLineGap=10)
-    
-    if lines is not None:
-        for line in lines:
-            x1, y1, x2, y2 = line[0]
-            # Check if line is vertical (stumps are vertical)
-            if abs(x2 - x1) < 20 and abs(y2 - y1) > 100 and y2 > height * 0.6:
-                # This could be a stump
-                detected_objects.append({
-                    'class': 'stumps',
-                    'bbox': (x1 - 10, y1, x2 + 10, y2),
-                    'confidence': 0.6
-                })
-    
-    return detected_objects
+    def add(class_id, frame_boxes, frame_index):
+        class_ids.append(np.full(len(frame_boxes), class_id))
+        boxes.append(frame_boxes)
+        frame_indices.append(np.full(len(frame_boxes), frame_index))
+    
+    for i in range(n):
+        # Players: tall contours with a minimum size. A contour's area never
+        # exceeds its bounding box, so the shape checks run first on all
+        # boxes at once and contourArea only on what is left
+        contours = cv2.findContours(thresh[i], cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)[0] if find_players else ()
+        if contours:
+            min_area = 500 * ps * ps
+            rects = np.array([cv2.boundingRect(contour) for contour in contours]).reshape(-1, 4)
+            w, h = rects[:, 2], rects[:, 3]
+            candidates = np.flatnonzero((h > w) & (h > 100 * ps) & (w * h > min_area))
+            keep = [c for c in candidates if cv2.contourArea(contours[c]) > min_area]
+            if keep:
+                x, y, w, h = rects[keep].T
+                add(PLAYER, _to_frame_coords(np.stack([x, y, x + w, y + h], axis=1), px, py, ps), i)
+        
+        # Ball: small circular objects
+        circles = None
+        if find_ball and bs == 1.0:
+            # Found in region pixels, offset to the frame below
+            circles, ball_x, ball_y = _find_circles(balls[i]), bx, by
+        elif find_ball:
+            # Coarse to fine: a permissive search on the pyramid level (few
+            # accumulator votes needed) finds candidates, which are then
+            # confirmed with the normal search at full resolution, already
+            # in frame pixels
+            candidates = _find_circles(balls[i], bs, param2=12)
+            circles, ball_x, ball_y = _refine_circles(gray[i], candidates, bs, bx, by), 0, 0
+        if circles is not None:
+            cx, cy, r = np.around(circles.reshape(-1, 3)).astype(np.int32).T
+            add(BALL, _to_frame_coords(np.stack([cx - r, cy - r, cx + r, cy + r], axis=1), ball_x, ball_y, 1.0), i)
+        
+        # Stumps: long vertical lines in the lower part of the image
+        lines = None
+        if find_stumps:
+            cv2.Canny(stumps[i], 50, 150, edges=edges[i])
+            lines = cv2.HoughLinesP(edges[i], 1, np.pi/180, threshold=int(round(100 * ss)),
+                                    minLineLength=100 * ss, maxLineGap=10 * ss)
+        if lines is not None:
+            # OpenCV 4 returns lines as (N, 1, 4), OpenCV 5 as (N, 4)
+            x1, y1, x2, y2 = _to_frame_coords(lines.reshape(-1, 4), sx, sy, ss).T
+            found = (np.abs(x2 - x1) < 20) & (np.abs(y2 - y1) > 100) & (y2 > height * 0.6)
+            if found.any():
+                add(STUMPS, np.stack([x1 - 10, y1, x2 + 10, y2], axis=1)[found], i)
+    
+    return _concat_detections(class_ids, boxes, frame_indices)
+
+def detect_objects_batch(frames, profile='full', backend=None):
+    """
+    Detect cricket-related objects in a stack of frames.
+    
+    Args:
+        frames (numpy.ndarray): Frames as an (N, H, W, 3) BGR array
+        profile (str or dict): Detection profile (see DETECTION_PROFILES)
+        backend (str): Detector backend name (see detector_backends);
+            defaults to the DETECTOR_BACKEND setting
+        
+    Returns:
+        dict: Columnar detections with 'class_id' (N,), 'bbox' (N, 4) as
+            x1, y1, x2, y2, 'confidence' (N,) and 'frame_index' (N,)
+    """
+    from .detector_backends import get_detector
+    
+    return get_detector(backend).detect_batch(frames, profile)
+
+def detections_to_objects(detections):
+    """
+    Convert columnar detections to the list-of-dicts form of detect_objects.
+    
+    Args:
+        detections (dict): Output of detect_objects_batch
+        
+    Returns:
+        list: Detected objects with 'class', 'bbox' and 'confidence'
+    """
+    return [
+        {'class': DETECTION_CLASSES[class_id], 'bbox': tuple(bbox), 'confidence': confidence}
+        for class_id, bbox, confidence in zip(
+            detections['class_id'].tolist(),
+            detections['bbox'].tolist(),
+            detections['confidence'].tolist()
+        )
+    ]
+
+def detect_objects(frame, profile='full'):
+    """
+    Detect cricket-related objects in a frame using a pre-trained model.
+    
+    Args:
+        frame (numpy.ndarray): Input frame
+        profile (str or dict): Detection profile (see DETECTION_PROFILES)
+        
+    Returns:
+        list: Detected objects with bounding boxes and classes
+    """
+    return detections_to_objects(detect_objects_batch(frame[np.newaxis], profile))
@@ -0,0 +1,218 @@
+import logging
+import os
+import subprocess
+import tempfile
+from functools import lru_cache
+
+import cv2
+import numpy as np
+
+from .ffmpeg_decoder import FFMPEG_AVAILABLE, FFMPEG_BINARY
+from .pose_estimation import draw_pose
+
+logger = logging.getLogger(__name__)
+
+# BGR colours of the detection boxes by class
+CLASS_COLORS = {
+    'player': (255, 128, 0),
+    'ball': (0, 0, 255),
+    'stumps': (0, 255, 255)
+}
+DEFAULT_COLOR = (200, 200, 200)
+
+# Seconds an event banner stays on screen
+BANNER_SECONDS = 2.0
+
+# The processed video is H.264 in yuv420p with the index at the front, so
+# browsers can play it while it downloads. ffmpeg's libx264 is preferred;
+# OpenCV builds that ship an H.264 encoder can write 'avc1' instead
+X264_PRESET = os.environ.get('X264_PRESET', 'veryfast')
+X264_CRF = int(os.environ.get('X264_CRF', 23))
+FOURCC = 'avc1'
+
+@lru_cache(maxsize=None)
+def h264_encoder():
+    """
+    Find an H.264 encoder for the processed video.
+    
+    Returns:
+        str: 'libx264' (ffmpeg), 'avc1' (OpenCV), or None if neither works
+    """
+    if FFMPEG_AVAILABLE:
+        result = subprocess.run([FFMPEG_BINARY, '-hide_banner', '-encoders'], capture_output=True, text=True)
+        if ' libx264 ' in result.stdout:
+            return 'libx264'
+    
+    # OpenCV only reports whether the codec opens once a writer is created
+    with tempfile.TemporaryDirectory() as tmp:
+        writer = cv2.VideoWriter(os.path.join(tmp, 'probe.mp4'), cv2.VideoWriter_fourcc(*FOURCC), 25, (64, 64))
+        opened = writer.isOpened()
+        writer.release()
+    if opened:
+        return FOURCC
+    
+    logger.warning("No H.264 encoder found (ffmpeg with libx264 or OpenCV with avc1)")
+    return None
+
+class FFmpegWriter:
+    """
+    H.264 MP4 writer that pipes raw BGR frames into ffmpeg.
+    
+    Has the write/release interface of cv2.VideoWriter.
+    """
+    
+    def __init__(self, output_path, fps, size):
+        width, height = size
+        command = [FFMPEG_BINARY, '-nostdin', '-hide_banner', '-loglevel', 'error', '-y',
+                   '-f', 'rawvideo', '-pix_fmt', 'bgr24', '-s', f"{width}x{height}", '-r', f"{fps:.6f}",
+                   '-i', 'pipe:0', '-an']
+        if width % 2 or height % 2:
+            # yuv420p needs even dimensions
+            command += ['-vf', 'pad=ceil(iw/2)*2:ceil(ih/2)*2']
+        command += ['-c:v', 'libx264', '-preset', X264_PRESET, '-crf', str(X264_CRF),
+                    '-pix_fmt', 'yuv420p', '-movflags', '+faststart', str(output_path)]
+        
+        logger.debug(f"Starting encoder: {' '.join(command)}")
+        self._process = subprocess.Popen(command, stdin=subprocess.PIPE, stderr=subprocess.PIPE)
+    
+    def write(self, frame):
+        try:
+            self._process.stdin.write(memoryview(np.ascontiguousarray(frame)).cast('B'))
+        except BrokenPipeError:
+            self.release()
+            raise IOError("ffmpeg encoder exited early")
+    
+    def release(self):
+        if self._process.stdin.closed:
+            return
+        try:
+            self._process.stdin.close()
+        except BrokenPipeError:
+            pass
+        stderr = self._process.stderr.read()
+        if self._process.wait() != 0:
+            raise IOError(f"ffmpeg encoder failed: {stderr.decode(errors='replace').strip()}")
+
+class OverlayRenderer:
+    """
+    Draw analysis results onto decoded frames and encode them as H.264.
+    
+    Frames are annotated in place and handed straight to the encoder
+    (see h264_encoder), so the processed video is written during the same
+    decode pass as the analysis. Frames that can't be drawn on (read-only
+    views) are copied into a single buffer reused across frames.
+    
+    The video is written at size, normally the source size. Frames the
+    decoder scaled down (DECODE_WIDTH) are resized back up before drawing,
+    and the detections scaled with them, so the overlay stays sharp even
+    though the picture itself comes from the smaller frames. Without a
+    size (or an unknown one) the first frame's size is used.
+    """
+    
+    def __init__(self, output_path, fps, size=None, banner_seconds=BANNER_SECONDS):
+        self.output_path = str(output_path)
+        self.fps = fps
+        self.size = tuple(size) if size and min(size) > 0 else None
+        self.banner_seconds = banner_seconds
+        self.frames_written = 0
+        self.start_time = None
+        self._writer = None
+        self._buffer = None
+        self._banner = None
+    
+    def _open(self, frame):
+        height, width = frame.shape[:2]
+        encoder = h264_encoder()
+        if encoder == 'libx264':
+            self._writer = FFmpegWriter(self.output_path, self.fps, (width, height))
+            return
+        
+        writer = cv2.VideoWriter(self.output_path, cv2.VideoWriter_fourcc(*FOURCC), self.fps, (width, height))
+        if encoder is None or not writer.isOpened():
+            raise IOError(f"Could not open an H.264 video writer: {self.output_path}")
+        self._writer = writer
+    
+    def _frame_buffer(self, shape):
+        if self._buffer is None or self._buffer.shape != shape:
+            self._buffer = np.empty(shape, dtype=np.uint8)
+        return self._buffer
+    
+    def render(self, frame, timestamp, objects, poses, events=(), ball_trail=()):
+        """
+        Annotate a frame and append it to the output video.
+        
+        Args:
+            frame (numpy.ndarray): Decoded frame; drawn on in place if writable
+                and already at the output size
+            timestamp (float): Time of the frame in seconds
+            objects (list): Detected objects, with track ids if tracked
+            poses (list): Estimated poses
+            events (list): Events detected in this frame
+            ball_trail (iterable): Recent ball positions, oldest first
+        """
+        scale = 1.0
+        if self.size is not None and (frame.shape[1], frame.shape[0]) != self.size:
+            scale = self.size[0] / frame.shape[1]
+            buffer = self._frame_buffer((self.size[1], self.size[0], 3))
+            cv2.resize(frame, self.size, dst=buffer, interpolation=cv2.INTER_LINEAR)
+            frame = buffer
+        elif not frame.flags.writeable:
+            buffer = self._frame_buffer(frame.shape)
+            np.copyto(buffer, frame)
+            frame = buffer
+        
+        if self._writer is None:
+            self._open(frame)
+            self.start_time = timestamp
+        
+        for obj in objects:
+            self._draw_object(frame, obj, scale)
+        
+        for pose in poses:
+            if scale != 1.0:
+                pose = {'keypoints': {name: (x * scale, y * scale, conf)
+                                      for name, (x, y, conf) in pose['keypoints'].items()}}
+            draw_pose(frame, pose)
+        
+        points = [tuple(int(v * scale) for v in entry['position']) for entry in ball_trail]
+        if len(points) > 1:
+            cv2.polylines(frame, [np.array(points, dtype=np.int32)], False, CLASS_COLORS['ball'], 2)
+        
+        if events:
+            self._banner = (events[-1], timestamp)
+        if self._banner is not None and timestamp - self._banner[1] <= self.banner_seconds:
+            self._draw_banner(frame, self._banner[0])
+        
+        self._writer.write(frame)
+        self.frames_written += 1
+    
+    def _draw_object(self, frame, obj, scale=1.0):
+        x1, y1, x2, y2 = (int(v * scale) for v in obj['bbox'])
+        color = CLASS_COLORS.get(obj['class'], DEFAULT_COLOR)
+        cv2.rectangle(frame, (x1, y1), (x2, y2), color, 2)
+        
+        label = obj['class']
+        if obj.get('track_id') is not None:
+            label = f"{label} #{obj['track_id']}"
+        cv2.putText(frame, label, (x1, max(y1 - 5, 10)), cv2.FONT_HERSHEY_SIMPLEX, 0.5, color, 1, cv2.LINE_AA)
+    
+    def _draw_banner(self, frame, event):
+        text = event['type'].replace('_', ' ').upper()
+        if event.get('subtype'):
+            text = f"{text}: {event['subtype'].replace('_', ' ')}"
+        
+        (text_width, text_height), baseline = cv2.getTextSize(text, cv2.FONT_HERSHEY_SIMPLEX, 1.0, 2)
+        cv2.rectangle(frame, (10, 10), (30 + text_width, 30 + text_height + baseline), (0, 0, 0), -1)
+        cv2.putText(frame, text, (20, 20 + text_height), cv2.FONT_HERSHEY_SIMPLEX, 1.0, (255, 255, 255), 2, cv2.LINE_AA)
+    
+    def close(self):
+        """Finish the output video."""
+        if self._writer is not None:
+            self._writer.release()
+            self._writer = None
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc):
+        self.close()
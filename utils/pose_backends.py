@@ -0,0 +1,257 @@
+import logging
+import os
+import threading
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+from .detector_backends import ONNXRUNTIME_AVAILABLE, OnnxRuntimeModel, OpenCVDnnModel
+from .pose_estimation import CRICKET_POSE_KEYPOINTS, SIMULATED_POSE
+
+logger = logging.getLogger(__name__)
+
+POSE_BACKEND = os.environ.get('POSE_BACKEND', 'simulated')  # simulated, onnxruntime or opencv
+POSE_WEIGHTS = Path(os.environ.get('POSE_WEIGHTS', './models/pose.onnx'))
+POSE_THREADS = int(os.environ.get('POSE_THREADS', 0))  # 0 lets the runtime decide
+POSE_INPUT_WIDTH = int(os.environ.get('POSE_INPUT_WIDTH', 192))
+POSE_INPUT_HEIGHT = int(os.environ.get('POSE_INPUT_HEIGHT', 256))
+
+# Player boxes are grown by this factor before cropping so limbs that
+# stick out of the detection (bat swing, follow-through) stay in view
+CROP_PADDING = 1.25
+
+# ImageNet normalisation used by the usual top-down pose models
+PIXEL_MEAN = np.array([0.485, 0.456, 0.406], dtype=np.float32) * 255
+PIXEL_STD = np.array([0.229, 0.224, 0.225], dtype=np.float32) * 255
+
+# COCO-17 keypoint row for each CRICKET_POSE_KEYPOINTS entry; the neck has
+# no COCO keypoint and is the midpoint of the shoulders
+COCO_KEYPOINTS = [
+    "nose", "left_eye", "right_eye", "left_ear", "right_ear",
+    "left_shoulder", "right_shoulder", "left_elbow", "right_elbow",
+    "left_wrist", "right_wrist", "left_hip", "right_hip",
+    "left_knee", "right_knee", "left_ankle", "right_ankle"
+]
+COCO_ROWS = np.array([COCO_KEYPOINTS.index(name) if name in COCO_KEYPOINTS else 0
+                      for name in CRICKET_POSE_KEYPOINTS])
+NECK = CRICKET_POSE_KEYPOINTS.index("neck")
+SHOULDERS = [COCO_KEYPOINTS.index("left_shoulder"), COCO_KEYPOINTS.index("right_shoulder")]
+
+def coco_to_cricket(keypoints):
+    """
+    Map COCO-17 keypoints to the CRICKET_POSE_KEYPOINTS layout.
+    
+    Args:
+        keypoints (numpy.ndarray): (N, 17, 3) x, y, confidence
+    
+    Returns:
+        numpy.ndarray: (N, 14, 3) keypoints
+    """
+    cricket = keypoints[:, COCO_ROWS].copy()
+    shoulders = keypoints[:, SHOULDERS]
+    cricket[:, NECK, :2] = shoulders[:, :, :2].mean(axis=1)
+    cricket[:, NECK, 2] = shoulders[:, :, 2].min(axis=1)
+    return cricket
+
+def crop_boxes(bboxes, aspect):
+    """
+    Grow player boxes to the model's aspect ratio around their centres.
+    
+    Args:
+        bboxes (numpy.ndarray): (N, 4) boxes as x1, y1, x2, y2
+        aspect (float): Model input width / height
+    
+    Returns:
+        numpy.ndarray: (N, 4) crop boxes as x, y, w, h (may extend past the frame)
+    """
+    bboxes = np.asarray(bboxes, dtype=np.float64).reshape(-1, 4)
+    center = (bboxes[:, :2] + bboxes[:, 2:]) / 2
+    size = np.abs(bboxes[:, 2:] - bboxes[:, :2]) * CROP_PADDING
+    
+    # Widen or heighten each box, never shrink it, to match the aspect ratio
+    size[:, 0] = np.maximum(size[:, 0], size[:, 1] * aspect)
+    size[:, 1] = np.maximum(size[:, 1], size[:, 0] / aspect)
+    size = np.maximum(size, 1.0)
+    
+    return np.concatenate([center - size / 2, size], axis=1)
+
+class PoseBackend:
+    """
+    Interface of a pose estimator that works on player crops.
+    
+    Backends are created once per process by get_pose_backend and shared
+    by every job thread, so estimate_batch must be thread-safe.
+    """
+    
+    name = None
+    
+    def estimate_batch(self, image, bboxes):
+        """
+        Estimate one pose per player box.
+        
+        Args:
+            image (numpy.ndarray): BGR frame
+            bboxes (numpy.ndarray): (N, 4) player boxes as x1, y1, x2, y2
+        
+        Returns:
+            numpy.ndarray: (N, 14, 3) keypoints in frame pixels, in
+                CRICKET_POSE_KEYPOINTS order
+        """
+        raise NotImplementedError
+    
+    @property
+    def cache_tag(self):
+        """Identifies what this backend would estimate, for result caching"""
+        return self.name
+
+class SimulatedPoseBackend(PoseBackend):
+    """The template batsman skeleton with noise, fitted into each player box"""
+    
+    name = 'simulated'
+    
+    def estimate_batch(self, image, bboxes):
+        bboxes = np.asarray(bboxes, dtype=np.float64).reshape(-1, 4)
+        origin = np.minimum(bboxes[:, :2], bboxes[:, 2:])[:, None, :]
+        size = np.abs(bboxes[:, 2:] - bboxes[:, :2])[:, None, :]
+        
+        keypoints = np.repeat(SIMULATED_POSE[None], len(bboxes), axis=0)
+        keypoints[:, :, :2] = origin + keypoints[:, :, :2] * size
+        
+        # Same 5% jitter as estimate_poses, relative to the player box
+        keypoints[:, :, :2] += np.random.normal(0, 1, keypoints[:, :, :2].shape) * size * 0.05
+        np.clip(keypoints[:, :, :2], origin, origin + size, out=keypoints[:, :, :2])
+        
+        return keypoints
+
+class HeatmapPoseBackend(PoseBackend):
+    """
+    Top-down COCO-17 heatmap model (SimpleBaseline, HRNet and the like).
+    
+    Each player box is grown to the model's aspect ratio, cropped and
+    resized with one affine warp into a reused batch buffer, and all the
+    crops of a frame go through the model in a single call. Heatmap peaks
+    are decoded for every crop at once and mapped back to frame pixels.
+    
+    The crop buffer is kept per thread, since job threads share the
+    backend. Subclasses pick the runtime with model_class.
+    """
+    
+    model_class = None
+    
+    def __init__(self, weights_path, input_width=POSE_INPUT_WIDTH, input_height=POSE_INPUT_HEIGHT,
+                 threads=POSE_THREADS):
+        self.weights_path = weights_path
+        self.input_width = input_width
+        self.input_height = input_height
+        self.threads = threads
+        self.model = self.model_class(weights_path, threads) if self.model_class else None
+        self._local = threading.local()
+    
+    @property
+    def cache_tag(self):
+        stat = os.stat(self.weights_path)
+        return f"{self.name}:{os.path.basename(self.weights_path)}:{stat.st_size}"
+    
+    def _run(self, blob):
+        """Run the model on an (N, 3, H, W) float32 blob, returning (N, 17, h, w) heatmaps."""
+        return self.model.run_batched(blob)
+    
+    def estimate_batch(self, image, bboxes):
+        crops = crop_boxes(bboxes, self.input_width / self.input_height)
+        n = len(crops)
+        if n == 0:
+            return np.empty((0, len(CRICKET_POSE_KEYPOINTS), 3))
+        
+        buffer = getattr(self._local, 'buffer', None)
+        if buffer is None or len(buffer) < n:
+            buffer = self._local.buffer = np.empty((n, self.input_height, self.input_width, 3), dtype=np.uint8)
+        batch = buffer[:n]
+        
+        scales = crops[:, 2:] / (self.input_width, self.input_height)
+        for i, (x, y, w, h) in enumerate(crops.tolist()):
+            # Crop and resize in one warp; areas outside the frame come out black
+            sx, sy = scales[i]
+            matrix = np.array([[1 / sx, 0, -x / sx], [0, 1 / sy, -y / sy]])
+            cv2.warpAffine(image, matrix, (self.input_width, self.input_height), dst=batch[i],
+                           flags=cv2.INTER_LINEAR, borderMode=cv2.BORDER_CONSTANT)
+        
+        blob = ((batch[..., ::-1] - PIXEL_MEAN) / PIXEL_STD).astype(np.float32).transpose(0, 3, 1, 2)
+        heatmaps = self._run(np.ascontiguousarray(blob))
+        
+        # Peak of every heatmap at once
+        _, joints, map_h, map_w = heatmaps.shape
+        flat = heatmaps.reshape(n, joints, -1)
+        peak = flat.argmax(axis=2)
+        confidence = np.take_along_axis(flat, peak[..., None], axis=2)[..., 0]
+        
+        # Heatmap cell centres -> crop input pixels -> frame pixels
+        xy = np.stack([peak % map_w, peak // map_w], axis=2) + 0.5
+        xy *= (self.input_width / map_w, self.input_height / map_h)
+        xy = crops[:, None, :2] + xy * scales[:, None, :]
+        
+        return coco_to_cricket(np.concatenate([xy, confidence[..., None]], axis=2))
+
+class OnnxRuntimePoseBackend(HeatmapPoseBackend):
+    """Pose model on the ONNX Runtime CPU execution provider"""
+    
+    name = 'onnxruntime'
+    model_class = OnnxRuntimeModel
+
+class OpenCVDnnPoseBackend(HeatmapPoseBackend):
+    """Pose model on OpenCV's DNN module (no extra dependencies)"""
+    
+    name = 'opencv'
+    model_class = OpenCVDnnModel
+
+POSE_BACKENDS = {
+    'simulated': SimulatedPoseBackend,
+    'onnxruntime': OnnxRuntimePoseBackend,
+    'opencv': OpenCVDnnPoseBackend
+}
+
+_backends = {}
+_backends_lock = threading.Lock()
+
+def _create_pose_backend(name):
+    if name not in POSE_BACKENDS:
+        raise ValueError(f"Unknown pose backend: {name}")
+    
+    if name == 'simulated':
+        return SimulatedPoseBackend()
+    
+    if name == 'onnxruntime' and not ONNXRUNTIME_AVAILABLE:
+        logger.warning("onnxruntime is not installed, using the simulated pose backend")
+        return SimulatedPoseBackend()
+    
+    if not POSE_WEIGHTS.exists():
+        logger.warning(f"Pose weights not found at {POSE_WEIGHTS}, using the simulated pose backend")
+        return SimulatedPoseBackend()
+    
+    logger.info(f"Loading {name} pose backend from {POSE_WEIGHTS}")
+    return POSE_BACKENDS[name](POSE_WEIGHTS)
+
+def get_pose_backend(name=None):
+    """
+    Get the shared pose backend, loading it on first use.
+    
+    Each process loads a backend once; later calls (from any thread) get
+    the same instance. Backends that cannot load (missing package or
+    weights) are replaced by the simulated one.
+    
+    Args:
+        name (str): Backend name; defaults to POSE_BACKEND
+    
+    Returns:
+        PoseBackend: The pose backend
+    """
+    name = name or POSE_BACKEND
+    
+    backend = _backends.get(name)
+    if backend is None:
+        with _backends_lock:
+            backend = _backends.get(name)
+            if backend is None:
+                backend = _backends[name] = _create_pose_backend(name)
+    
+    return backend
@@ -15,13 +15,62 @@ CRICKET_POSE_KEYPOINTS = [
     "left_hip", "left_knee", "left_ankle"
 ]
 
+# Limbs drawn between keypoints by draw_pose
+POSE_CONNECTIONS = [
+    ("nose", "neck"),
+    ("neck", "right_shoulder"),
+    ("neck", "left_shoulder"),
+    ("right_shoulder", "right_elbow"),
+    ("right_elbow", "right_wrist"),
+    ("left_shoulder", "left_elbow"),
+    ("left_elbow", "left_wrist"),
+    ("neck", "right_hip"),
+    ("neck", "left_hip"),
+    ("right_hip", "right_knee"),
+    ("right_knee", "right_ankle"),
+    ("left_hip", "left_knee"),
+    ("left_knee", "left_ankle"),
+]
+
+# Keypoint name -> row in a (14, 3) keypoint array
+KEYPOINT_INDEX = {name: i for i, name in enumerate(CRICKET_POSE_KEYPOINTS)}
+
+# Simulated batsman pose as (x, y) fractions of the image size and confidence,
+# in CRICKET_POSE_KEYPOINTS order
+SIMULATED_POSE = np.array([
+    (0.5, 0.2, 0.9), (0.5, 0.25, 0.9),
+    (0.55, 0.3, 0.8), (0.6, 0.4, 0.8), (0.65, 0.5, 0.7),
+    (0.45, 0.3, 0.8), (0.4, 0.4, 0.8), (0.35, 0.5, 0.7),
+    (0.55, 0.6, 0.7), (0.55, 0.75, 0.6), (0.55, 0.9, 0.6),
+    (0.45, 0.6, 0.7), (0.45, 0.75, 0.6), (0.45, 0.9, 0.6)
+])
+
+# Joint angles as (first, vertex, last) keypoint rows
+ANGLE_JOINTS = {
+    'right_elbow_angle': ('right_shoulder', 'right_elbow', 'right_wrist'),
+    'left_elbow_angle': ('left_shoulder', 'left_elbow', 'left_wrist'),
+    'right_knee_angle': ('right_hip', 'right_knee', 'right_ankle'),
+    'left_knee_angle': ('left_hip', 'left_knee', 'left_ankle')
+}
+ANGLE_ROWS = np.array([[KEYPOINT_INDEX[name] for name in joints] for joints in ANGLE_JOINTS.values()])
+
+# Keypoints given relative to the neck (the body centre)
+RELATIVE_KEYPOINTS = [name for name in CRICKET_POSE_KEYPOINTS if name != 'neck']
+RELATIVE_ROWS = np.array([KEYPOINT_INDEX[name] for name in RELATIVE_KEYPOINTS])
+
+# Column order of pose_features_batch output
+FEATURE_NAMES = list(ANGLE_JOINTS) + [
+    f"{name}_{axis}_rel" for name in RELATIVE_KEYPOINTS for axis in ('x', 'y')
+]
+FEATURE_INDEX = {name: i for i, name in enumerate(FEATURE_NAMES)}
+
 def estimate_poses(image):
     """
     Estimate human poses in the given image.
     
     Args:
         image (numpy.ndarray): Input image containing people
-        
+    
     Returns:
         list: Detected poses with keypoints
     """
@@ -33,42 +82,81 @@ def estimate_poses(image):
     
     # Simulate a cricket batsman pose
     # In a real implementation, we would use MediaPipe or TensorFlow for accurate pose estimation
+    keypoints = SIMULATED_POSE.copy()
+    keypoints[:, :2] *= (width, height)
+    
+    # Apply some random variation to make the poses differ between frames,
+    # within 5% of the image dimensions and clipped to the image bounds
+    # This is just for simulation purposes
+    keypoints[:, :2] += np.random.normal(0, (width * 0.05, height * 0.05), (len(keypoints), 2))
+    np.clip(keypoints[:, :2], 0, (width, height), out=keypoints[:, :2])
+    
+    return array_to_pose(keypoints, (0, 0, width, height))
+
+def estimate_player_poses(image, objects, backend=None):
+    """
+    Estimate the pose of every detected player.
+    
+    The pose backend only sees the player crops, all of a frame's crops
+    in one batch, which is far cheaper than running it on the full frame.
+    
+    Args:
+        image (numpy.ndarray): Input frame
+        objects (list): Detected objects in the frame (see detect_objects)
+        backend (str): Pose backend name (see pose_backends); defaults to
+            the POSE_BACKEND setting
+        
+    Returns:
+        list: One pose per player, in the order of the players in objects
+    """
+    from .pose_backends import get_pose_backend
+    
+    bboxes = [obj['bbox'] for obj in objects if obj['class'] == 'player']
+    if not bboxes:
+        return []
+    
+    keypoints = get_pose_backend(backend).estimate_batch(image, np.array(bboxes))
+    return [array_to_pose(points, bbox) for points, bbox in zip(keypoints, bboxes)]
+
+def array_to_pose(keypoints, bbox):
+    """
+    Convert a (14, 3) keypoint array into a pose dict.
+    
+    Args:
+        keypoints (numpy.ndarray): Keypoints in CRICKET_POSE_KEYPOINTS order
+        bbox (tuple): Pose bounding box
     
-    # Create a simulated pose based on image dimensions
-    # This is just a placeholder - real pose estimation would be much more accurate
-    pose = {
-        'keypoints': {
-            'nose': (width * 0.5, height * 0.2, 0.9),  # x, y, confidence
-            'neck': (width * 0.5, height * 0.25, 0.9),
-            'right_shoulder': (width * 0.55, height * 0.3, 0.8),
-            'right_elbow': (width * 0.6, height * 0.4, 0.8),
-            'right_wrist': (width * 0.65, height * 0.5, 0.7),
-            'left_shoulder': (width * 0.45, height * 0.3, 0.8),
-            'left_elbow': (width * 0.4, height * 0.4, 0.8),
-            'left_wrist': (width * 0.35, height * 0.5, 0.7),
-            'right_hip': (width * 0.55, height * 0.6, 0.7),
-            'right_knee': (width * 0.55, height * 0.75, 0.6),
-            'right_ankle': (width * 0.55, height * 0.9, 0.6),
-            'left_hip': (width * 0.45, height * 0.6, 0.7),
-            'left_knee': (width * 0.45, height * 0.75, 0.6),
-            'left_ankle': (width * 0.45, height * 0.9, 0.6)
-        },
-        'bbox': (0, 0, width, height)
+    Returns:
+        dict: Pose with named keypoints
+    """
+    return {
+        'keypoints': {name: tuple(point) for name, point in zip(CRICKET_POSE_KEYPOINTS, keypoints.tolist())},
+        'bbox': bbox
     }
+
+def poses_to_array(poses):
+    """
+    Stack pose dicts into one keypoint array.
     
-    # Apply some random variation to make the poses differ between frames
-    # This is just for simulation purposes
-    for keypoint in pose['keypoints']:
-        x, y, conf = pose['keypoints'][keypoint]
-        # Add slight random variation within 5% of image dimensions
-        x_var = x + np.random.normal(0, width * 0.05)
-        y_var = y + np.random.normal(0, height * 0.05)
-        # Ensure points stay within image bounds
-        x_var = max(0, min(width, x_var))
-        y_var = max(0, min(height, y_var))
-        pose['keypoints'][keypoint] = (x_var, y_var, conf)
-    
-    return pose
+    Missing keypoints are NaN with zero confidence.
+    
+    Args:
+        poses (list): Poses with named keypoints
+    
+    Returns:
+        numpy.ndarray: (N, 14, 3) array of x, y, confidence in
+            CRICKET_POSE_KEYPOINTS order
+    """
+    keypoints = np.full((len(poses), len(CRICKET_POSE_KEYPOINTS), 3), np.nan)
+    keypoints[:, :, 2] = 0.0
+    
+    for i, pose in enumerate(poses):
+        for name, point in pose['keypoints'].items():
+            row = KEYPOINT_INDEX.get(name)
+            if row is not None:
+                keypoints[i, row] = point[:3]
+    
+    return keypoints
 
 def visualize_pose(image, pose):
     """
@@ -77,47 +165,61 @@ def visualize_pose(image, pose):
     Args:
         image (numpy.ndarray): Input image
         pose (dict): Detected pose with keypoints
-        
+    
     Returns:
         numpy.ndarray: Image with pose visualization
     """
-    # Create a copy of the image
     vis_img = image.copy()
+    draw_pose(vis_img, pose)
+    return vis_img
+
+def draw_pose(image, pose, min_confidence=0.5):
+    """
+    Draw pose keypoints and limbs onto an image in place.
+    
+    Args:
+        image (numpy.ndarray): Image to draw on
+        pose (dict): Detected pose with keypoints
+        min_confidence (float): Skip keypoints below this confidence
+    """
+    keypoints = pose['keypoints']
     
-    # Draw keypoints
-    for keypoint, (x, y, conf) in pose['keypoints'].items():
-        if conf > 0.5:  # Only draw high-confidence keypoints
-            cv2.circle(vis_img, (int(x), int(y)), 5, (0, 255, 0), -1)
-    
-    # Draw connections between keypoints
-    connections = [
-        ("nose", "neck"),
-        ("neck", "right_shoulder"),
-        ("neck", "left_shoulder"),
-        ("right_shoulder", "right_elbow"),
-        ("right_elbow", "right_wrist"),
-        ("left_shoulder", "left_elbow"),
-        ("left_elbow", "left_wrist"),
-        ("neck", "right_hip"),
-        ("neck", "left_hip"),
-        ("right_hip", "right_knee"),
-        ("right_knee", "right_ankle"),
-        ("left_hip", "left_knee"),
-        ("left_knee", "left_ankle"),
-    ]
-    
-    for start_point, end_point in connections:
-        if start_point in pose['keypoints'] and end_point in pose['keypoints']:
-            start_x, start_y, start_conf = pose['keypoints'][start_point]
-            end_x, end_y, end_conf = pose['keypoints'][end_point]
+    for x, y, conf in keypoints.values():
+        if conf > min_confidence:
+            cv2.circle(image, (int(x), int(y)), 5, (0, 255, 0), -1)
+    
+    for start_point, end_point in POSE_CONNECTIONS:
+        if start_point in keypoints and end_point in keypoints:
+            start_x, start_y, start_conf = keypoints[start_point]
+            end_x, end_y, end_conf = keypoints[end_point]
             
-            if start_conf > 0.5 and end_conf > 0.5:
-                cv2.line(vis_img, 
-                        (int(start_x), int(start_y)), 
-                        (int(end_x), int(end_y)), 
-                        (0, 255, 255), 2)
+            if start_conf > min_confidence and end_conf > min_confidence:
+                cv2.line(image, (int(start_x), int(start_y)), (int(end_x), int(end_y)), (0, 255, 255), 2)
+
+def pose_features_batch(keypoints):
+    """
+    Extract shot classification features for a batch of poses.
     
-    return vis_img
+    Args:
+        keypoints (numpy.ndarray): (N, 14, 3) keypoints from poses_to_array
+    
+    Returns:
+        numpy.ndarray: (N, len(FEATURE_NAMES)) features in FEATURE_NAMES
+            order; NaN where a keypoint is missing
+    """
+    xy = keypoints[:, :, :2]
+    
+    # Angles at the elbows and knees for all poses at once
+    ba = xy[:, ANGLE_ROWS[:, 0]] - xy[:, ANGLE_ROWS[:, 1]]
+    bc = xy[:, ANGLE_ROWS[:, 2]] - xy[:, ANGLE_ROWS[:, 1]]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        cosine = np.sum(ba * bc, axis=2) / (np.linalg.norm(ba, axis=2) * np.linalg.norm(bc, axis=2))
+    angles = np.degrees(np.arccos(np.clip(cosine, -1.0, 1.0)))
+    
+    # Positions relative to the body center, interleaved as x, y per keypoint
+    relative = xy[:, RELATIVE_ROWS] - xy[:, KEYPOINT_INDEX['neck'], None]
+    
+    return np.concatenate([angles, relative.reshape(len(keypoints), -1)], axis=1)
 
 def get_pose_features(pose):
     """
@@ -125,56 +227,17 @@ def get_pose_features(pose):
     
     Args:
         pose (dict): Detected pose with keypoints
-        
+    
     Returns:
         dict: Features extracted from the pose
     """
-    features = {}
-    
-    # Extract angles between body parts
-    if all(k in pose['keypoints'] for k in ['right_shoulder', 'right_elbow', 'right_wrist']):
-        rs = pose['keypoints']['right_shoulder'][:2]
-        re = pose['keypoints']['right_elbow'][:2]
-        rw = pose['keypoints']['right_wrist'][:2]
-        
-        # Calculate angle at elbow
-        features['right_elbow_angle'] = calculate_angle(rs, re, rw)
+    features = pose_features_batch(poses_to_array([pose]))[0]
     
-    if all(k in pose['keypoints'] for k in ['left_shoulder', 'left_elbow', 'left_wrist']):
-        ls = pose['keypoints']['left_shoulder'][:2]
-        le = pose['keypoints']['left_elbow'][:2]
-        lw = pose['keypoints']['left_wrist'][:2]
-        
-        # Calculate angle at elbow
-        features['left_elbow_angle'] = calculate_angle(ls, le, lw)
-    
-    if all(k in pose['keypoints'] for k in ['right_hip', 'right_knee', 'right_ankle']):
-        rh = pose['keypoints']['right_hip'][:2]
-        rk = pose['keypoints']['right_knee'][:2]
-        ra = pose['keypoints']['right_ankle'][:2]
-        
-        # Calculate angle at knee
-        features['right_knee_angle'] = calculate_angle(rh, rk, ra)
-    
-    if all(k in pose['keypoints'] for k in ['left_hip', 'left_knee', 'left_ankle']):
-        lh = pose['keypoints']['left_hip'][:2]
-        lk = pose['keypoints']['left_knee'][:2]
-        la = pose['keypoints']['left_ankle'][:2]
-        
-        # Calculate angle at knee
-        features['left_knee_angle'] = calculate_angle(lh, lk, la)
+    # Relative positions are only meaningful with a head to measure from
+    if 'neck' not in pose['keypoints'] or 'nose' not in pose['keypoints']:
+        features[len(ANGLE_JOINTS):] = np.nan
     
-    # Calculate positions relative to the body center
-    if 'neck' in pose['keypoints'] and 'nose' in pose['keypoints']:
-        body_center = pose['keypoints']['neck'][:2]
-        
-        for keypoint, coords in pose['keypoints'].items():
-            if keypoint != 'neck':
-                x, y, _ = coords
-                features[f"{keypoint}_x_rel"] = x - body_center[0]
-                features[f"{keypoint}_y_rel"] = y - body_center[1]
-    
-    return features
+    return {name: float(value) for name, value in zip(FEATURE_NAMES, features) if not np.isnan(value)}
 
 def calculate_angle(a, b, c):
     """
@@ -184,7 +247,7 @@ def calculate_angle(a, b, c):
         a (tuple): First point (x, y)
         b (tuple): Middle point (x, y) - the angle is calculated at this point
         c (tuple): Third point (x, y)
-        
+    
     Returns:
         float: Angle in degrees
     """
@@ -0,0 +1,193 @@
+import json
+import logging
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+class ResultStore:
+    """
+    Server-side storage for processing results, keyed by video unique_id.
+    
+    A result is a dict with processed_video, commentary_audio, commentary
+    and events, and optionally video_start (where in the input the
+    processed video starts, 0 if omitted); get() adds the updated_at time
+    of the last put().
+    """
+    
+    def put(self, unique_id, results):
+        """
+        Store (or replace) the results for a video.
+        
+        Args:
+            unique_id (str): Video id
+            results (dict): Processing results
+        """
+        raise NotImplementedError
+    
+    def get(self, unique_id):
+        """
+        Fetch the results for a video.
+        
+        Args:
+            unique_id (str): Video id
+        
+        Returns:
+            dict: Processing results, or None if nothing is stored
+        """
+        raise NotImplementedError
+    
+    def get_version(self, unique_id):
+        """
+        Fetch only the updated_at time of a video's results.
+        
+        This lets callers validate caches without loading the events.
+        
+        Args:
+            unique_id (str): Video id
+        
+        Returns:
+            float: Time of the last put(), or None if nothing is stored
+        """
+        raise NotImplementedError
+
+class SQLiteResultStore(ResultStore):
+    """Result store backed by a local SQLite file (no extra dependencies)"""
+    
+    def __init__(self, path):
+        Path(path).parent.mkdir(exist_ok=True, parents=True)
+        
+        # One connection shared by request and job threads
+        self._conn = sqlite3.connect(str(path), check_same_thread=False)
+        self._lock = threading.Lock()
+        
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS analysis_results ("
+                "unique_id TEXT PRIMARY KEY, "
+                "processed_video TEXT NOT NULL, "
+                "commentary_audio TEXT NOT NULL, "
+                "commentary TEXT NOT NULL, "
+                "events TEXT NOT NULL, "
+                "updated_at REAL NOT NULL, "
+                "video_start REAL NOT NULL DEFAULT 0)"
+            )
+            
+            # Files created before video_start was stored lack the column
+            columns = {row[1] for row in self._conn.execute("PRAGMA table_info(analysis_results)")}
+            if 'video_start' not in columns:
+                self._conn.execute("ALTER TABLE analysis_results ADD COLUMN video_start REAL NOT NULL DEFAULT 0")
+    
+    def put(self, unique_id, results):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO analysis_results "
+                "(unique_id, processed_video, commentary_audio, commentary, events, updated_at, video_start) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (unique_id, results['processed_video'], results['commentary_audio'],
+                 results['commentary'], json.dumps(results['events']), time.time(),
+                 results.get('video_start', 0.0))
+            )
+    
+    def get(self, unique_id):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT processed_video, commentary_audio, commentary, events, updated_at, video_start "
+                "FROM analysis_results WHERE unique_id = ?",
+                (unique_id,)
+            ).fetchone()
+        
+        if row is None:
+            return None
+        
+        return {
+            'processed_video': row[0],
+            'commentary_audio': row[1],
+            'commentary': row[2],
+            'events': json.loads(row[3]),
+            'updated_at': row[4],
+            'video_start': row[5]
+        }
+    
+    def get_version(self, unique_id):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT updated_at FROM analysis_results WHERE unique_id = ?",
+                (unique_id,)
+            ).fetchone()
+        
+        return row[0] if row is not None else None
+
+class SQLAlchemyResultStore(ResultStore):
+    """Result store backed by Flask-SQLAlchemy (e.g. Postgres via psycopg2)"""
+    
+    def __init__(self, app):
+        from models import db
+        
+        self.app = app
+        db.init_app(app)
+        with app.app_context():
+            db.create_all()
+            
+            # create_all doesn't add columns to tables created before
+            # video_start was stored
+            columns = {column['name'] for column in db.inspect(db.engine).get_columns('analysis_results')}
+            if 'video_start' not in columns:
+                with db.engine.begin() as conn:
+                    conn.execute(db.text(
+                        "ALTER TABLE analysis_results ADD COLUMN video_start FLOAT NOT NULL DEFAULT 0"
+                    ))
+    
+    def put(self, unique_id, results):
+        from models import db, AnalysisResult
+        
+        # Jobs run outside of a request, so push an app context explicitly
+        with self.app.app_context():
+            db.session.merge(AnalysisResult(
+                unique_id=unique_id,
+                processed_video=results['processed_video'],
+                commentary_audio=results['commentary_audio'],
+                commentary=results['commentary'],
+                events=results['events'],
+                updated_at=time.time(),
+                video_start=results.get('video_start', 0.0)
+            ))
+            db.session.commit()
+    
+    def get(self, unique_id):
+        from models import db, AnalysisResult
+        
+        with self.app.app_context():
+            result = db.session.get(AnalysisResult, unique_id)
+            return result.to_dict() if result is not None else None
+    
+    def get_version(self, unique_id):
+        from models import db, AnalysisResult
+        
+        with self.app.app_context():
+            return db.session.execute(
+                db.select(AnalysisResult.updated_at).filter_by(unique_id=unique_id)
+            ).scalar_one_or_none()
+
+def create_result_store(app):
+    """
+    Create the result store configured for the app.
+    
+    SQLALCHEMY_DATABASE_URI selects the SQLAlchemy backend; otherwise
+    results go to the SQLite file at RESULT_STORE_PATH.
+    
+    Args:
+        app (Flask): Flask application
+    
+    Returns:
+        ResultStore: Configured result store
+    """
+    if app.config.get('SQLALCHEMY_DATABASE_URI'):
+        logger.info("Using SQLAlchemy result store")
+        return SQLAlchemyResultStore(app)
+    
+    logger.info(f"Using SQLite result store at {app.config['RESULT_STORE_PATH']}")
+    return SQLiteResultStore(app.config['RESULT_STORE_PATH'])
@@ -1,6 +1,7 @@
 import numpy as np
 import logging
-from .pose_estimation import get_pose_features
+from collections import OrderedDict, deque
+from .pose_estimation import FEATURE_INDEX, pose_features_batch, poses_to_array
 
 logger = logging.getLogger(__name__)
 
@@ -83,64 +84,195 @@ SHOT_RULES = {
     }
 }
 
-def classify_shot(pose, previous_poses=[]):
+POSTURES = ['upright', 'leaning_right', 'leaning_left', 'leaning_back', 'kneeling']
+
+# Shots that gain from a swing in each direction
+MOTION_SHOTS = {
+    'forward': ["straight drive", "cover drive", "on drive"],
+    'sideways': ["cut shot", "square drive"],
+    'backward': ["pull shot", "hook shot"]
+}
+MOTION_DIRECTIONS = list(MOTION_SHOTS)
+NO_SWING = len(MOTION_DIRECTIONS)
+
+# A shot is only reported with at least this score
+MIN_SHOT_SCORE = 2
+
+def compile_shot_rules(rules):
+    """
+    Compile shot rules into arrays for classify_shots.
+    
+    Args:
+        rules (dict): Rules in the SHOT_RULES format
+    
+    Returns:
+        dict: Shot names, feature columns, (shots x features) min and max
+            bounds (NaN where a shot has no bound), and posture and motion
+            bonus tables indexed by shot then POSTURES / MOTION_DIRECTIONS
+            (the last motion column is "no swing")
+    """
+    shot_names = list(rules)
+    features = sorted({key for rule in rules.values() for key in rule if key in FEATURE_INDEX},
+                      key=FEATURE_INDEX.get)
+    
+    lower = np.full((len(shot_names), len(features)), np.nan)
+    upper = np.full((len(shot_names), len(features)), np.nan)
+    posture_bonus = np.zeros((len(shot_names), len(POSTURES)))
+    motion_bonus = np.zeros((len(shot_names), len(MOTION_DIRECTIONS) + 1))
+    
+    for i, (shot_name, rule) in enumerate(rules.items()):
+        for j, feature in enumerate(features):
+            if feature in rule:
+                lower[i, j], upper[i, j] = rule[feature]
+        if "posture" in rule:
+            posture_bonus[i, POSTURES.index(rule["posture"])] = 2
+        for k, direction in enumerate(MOTION_DIRECTIONS):
+            if shot_name in MOTION_SHOTS[direction]:
+                motion_bonus[i, k] = 2
+    
+    return {
+        'shot_names': shot_names,
+        'columns': np.array([FEATURE_INDEX[feature] for feature in features]),
+        'lower': lower,
+        'upper': upper,
+        'posture_bonus': posture_bonus,
+        'motion_bonus': motion_bonus
+    }
+
+COMPILED_RULES = compile_shot_rules(SHOT_RULES)
+
+def classify_shots(features, postures=None, motions=None, top_k=1, rules=COMPILED_RULES):
+    """
+    Score every shot for a batch of poses in one pass.
+    
+    Args:
+        features (numpy.ndarray): (N, len(FEATURE_NAMES)) pose features
+            from pose_features_batch
+        postures (numpy.ndarray): (N,) indexes into POSTURES; derived from
+            the features when omitted
+        motions (numpy.ndarray): (N,) indexes into MOTION_DIRECTIONS, or
+            NO_SWING; no motion bonus when omitted
+        top_k (int): Number of best shots to return per pose
+        rules (dict): Rules from compile_shot_rules
+    
+    Returns:
+        tuple: (shot_ids, scores), both (N, top_k) and best first; shot_ids
+            index rules['shot_names'], ties go to the earlier rule
+    """
+    if postures is None:
+        postures = determine_postures(features)
+    
+    # Each bound a feature falls within scores a point; NaN never matches
+    values = features[:, None, rules['columns']]
+    scores = np.count_nonzero((values >= rules['lower']) & (values <= rules['upper']), axis=2).astype(np.float64)
+    
+    scores += rules['posture_bonus'].T[postures]
+    if motions is not None:
+        scores += rules['motion_bonus'].T[motions]
+    
+    shot_ids = np.argsort(-scores, axis=1, kind='stable')[:, :top_k]
+    return shot_ids, np.take_along_axis(scores, shot_ids, axis=1)
+
+def classify_shot(pose, previous_poses=None, motion_estimator=None):
     """
     Classify the cricket shot based on the player's pose.
     
     Args:
         pose (dict): Current pose with keypoints
         previous_poses (list): Previous poses for tracking movement
-        
+        motion_estimator (MotionEstimator): Streaming motion state for this
+            player; updated with the pose and used instead of previous_poses
+    
     Returns:
         str: Classified cricket shot or None if no shot detected
     """
     # Extract features from the pose
-    features = get_pose_features(pose)
-    
-    # Determine posture based on features
-    posture = determine_posture(features)
+    features = pose_features_batch(poses_to_array([pose]))
     
     # Calculate motion if previous poses are available
-    motion = calculate_motion(pose, previous_poses) if previous_poses else None
+    motion = None
+    if motion_estimator is not None:
+        motion = motion_estimator.update(pose)
+    elif previous_poses:
+        motion = calculate_motion(pose, previous_poses)
     
-    # Simple rule-based classification for demonstration
-    # In a real implementation, this would use a trained ML model
+    motions = np.array([motion_index(motion)]) if motion is not None else None
+    shot_ids, scores = classify_shots(features, motions=motions)
     
-    shot_scores = {}
+    # Only return a shot if the score is above a threshold
+    if scores[0, 0] >= MIN_SHOT_SCORE:
+        return COMPILED_RULES['shot_names'][shot_ids[0, 0]]
     
-    for shot_name, shot_rules in SHOT_RULES.items():
-        score = 0
-        
-        # Check angle conditions
-        for angle_name, (min_angle, max_angle) in shot_rules.items():
-            if angle_name in features and min_angle <= features[angle_name] <= max_angle:
-                score += 1
-        
-        # Check posture
-        if "posture" in shot_rules and posture == shot_rules["posture"]:
-            score += 2
-        
-        # Use motion information if available
-        if motion and motion["is_swing"]:
-            if shot_name in ["straight drive", "cover drive", "on drive"] and motion["direction"] == "forward":
-                score += 2
-            elif shot_name in ["cut shot", "square drive"] and motion["direction"] == "sideways":
-                score += 2
-            elif shot_name in ["pull shot", "hook shot"] and motion["direction"] == "backward":
-                score += 2
-        
-        shot_scores[shot_name] = score
+    return None
+
+def motion_index(motion):
+    """
+    Index of a motion into MOTION_DIRECTIONS, or NO_SWING.
     
-    # Find the shot with the highest score
-    max_score = max(shot_scores.values()) if shot_scores else 0
-    best_shots = [shot for shot, score in shot_scores.items() if score == max_score]
+    Args:
+        motion (dict): Motion from MotionEstimator or calculate_motion
     
-    # Only return a shot if the score is above a threshold
-    if max_score >= 2 and best_shots:
-        # Return the first best shot
-        return best_shots[0]
+    Returns:
+        int: Motion index for classify_shots
+    """
+    if motion["is_swing"] and motion["direction"] in MOTION_DIRECTIONS:
+        return MOTION_DIRECTIONS.index(motion["direction"])
+    return NO_SWING
+
+def label_shots(poses, motion_tracker=None):
+    """
+    Classify the shot of every pose in a frame with one classify_shots call.
     
-    return None
+    Each pose gets a 'shot' (a SHOT_RULES name, or None below
+    MIN_SHOT_SCORE) and a 'shot_score'.
+    
+    Args:
+        poses (list): Poses of one frame
+        motion_tracker (MotionTracker): Motion state of the players; poses
+            with a 'track_id' update it and score the motion bonus
+    
+    Returns:
+        list: The poses, labelled in place
+    """
+    if not poses:
+        return poses
+    
+    features = pose_features_batch(poses_to_array(poses))
+    
+    motions = None
+    if motion_tracker is not None:
+        motions = np.full(len(poses), NO_SWING)
+        for i, pose in enumerate(poses):
+            if pose.get('track_id') is not None:
+                motions[i] = motion_index(motion_tracker.update(pose['track_id'], pose))
+    
+    shot_ids, scores = classify_shots(features, motions=motions)
+    
+    for pose, shot_id, score in zip(poses, shot_ids[:, 0].tolist(), scores[:, 0].tolist()):
+        pose['shot'] = COMPILED_RULES['shot_names'][shot_id] if score >= MIN_SHOT_SCORE else None
+        pose['shot_score'] = score
+    
+    return poses
+
+def determine_postures(features):
+    """
+    Determine postures for a batch of poses.
+    
+    Args:
+        features (numpy.ndarray): (N, len(FEATURE_NAMES)) pose features
+    
+    Returns:
+        numpy.ndarray: (N,) indexes into POSTURES
+    """
+    postures = np.zeros(len(features), dtype=np.intp)
+    
+    # Leaning is judged from the nose against the neck, but the neck is the
+    # origin of the relative features, so like determine_posture this only
+    # separates kneeling from upright
+    knees = features[:, [FEATURE_INDEX['right_knee_angle'], FEATURE_INDEX['left_knee_angle']]]
+    postures[(knees < 90).any(axis=1)] = POSTURES.index("kneeling")
+    
+    return postures
 
 def determine_posture(features):
     """
@@ -148,7 +280,7 @@ def determine_posture(features):
     
     Args:
         features (dict): Features extracted from the pose
-        
+    
     Returns:
         str: Detected posture
     """
@@ -177,71 +309,159 @@ def determine_posture(features):
     # Default to upright posture
     return "upright"
 
+# Wrist movement (pixels) below which a player counts as still
+MOTION_THRESHOLD = 30
+
+def _motion_direction(dx, dy):
+    # Determine direction of movement
+    if abs(dx) > MOTION_THRESHOLD or abs(dy) > MOTION_THRESHOLD:  # Threshold for significant movement
+        if abs(dx) > abs(dy):
+            return "sideways"
+        return "forward" if dy > 0 else "backward"
+    return "none"
+
+class MotionEstimator:
+    """
+    Streaming swing detector for one batsman.
+    
+    Keeps the last window_size right-wrist positions, the velocities
+    between them and whether each pair of consecutive velocities reversed
+    direction, plus a running count of reversals in the window. Each frame
+    adds one of each and drops the oldest, so an update costs the same no
+    matter how long the video runs.
+    """
+    
+    __slots__ = ('window_size', '_wrists', '_velocities', '_reversals', '_reversal_count')
+    
+    def __init__(self, window_size=5):
+        self.window_size = window_size
+        self._wrists = deque(maxlen=window_size)
+        self._velocities = deque(maxlen=max(window_size - 1, 0))
+        self._reversals = deque(maxlen=max(window_size - 2, 0))
+        self._reversal_count = 0
+    
+    def measure(self, pose):
+        """
+        Motion of a pose relative to the wrist history, without recording it.
+        
+        Args:
+            pose (dict): Current pose with keypoints
+        
+        Returns:
+            dict: Motion information including direction and if it's a swing
+        """
+        wrist = pose["keypoints"].get("right_wrist")
+        if wrist is None or not self._wrists:
+            return {"direction": "none", "displacement": (0, 0), "is_swing": False}
+        
+        # Total displacement since the oldest wrist in the window
+        start_x, start_y = self._wrists[0]
+        dx = wrist[0] - start_x
+        dy = wrist[1] - start_y
+        
+        return {
+            "direction": _motion_direction(dx, dy),
+            "displacement": (dx, dy),
+            # A velocity sign change inside the window means the wrist swung
+            "is_swing": self._reversal_count > 0
+        }
+    
+    def observe(self, pose):
+        """
+        Add a pose's wrist to the history.
+        
+        Args:
+            pose (dict): Pose with keypoints; poses without a right wrist are ignored
+        """
+        wrist = pose["keypoints"].get("right_wrist")
+        if wrist is None:
+            return
+        
+        x, y = wrist[0], wrist[1]
+        if self._wrists:
+            prev_x, prev_y = self._wrists[-1]
+            vx, vy = x - prev_x, y - prev_y
+            
+            if self._velocities:
+                prev_vx, prev_vy = self._velocities[-1]
+                reversal = vx * prev_vx < 0 or vy * prev_vy < 0
+                
+                # Keep the running count in step with the pair falling out of the window
+                if self._reversals and len(self._reversals) == self._reversals.maxlen:
+                    self._reversal_count -= self._reversals[0]
+                if self._reversals.maxlen:
+                    self._reversals.append(reversal)
+                    self._reversal_count += reversal
+            
+            self._velocities.append((vx, vy))
+        
+        self._wrists.append((x, y))
+    
+    def update(self, pose):
+        """
+        Measure a pose's motion, then add it to the history.
+        
+        Args:
+            pose (dict): Current pose with keypoints
+        
+        Returns:
+            dict: Motion information including direction and if it's a swing
+        """
+        motion = self.measure(pose)
+        self.observe(pose)
+        return motion
+
+class MotionTracker:
+    """
+    MotionEstimators for several batsmen, keyed by player track id.
+    
+    Only the max_tracks most recently updated players are kept, so
+    players who leave the frame do not pile up over a long video.
+    """
+    
+    def __init__(self, window_size=5, max_tracks=32):
+        self.window_size = window_size
+        self.max_tracks = max_tracks
+        self._estimators = OrderedDict()
+    
+    def update(self, track_id, pose):
+        """
+        Measure and record the motion of one tracked player.
+        
+        Args:
+            track_id (int): Player track id
+            pose (dict): The player's current pose
+        
+        Returns:
+            dict: Motion information including direction and if it's a swing
+        """
+        estimator = self._estimators.get(track_id)
+        if estimator is None:
+            estimator = self._estimators[track_id] = MotionEstimator(self.window_size)
+            while len(self._estimators) > self.max_tracks:
+                self._estimators.popitem(last=False)
+        else:
+            self._estimators.move_to_end(track_id)
+        
+        return estimator.update(pose)
+
 def calculate_motion(current_pose, previous_poses, window_size=5):
     """
     Calculate motion of the player based on pose history.
     
+    For frame-by-frame use keep a MotionEstimator instead, which does not
+    rebuild the history on every call.
+    
     Args:
         current_pose (dict): Current pose with keypoints
         previous_poses (list): Previous poses for tracking movement
         window_size (int): Number of previous frames to consider
-        
+    
     Returns:
         dict: Motion information including direction and if it's a swing
     """
-    # Use a limited window of previous poses
-    poses_window = previous_poses[-window_size:] if len(previous_poses) > window_size else previous_poses
+    estimator = MotionEstimator(window_size)
+    for prev_pose in previous_poses[-window_size:]:
+        estimator.observe(prev_pose)
     
-    # Track movement of hands to detect swing
-    if "right_wrist" in current_pose["keypoints"] and poses_window:
-        current_wrist = current_pose["keypoints"]["right_wrist"][:2]
-        
-        # Check if previous poses have right_wrist
-        prev_wrists = []
-        for prev_pose in poses_window:
-            if "right_wrist" in prev_pose["keypoints"]:
-                prev_wrists.append(prev_pose["keypoints"]["right_wrist"][:2])
-        
-        if prev_wrists:
-            # Calculate total displacement
-            start_wrist = prev_wrists[0]
-            dx = current_wrist[0] - start_wrist[0]
-            dy = current_wrist[1] - start_wrist[1]
-            
-            # Determine direction of movement
-            direction = "none"
-            if abs(dx) > 30 or abs(dy) > 30:  # Threshold for significant movement
-                if abs(dx) > abs(dy):
-                    direction = "sideways"
-                else:
-                    direction = "forward" if dy > 0 else "backward"
-            
-            # Check if this is a swing motion
-            is_swing = False
-            if len(prev_wrists) >= 3:
-                # Calculate acceleration (change in velocity)
-                velocities = []
-                for i in range(1, len(prev_wrists)):
-                    vx = prev_wrists[i][0] - prev_wrists[i-1][0]
-                    vy = prev_wrists[i][1] - prev_wrists[i-1][1]
-                    velocities.append((vx, vy))
-                
-                # Check for sign change in velocity (acceleration)
-                if len(velocities) >= 2:
-                    for i in range(1, len(velocities)):
-                        if (velocities[i][0] * velocities[i-1][0] < 0 or 
-                            velocities[i][1] * velocities[i-1][1] < 0):
-                            is_swing = True
-                            break
-            
-            return {
-                "direction": direction,
-                "displacement": (dx, dy),
-                "is_swing": is_swing
-            }
-    
-    return {
-        "direction": "none",
-        "displacement": (0, 0),
-        "is_swing": False
-    }
+    return estimator.measure(current_pose)
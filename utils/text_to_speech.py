@@ -1,52 +1,144 @@
 import os
 import logging
 import time
-from gtts import gTTS
+from concurrent.futures import ThreadPoolExecutor
+from itertools import chain
+
+from .mp3 import concat_mp3
+from .tts_cache import split_sentences
+from .tts_engines import get_tts_engine
 
 logger = logging.getLogger(__name__)
 
-def text_to_speech(text, output_path):
+# Chunks synthesized at once; each is a network round trip, so threads
+# spend their time waiting rather than competing for the GIL
+TTS_WORKERS = int(os.environ.get('TTS_WORKERS', 4))
+
+def text_to_speech(text, output_path, engine=None, cache=None, bank=None):
     """
     Convert text to speech and save as audio file.
     
+    With a cache or an audio bank, the text is spoken sentence by sentence.
+    Sentences the bank covers are sliced from it, and only sentences that
+    are neither banked nor cached are synthesized.
+    
     Args:
         text (str): Commentary text to convert
         output_path (str): Path to save the audio file
+        engine (TTSEngine): Engine to speak with; defaults to get_tts_engine()
+        cache (TTSCache): Optional cache of synthesized sentences
+        bank (AudioBank): Optional pre-rendered template phrases; only
+            used if rendered with the same voice, lang and engine
         
     Returns:
-        bool: True if successful, False otherwise
+        bool: True if successful, False otherwise (the caller supplies
+            substitute audio; retrying the same engine would fail the same way)
     """
+    engine = engine or get_tts_engine()
+    
+    if bank is not None and not bank.matches(*engine.voice_key):
+        logger.warning(f"Audio bank was rendered with {bank.voice_key}, not {engine.voice_key}; ignoring it")
+        bank = None
+    
     try:
-        logger.info(f"Converting text to speech: {text[:100]}...")
+        logger.info(f"Converting text to speech with {engine.name}: {text[:100]}...")
         
-        # If the text is too long, split it
-        if len(text) > 5000:
+        if cache is not None or bank is not None:
+            audio = synthesize_sentences(split_sentences(text), engine, cache, bank=bank)
+            with open(output_path, 'wb') as f:
+                f.write(audio)
+        elif len(text) > 5000:
+            # If the text is too long, split it
             chunks = split_long_text(text)
             logger.info(f"Text is long, split into {len(chunks)} chunks")
-            return process_text_chunks(chunks, output_path)
-        
-        # Use Google Text-to-Speech (gTTS)
-        tts = gTTS(text=text, lang='en', slow=False)
-        
-        # Save to output file
-        tts.save(output_path)
+            if not process_text_chunks(chunks, output_path, engine):
+                return False
+        else:
+            audio = engine(text)
+            
+            # Save to output file
+            with open(output_path, 'wb') as f:
+                f.write(audio)
         
         logger.info(f"Text-to-speech conversion completed. Saved to {output_path}")
         return True
     
     except Exception as e:
         logger.error(f"Error in text-to-speech conversion: {str(e)}")
-        
-        # Create a fallback audio file with a simple message
-        try:
-            fallback_text = "Commentary audio could not be generated. Please check the logs for more information."
-            fallback_tts = gTTS(text=fallback_text, lang='en', slow=False)
-            fallback_tts.save(output_path)
-            logger.info(f"Created fallback audio file at {output_path}")
-        except Exception as fallback_e:
-            logger.error(f"Failed to create fallback audio file: {str(fallback_e)}")
-        
         return False
+    
+    finally:
+        metrics = engine.metrics()
+        logger.info(
+            f"TTS engine {metrics['engine']}: {metrics['calls']} calls, {metrics['failures']} failed, "
+            f"{metrics['mean_seconds']:.2f}s mean / {metrics['max_seconds']:.2f}s max latency, "
+            f"{metrics['characters_per_second']:.0f} characters/sec"
+        )
+
+def synthesize_sentences(sentences, engine, cache, workers=TTS_WORKERS, bank=None):
+    """
+    Speak sentences, reusing banked or cached audio and synthesizing the rest.
+    
+    Missing sentences are synthesized concurrently, each once however
+    often it repeats, and stored in the cache. The audio of all sentences
+    is then joined in order (see mp3.concat_mp3).
+    
+    Args:
+        sentences (list): Normalised sentences (see tts_cache.split_sentences)
+        engine (TTSEngine): Engine to speak with
+        cache (TTSCache): Cache of synthesized sentences, or None
+        workers (int): Sentences synthesized at once
+        bank (AudioBank): Pre-rendered template phrases, or None
+    
+    Returns:
+        bytes: MP3 audio of the whole text
+    """
+    banked = [bank.lookup(sentence) if bank is not None else None for sentence in sentences]
+    keys = {
+        i: cache.key(sentence, *engine.voice_key) if cache is not None else sentence
+        for i, sentence in enumerate(sentences) if banked[i] is None
+    }
+    segments = {key: cache.get(key) if cache is not None else None for key in set(keys.values())}
+    missing = {key: sentences[i] for i, key in keys.items() if segments[key] is None}
+    
+    if missing:
+        with ThreadPoolExecutor(max_workers=max(1, min(workers, len(missing)))) as pool:
+            for key, audio in zip(missing, pool.map(engine, missing.values())):
+                if cache is not None:
+                    cache.put(key, audio)
+                segments[key] = audio
+    
+    logger.info(
+        f"Spoke {len(sentences)} sentences: {len(sentences) - len(keys)} from the audio bank, "
+        f"{len(missing)} synthesized, the rest from cache"
+    )
+    return concat_mp3(chain.from_iterable(
+        banked[i] if banked[i] is not None else [segments[keys[i]]] for i in range(len(sentences))
+    ))
+
+def warm_cache(text, cache, engine=None, bank=None):
+    """
+    Synthesize the sentences of text into the cache ahead of time.
+    
+    Lets speech be produced while the rest of the commentary is still
+    being written; the final text_to_speech call then finds the sentences
+    cached. Failures are only logged.
+    
+    Args:
+        text (str): Commentary text
+        cache (TTSCache): Cache of synthesized sentences
+        engine (TTSEngine): Engine to speak with; defaults to get_tts_engine()
+        bank (AudioBank): Optional pre-rendered template phrases
+    """
+    engine = engine or get_tts_engine()
+    if bank is not None and not bank.matches(*engine.voice_key):
+        bank = None
+    
+    try:
+        synthesize_sentences(split_sentences(text), engine, cache, workers=1, bank=bank)
+    except Exception as e:
+        # The final text_to_speech call retries whatever is missing
+        logger.warning(f"Could not synthesize ahead of time: {str(e)}")
 
 def split_long_text(text, max_length=5000):
     """
@@ -86,35 +178,43 @@ def split_long_text(text, max_length=5000):
     
     return chunks
 
-def process_text_chunks(chunks, output_path):
+def process_text_chunks(chunks, output_path, engine=None, workers=TTS_WORKERS):
     """
-    Process chunks of text and create a single audio file.
-    For demo purposes, we'll only process the first chunk.
+    Synthesize chunks of text concurrently and join them into one audio file.
+    
+    Chunks go through a bounded thread pool, so the wall time is close to
+    that of the slowest chunk rather than the sum. The MP3s are joined
+    frame by frame in chunk order (see mp3.concat_mp3), without decoding.
     
     Args:
         chunks (list): List of text chunks
         output_path (str): Path to save the audio file
+        engine (TTSEngine): Engine to speak with; defaults to get_tts_engine()
+        workers (int): Chunks synthesized at once
         
     Returns:
         bool: True if successful, False otherwise
     """
+    if not chunks:
+        return False
+    
+    engine = engine or get_tts_engine()
+    
     try:
-        # For demo purposes, just use the first chunk
-        # In a real implementation, we would combine multiple audio files
-        if chunks:
-            first_chunk = chunks[0]
-            tts = gTTS(text=first_chunk, lang='en', slow=False)
-            tts.save(output_path)
-            
-            logger.info(f"Created audio from first chunk (of {len(chunks)}). Saved to {output_path}")
-            
-            # Add a note about using only the first part
-            if len(chunks) > 1:
-                logger.warning("Only using first part of commentary for demo purposes.")
-            
-            return True
-        else:
-            return False
+        start_time = time.perf_counter()
+        
+        with ThreadPoolExecutor(max_workers=max(1, min(workers, len(chunks)))) as pool:
+            # map returns results in chunk order and re-raises the first failure
+            segments = list(pool.map(engine, chunks))
+        
+        with open(output_path, 'wb') as f:
+            f.write(concat_mp3(segments))
+        
+        logger.info(
+            f"Synthesized {len(chunks)} chunks in {time.perf_counter() - start_time:.2f}s. "
+            f"Saved to {output_path}"
+        )
+        return True
     
     except Exception as e:
         logger.error(f"Error processing text chunks: {str(e)}")
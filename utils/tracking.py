@@ -0,0 +1,241 @@
+import logging
+from itertools import count
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# SciPy's Hungarian solver is a declared dependency. Installs without it
+# still track, assigning detections greedily, cheapest pair first
+SCIPY_AVAILABLE = False
+try:
+    from scipy.optimize import linear_sum_assignment
+    SCIPY_AVAILABLE = True
+except ImportError:
+    logger.info("scipy not installed. Tracking will use greedy assignment.")
+
+# Per-class association settings:
+#   metric      'iou' compares boxes, 'distance' compares centres
+#   max_cost    pairs costlier than this are never matched
+#   max_misses  frames a track survives without a detection
+#   min_hits    detections before a track counts as confirmed
+TRACKING_SETTINGS = {
+    'player': {'metric': 'iou', 'max_cost': 0.8, 'max_misses': 15, 'min_hits': 3},
+    'stumps': {'metric': 'iou', 'max_cost': 0.7, 'max_misses': 50, 'min_hits': 3},
+    # Ball costs are centre distances divided by the gate radius, which
+    # widens with the track's speed
+    'ball': {'metric': 'distance', 'max_cost': 1.0, 'max_misses': 5, 'min_hits': 3, 'gate': 60.0}
+}
+
+# Weight of the newest measurement in the smoothed velocity
+VELOCITY_SMOOTHING = 0.7
+
+def iou_matrix(boxes_a, boxes_b):
+    """
+    Pairwise intersection over union of two sets of boxes.
+    
+    Args:
+        boxes_a (numpy.ndarray): (N, 4) boxes as x1, y1, x2, y2
+        boxes_b (numpy.ndarray): (M, 4) boxes as x1, y1, x2, y2
+    
+    Returns:
+        numpy.ndarray: (N, M) IoU values
+    """
+    # Line detections (stumps) may come with swapped corners
+    a = np.concatenate([np.minimum(boxes_a[:, :2], boxes_a[:, 2:]), np.maximum(boxes_a[:, :2], boxes_a[:, 2:])], axis=1)
+    b = np.concatenate([np.minimum(boxes_b[:, :2], boxes_b[:, 2:]), np.maximum(boxes_b[:, :2], boxes_b[:, 2:])], axis=1)
+    
+    top_left = np.maximum(a[:, None, :2], b[None, :, :2])
+    bottom_right = np.minimum(a[:, None, 2:], b[None, :, 2:])
+    intersection = np.prod(np.clip(bottom_right - top_left, 0, None), axis=2)
+    
+    area_a = np.prod(a[:, 2:] - a[:, :2], axis=1)
+    area_b = np.prod(b[:, 2:] - b[:, :2], axis=1)
+    union = area_a[:, None] + area_b[None, :] - intersection
+    
+    return np.divide(intersection, union, out=np.zeros_like(intersection), where=union > 0)
+
+def assign(cost, max_cost):
+    """
+    Match rows to columns of a cost matrix.
+    
+    Args:
+        cost (numpy.ndarray): (N, M) cost matrix
+        max_cost (float): Pairs above this cost are left unmatched
+    
+    Returns:
+        list: (row, column) pairs
+    """
+    if cost.size == 0:
+        return []
+    
+    if SCIPY_AVAILABLE:
+        rows, cols = linear_sum_assignment(cost)
+        return [(r, c) for r, c in zip(rows.tolist(), cols.tolist()) if cost[r, c] <= max_cost]
+    
+    # Greedy: take the cheapest remaining pair until none are under the gate
+    pairs = []
+    used_rows, used_cols = set(), set()
+    flat_order = np.argsort(cost, axis=None)
+    for r, c in zip(*np.unravel_index(flat_order, cost.shape)):
+        if cost[r, c] > max_cost:
+            break
+        if r in used_rows or c in used_cols:
+            continue
+        pairs.append((int(r), int(c)))
+        used_rows.add(r)
+        used_cols.add(c)
+    return pairs
+
+class Track:
+    """A tracked object with a constant-velocity motion model"""
+    
+    __slots__ = ('id', 'class_name', 'bbox', 'velocity', 'confidence',
+                 'hits', 'misses', 'first_frame', 'last_frame')
+    
+    def __init__(self, track_id, class_name, bbox, confidence, frame_num):
+        self.id = track_id
+        self.class_name = class_name
+        self.bbox = bbox
+        self.velocity = np.zeros(2)
+        self.confidence = confidence
+        self.hits = 1
+        self.misses = 0
+        self.first_frame = frame_num
+        self.last_frame = frame_num
+    
+    @property
+    def center(self):
+        return (self.bbox[:2] + self.bbox[2:]) / 2
+    
+    def predict(self, frame_num):
+        """Box expected at frame_num if the object kept its velocity"""
+        shift = self.velocity * (frame_num - self.last_frame)
+        return self.bbox + np.concatenate([shift, shift])
+    
+    def correct(self, bbox, confidence, frame_num):
+        """Move the track to a matched detection"""
+        df = frame_num - self.last_frame
+        if df > 0:
+            measured = ((bbox[:2] + bbox[2:]) / 2 - self.center) / df
+            if self.hits == 1:
+                self.velocity = measured
+            else:
+                self.velocity = VELOCITY_SMOOTHING * measured + (1 - VELOCITY_SMOOTHING) * self.velocity
+        
+        self.bbox = bbox
+        self.confidence = confidence
+        self.hits += 1
+        self.misses = 0
+        self.last_frame = frame_num
+
+class MultiObjectTracker:
+    """
+    Keeps track ids for players, ball candidates and stumps across frames.
+    
+    Each class is associated separately: live tracks are moved forward
+    with their velocity, a cost matrix against the frame's detections is
+    built in one vectorised step (1 - IoU for boxes, gated centre distance
+    for the ball), and the pairs are solved with the Hungarian algorithm
+    when SciPy is available or greedily otherwise. Unmatched detections
+    start tracks; tracks that stay unmatched for too long are dropped.
+    """
+    
+    def __init__(self, settings=None):
+        self.settings = settings or TRACKING_SETTINGS
+        self.tracks = {class_name: [] for class_name in self.settings}
+        self._ids = count(1)
+        self.frame_num = None
+    
+    def update(self, objects, frame_num):
+        """
+        Associate a frame's detections with the tracks.
+        
+        Each object that is tracked gets a 'track_id' key added in place.
+        
+        Args:
+            objects (list): Detected objects in the frame
+            frame_num (int): Current frame number
+        
+        Returns:
+            list: Objects annotated with their track ids
+        """
+        self.frame_num = frame_num
+        
+        for class_name, config in self.settings.items():
+            detections = [obj for obj in objects if obj['class'] == class_name]
+            self._update_class(class_name, config, detections, frame_num)
+        
+        return objects
+    
+    def _update_class(self, class_name, config, detections, frame_num):
+        tracks = self.tracks[class_name]
+        boxes = np.array([obj['bbox'] for obj in detections], dtype=np.float64).reshape(-1, 4)
+        
+        if tracks and len(detections):
+            predicted = np.stack([track.predict(frame_num) for track in tracks])
+            
+            if config['metric'] == 'iou':
+                cost = 1.0 - iou_matrix(predicted, boxes)
+            else:
+                predicted_centers = (predicted[:, :2] + predicted[:, 2:]) / 2
+                centers = (boxes[:, :2] + boxes[:, 2:]) / 2
+                distance = np.linalg.norm(predicted_centers[:, None, :] - centers[None, :, :], axis=2)
+                # Fast balls get a wider gate, scaled by how far they could have moved
+                speeds = np.array([np.hypot(*track.velocity) * (frame_num - track.last_frame) for track in tracks])
+                cost = distance / (config['gate'] + speeds)[:, None]
+            
+            pairs = assign(cost, config['max_cost'])
+        else:
+            pairs = []
+        
+        matched_tracks = set()
+        matched_detections = set()
+        for t, d in pairs:
+            tracks[t].correct(boxes[d], detections[d]['confidence'], frame_num)
+            detections[d]['track_id'] = tracks[t].id
+            matched_tracks.add(t)
+            matched_detections.add(d)
+        
+        survivors = []
+        for t, track in enumerate(tracks):
+            if t not in matched_tracks:
+                track.misses += 1
+                if track.misses > config['max_misses']:
+                    continue
+            survivors.append(track)
+        
+        for d, obj in enumerate(detections):
+            if d not in matched_detections:
+                track = Track(next(self._ids), class_name, boxes[d], obj['confidence'], frame_num)
+                obj['track_id'] = track.id
+                survivors.append(track)
+        
+        self.tracks[class_name] = survivors
+    
+    def confirmed(self, class_name):
+        """
+        Tracks of a class that have been detected often enough to trust.
+        
+        Returns:
+            list: Confirmed tracks
+        """
+        min_hits = self.settings[class_name]['min_hits']
+        return [track for track in self.tracks[class_name] if track.hits >= min_hits]
+    
+    def best_ball(self):
+        """
+        Pick the ball track event detection should follow.
+        
+        Only confirmed tracks matched in the latest frame qualify; the
+        longest-running one wins, then the most confident. One-off circles
+        (crowd, logos, helmets) never build up enough hits to be chosen.
+        
+        Returns:
+            Track: The best ball track, or None
+        """
+        candidates = [track for track in self.confirmed('ball') if track.last_frame == self.frame_num]
+        if not candidates:
+            return None
+        
+        return max(candidates, key=lambda track: (track.hits, track.confidence))
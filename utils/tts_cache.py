@@ -0,0 +1,137 @@
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import unicodedata
+import uuid
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+# Sentences end at ., ! or ? followed by whitespace
+SENTENCE_END = re.compile(r'(?<=[.!?])\s+')
+
+def normalize_sentence(sentence):
+    """
+    Canonical form of a sentence for cache lookups.
+    
+    Unicode is NFKC-normalised and runs of whitespace collapse to single
+    spaces. Case is kept, since engines may stress capitalised words.
+    """
+    return ' '.join(unicodedata.normalize('NFKC', sentence).split())
+
+def split_sentences(text):
+    """
+    Split text into normalised sentences.
+    
+    Returns:
+        list: Non-empty sentences in order
+    """
+    sentences = (normalize_sentence(sentence) for sentence in SENTENCE_END.split(text))
+    return [sentence for sentence in sentences if sentence]
+
+class TTSCache:
+    """
+    Disk cache of synthesised sentence audio.
+    
+    Commentary is built from a fixed set of template sentences, so most
+    sentences of a job have been spoken before. Segments are keyed by the
+    normalised sentence, voice, language and engine version and stored as
+    one MP3 file each. Segments are evicted least recently used first once
+    the cache grows beyond max_bytes.
+    """
+    
+    def __init__(self, root, max_bytes=256 * 1024 ** 2):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self.root.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._bytes = sum(path.stat().st_size for path in self.root.glob('*/*.mp3'))
+        self.hits = 0
+        self.misses = 0
+    
+    def key(self, sentence, voice, lang, engine):
+        """
+        Build the cache key for a sentence spoken by an engine.
+        
+        Args:
+            sentence (str): Sentence text (normalised here)
+            voice (str): Voice or accent of the engine
+            lang (str): Language code
+            engine (str): Engine name and version
+        
+        Returns:
+            str: Cache key
+        """
+        material = json.dumps([normalize_sentence(sentence), voice, lang, engine])
+        return hashlib.sha256(material.encode()).hexdigest()
+    
+    def _path(self, key):
+        return self.root / key[:2] / f"{key}.mp3"
+    
+    def get(self, key):
+        """
+        Look up a segment and mark it as recently used.
+        
+        Returns:
+            bytes: MP3 audio, or None on a miss
+        """
+        path = self._path(key)
+        try:
+            audio = path.read_bytes()
+            os.utime(path)
+        except FileNotFoundError:
+            with self._lock:
+                self.misses += 1
+            return None
+        
+        with self._lock:
+            self.hits += 1
+        return audio
+    
+    def put(self, key, audio):
+        """
+        Store a segment, evicting old ones if the cache is over its size.
+        
+        Args:
+            key (str): Cache key
+            audio (bytes): MP3 audio
+        """
+        path = self._path(key)
+        path.parent.mkdir(exist_ok=True)
+        
+        # Written under a temporary name so readers never see a partial file
+        tmp_path = path.parent / f".tmp-{uuid.uuid4().hex}"
+        tmp_path.write_bytes(audio)
+        os.replace(tmp_path, path)
+        
+        with self._lock:
+            self._bytes += len(audio)
+            over = self._bytes > self.max_bytes
+        if over:
+            self.evict()
+    
+    def evict(self):
+        """Remove least recently used segments until the cache fits max_bytes."""
+        with self._lock:
+            segments = []
+            total = 0
+            for path in self.root.glob('*/*.mp3'):
+                stat = path.stat()
+                segments.append((stat.st_mtime, stat.st_size, path))
+                total += stat.st_size
+            
+            segments.sort()
+            evicted = 0
+            while total > self.max_bytes and segments:
+                _, size, path = segments.pop(0)
+                path.unlink(missing_ok=True)
+                total -= size
+                evicted += 1
+            
+            self._bytes = total
+        
+        if evicted:
+            logger.info(f"Evicted {evicted} TTS cache segments")
@@ -0,0 +1,237 @@
+import io
+import logging
+import os
+import re
+import shutil
+import subprocess
+import threading
+import time
+
+from .ffmpeg_decoder import FFMPEG_AVAILABLE, FFMPEG_BINARY
+
+logger = logging.getLogger(__name__)
+
+# gTTS is optional; it needs outbound internet anyway
+GTTS_AVAILABLE = False
+try:
+    from gtts import gTTS
+    from gtts.version import __version__ as GTTS_VERSION
+    GTTS_AVAILABLE = True
+except ImportError:
+    logger.info("gTTS not installed. The gtts TTS engine will be unavailable.")
+
+# espeak-ng (or the older espeak) speaks offline; its WAV output is
+# encoded to MP3 with ffmpeg
+ESPEAK_BINARY = os.environ.get('ESPEAK_BINARY') or shutil.which('espeak-ng') or shutil.which('espeak')
+ESPEAK_AVAILABLE = ESPEAK_BINARY is not None and FFMPEG_AVAILABLE
+
+TTS_ENGINE = os.environ.get('TTS_ENGINE', 'gtts')  # gtts, espeak or silent
+# Speak silence instead of failing when the configured engine can't run here;
+# off by default so a broken deployment doesn't quietly lose its commentary
+TTS_ALLOW_SILENT_FALLBACK = os.environ.get('TTS_ALLOW_SILENT_FALLBACK', '0') == '1'
+TTS_LANG = os.environ.get('TTS_LANG', 'en')
+TTS_VOICE = os.environ.get('TTS_VOICE')  # Engine specific; None uses the engine's default
+ESPEAK_RATE = int(os.environ.get('ESPEAK_RATE', 165))  # Words per minute
+
+# Silent MPEG-1 Layer III frame: 32 kbit/s, 44.1 kHz, mono, 26 ms. All-zero
+# side information decodes to silence, so no encoder is needed
+SILENT_FRAME = b'\xff\xfb\x10\xc0' + bytes(100)
+SILENT_FRAME_SECONDS = 1152 / 44100
+
+class TTSEngine:
+    """
+    Interface of a text-to-speech engine producing MP3 audio.
+    
+    Engines are created once per process by get_tts_engine and shared by
+    all jobs, so synthesize must be thread-safe. Calling the engine
+    synthesizes and records latency and throughput (see metrics).
+    """
+    
+    name = None
+    version = ''
+    default_voice = None
+    
+    def __init__(self, voice=None, lang=TTS_LANG):
+        self.voice = voice or self.default_voice
+        self.lang = lang
+        self._lock = threading.Lock()
+        self._calls = 0
+        self._failures = 0
+        self._characters = 0
+        self._seconds = 0.0
+        self._max_seconds = 0.0
+    
+    def synthesize(self, text):
+        """
+        Speak text.
+        
+        Args:
+            text (str): Text to speak
+        
+        Returns:
+            bytes: MP3 audio
+        """
+        raise NotImplementedError
+    
+    def __call__(self, text):
+        start = time.perf_counter()
+        try:
+            audio = self.synthesize(text)
+        except Exception:
+            with self._lock:
+                self._failures += 1
+            raise
+        
+        elapsed = time.perf_counter() - start
+        with self._lock:
+            self._calls += 1
+            self._characters += len(text)
+            self._seconds += elapsed
+            self._max_seconds = max(self._max_seconds, elapsed)
+        return audio
+    
+    @property
+    def cache_tag(self):
+        """Identifies what this engine would say, for audio caching"""
+        return f"{self.name}-{self.version}" if self.version else self.name
+    
+    @property
+    def voice_key(self):
+        """(voice, lang, engine) the audio of this engine is keyed by"""
+        return (self.voice, self.lang, self.cache_tag)
+    
+    def metrics(self):
+        """
+        Latency and throughput of the calls so far.
+        
+        Returns:
+            dict: calls, failures, characters, total/mean/max seconds per
+                call and characters per second of synthesis time
+        """
+        with self._lock:
+            return {
+                'engine': self.name,
+                'calls': self._calls,
+                'failures': self._failures,
+                'characters': self._characters,
+                'seconds': self._seconds,
+                'mean_seconds': self._seconds / self._calls if self._calls else 0.0,
+                'max_seconds': self._max_seconds,
+                'characters_per_second': self._characters / self._seconds if self._seconds > 0 else 0.0
+            }
+
+class GTTSEngine(TTSEngine):
+    """Google Text-to-Speech; one HTTPS request per 100 characters or so"""
+    
+    name = 'gtts'
+    default_voice = 'com'  # Accent, given as the Google domain to use
+    
+    def __init__(self, voice=None, lang=TTS_LANG):
+        super().__init__(voice, lang)
+        self.version = GTTS_VERSION
+    
+    def synthesize(self, text):
+        buffer = io.BytesIO()
+        gTTS(text=text, lang=self.lang, tld=self.voice, slow=False).write_to_fp(buffer)
+        return buffer.getvalue()
+
+class EspeakEngine(TTSEngine):
+    """Offline espeak-ng speech, encoded to MP3 by ffmpeg"""
+    
+    name = 'espeak'
+    
+    def __init__(self, voice=None, lang=TTS_LANG, rate=ESPEAK_RATE):
+        super().__init__(voice, lang)
+        self.voice = self.voice or lang
+        self.rate = rate
+        result = subprocess.run([ESPEAK_BINARY, '--version'], capture_output=True, text=True, check=True)
+        version = re.search(r'\d+(\.\d+)+', result.stdout)
+        self.version = version.group() if version else 'unknown'
+    
+    def synthesize(self, text):
+        speech = subprocess.run(
+            [ESPEAK_BINARY, '-v', self.voice, '-s', str(self.rate), '--stdout', text],
+            capture_output=True, check=True
+        )
+        # No ID3 tag or Xing frame, so the frames join cleanly
+        encoded = subprocess.run(
+            [FFMPEG_BINARY, '-nostdin', '-hide_banner', '-loglevel', 'error', '-f', 'wav', '-i', 'pipe:0',
+             '-ac', '1', '-ar', '22050', '-codec:a', 'libmp3lame', '-b:a', '48k',
+             '-write_xing', '0', '-id3v2_version', '0', '-f', 'mp3', 'pipe:1'],
+            input=speech.stdout, capture_output=True, check=True
+        )
+        return encoded.stdout
+
+class SilentEngine(TTSEngine):
+    """
+    Deterministic silence as long as the text would take to say.
+    
+    Needs no network, binaries or models, so it stands in for real
+    engines in tests and benchmarks, and for an unavailable engine when
+    TTS_ALLOW_SILENT_FALLBACK is set.
+    """
+    
+    name = 'silent'
+    version = '1'
+    
+    # Roughly 15 characters per second of speech
+    SECONDS_PER_CHARACTER = 1 / 15
+    
+    def synthesize(self, text):
+        frames = max(1, round(len(text) * self.SECONDS_PER_CHARACTER / SILENT_FRAME_SECONDS))
+        return SILENT_FRAME * frames
+
+TTS_ENGINES = {
+    'gtts': GTTSEngine,
+    'espeak': EspeakEngine,
+    'silent': SilentEngine
+}
+
+_engines = {}
+_engines_lock = threading.Lock()
+
+def _create_engine(name):
+    if name not in TTS_ENGINES:
+        raise ValueError(f"Unknown TTS engine: {name}")
+    
+    missing = None
+    if name == 'gtts' and not GTTS_AVAILABLE:
+        missing = "gTTS is not installed"
+    elif name == 'espeak' and not ESPEAK_AVAILABLE:
+        missing = "espeak-ng or ffmpeg is not available"
+    
+    if missing:
+        if not TTS_ALLOW_SILENT_FALLBACK:
+            raise RuntimeError(
+                f"The {name} TTS engine can't run: {missing}. "
+                f"Set TTS_ENGINE=silent or TTS_ALLOW_SILENT_FALLBACK=1 to speak silence instead"
+            )
+        logger.warning(f"{missing}, using the silent TTS engine (TTS_ALLOW_SILENT_FALLBACK)")
+        return SilentEngine(TTS_VOICE)
+    
+    logger.info(f"Using the {name} TTS engine")
+    return TTS_ENGINES[name](TTS_VOICE)
+
+def get_tts_engine(name=None):
+    """
+    Get the shared TTS engine for a backend, creating it on first use.
+    
+    Engines that cannot run here (missing package or binary) raise,
+    unless TTS_ALLOW_SILENT_FALLBACK replaces them by the silent engine.
+    
+    Args:
+        name (str): Engine name; defaults to TTS_ENGINE
+    
+    Returns:
+        TTSEngine: The engine
+    """
+    name = name or TTS_ENGINE
+    
+    engine = _engines.get(name)
+    if engine is None:
+        with _engines_lock:
+            engine = _engines.get(name)
+            if engine is None:
+                engine = _engines[name] = _create_engine(name)
+    
+    return engine